@@ -0,0 +1,301 @@
+"""Host side stand-ins for the CircuitPython hardware modules.
+
+Importing this module puts src/ on sys.path and registers fake `board`,
+`digitalio` and `busio` modules, so firmware modules can be imported and
+benchmarked on a PC. All fakes read time from the shared virtual `clock`.
+"""
+
+import functools
+import os
+import sys
+import types
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+
+class Clock:
+    def __init__(self):
+        self.now_ns = 0
+
+    def advance(self, ns):
+        self.now_ns += ns
+
+
+clock = Clock()
+
+
+class FakePin:
+    """Output pin which records time of every rising edge."""
+    def __init__(self, pin=None):
+        self.pin = pin
+        self.direction = None
+        self._value = False
+        self.edges = []
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, val):
+        if val and not self._value:
+            self.edges.append(clock.now_ns)
+        self._value = bool(val)
+
+    def deinit(self):
+        pass
+
+
+class FakeUART:
+    """UART which never answers, modules which need a peer replace it."""
+    def __init__(self, tx=None, rx=None, baudrate=9600, timeout=1):
+        self.baudrate = baudrate
+        self.timeout = timeout
+
+    def write(self, data):
+        return len(data)
+
+    def read(self, nbytes=None):
+        return b""
+
+    def readinto(self, buf):
+        return 0
+
+    @property
+    def in_waiting(self):
+        return 0
+
+    def reset_input_buffer(self):
+        pass
+
+    def deinit(self):
+        pass
+
+
+# 8 data bits + ACK at 100 kHz
+I2C_BYTE_NS = 90_000
+
+
+class FakeI2C:
+    """I2C bus which counts writeto transactions and bytes.
+
+    Every writeto advances the virtual clock by the time the address and
+    data bytes take on a 100 kHz bus.
+    """
+    def __init__(self, scl=None, sda=None, frequency=100000):
+        self.transactions = 0
+        self.bytes = 0
+
+    def try_lock(self):
+        return True
+
+    def unlock(self):
+        pass
+
+    def scan(self):
+        return [0x27]
+
+    def writeto(self, address, buffer, *, start=0, end=None):
+        end = len(buffer) if end is None else end
+        self.transactions += 1
+        self.bytes += end - start
+        clock.advance((1 + end - start) * I2C_BYTE_NS)
+
+    def reset_counters(self):
+        self.transactions = 0
+        self.bytes = 0
+
+
+@functools.lru_cache(maxsize=1024)
+def _crc8_atm(data):
+    crc = 0
+    for byte in data:
+        for _ in range(8):
+            if (crc >> 7) ^ (byte & 0x01):
+                crc = ((crc << 1) ^ 0x07) & 0xFF
+            else:
+                crc = (crc << 1) & 0xFF
+            byte >>= 1
+    return crc
+
+
+def crc8_atm(data):
+    """Reference bit by bit CRC of TMC datagrams, independent of the firmware table."""
+    return _crc8_atm(bytes(data))
+
+
+class FakeTmc2208:
+    """Register model of a TMC2208 on a single wire UART, use it as TMC_UART.ser.
+
+    Every frame written is echoed back (single wire), read requests get an
+    8 byte reply, valid writes update the register and increment IFCNT.
+    drop_writes / corrupt_reads make the next N writes vanish or N replies
+    arrive with a broken CRC.
+    """
+    GCONF, GSTAT, IFCNT = 0x00, 0x01, 0x02
+
+    def __init__(self):
+        self.registers = {
+            0x00: 0x000001C1,   # GCONF
+            0x01: 0x00000001,   # GSTAT, reset flag set after power up
+            0x02: 0,            # IFCNT
+            0x06: 0x20000000,   # IOIN
+            0x12: 0x000FFFFF,   # TSTEP
+            0x6A: 0x00000008,   # MSCNT
+            0x6C: 0x10000053,   # CHOPCONF
+            0x6F: 0xC0000000,   # DRVSTATUS, standstill + stealth
+        }
+        self.rx = bytearray()
+        self.baudrate = 115200
+        self.timeout = 1
+        self.drop_writes = 0
+        self.corrupt_reads = 0
+        self.reads = 0
+        self.writes = 0
+
+    def write(self, data):
+        self.rx += data
+        if len(data) == 4:
+            self.reads += 1
+            register = data[2]
+            val = self.registers.get(register, 0) & 0xFFFFFFFF
+            reply = bytearray([0x05, 0xFF, register, val >> 24 & 0xFF, val >> 16 & 0xFF, val >> 8 & 0xFF, val & 0xFF, 0])
+            reply[7] = crc8_atm(reply[:7])
+            if self.corrupt_reads:
+                self.corrupt_reads -= 1
+                reply[7] ^= 0xFF
+            self.rx += reply
+        elif len(data) == 8 and crc8_atm(data[:7]) == data[7]:
+            self.writes += 1
+            if self.drop_writes:
+                self.drop_writes -= 1
+            else:
+                register = data[2] & 0x7F
+                val = int.from_bytes(bytes(data[3:7]), "big")
+                if register == self.GSTAT:
+                    # flags are cleared by writing 1
+                    val = self.registers[register] & ~val
+                self.registers[register] = val
+                self.registers[self.IFCNT] = (self.registers[self.IFCNT] + 1) & 0xFF
+        return len(data)
+
+    def read(self, nbytes=None):
+        nbytes = len(self.rx) if nbytes is None else min(nbytes, len(self.rx))
+        data = bytes(self.rx[:nbytes])
+        del self.rx[:nbytes]
+        return data
+
+    def readinto(self, buf):
+        nbytes = min(len(buf), len(self.rx))
+        buf[:nbytes] = self.rx[:nbytes]
+        del self.rx[:nbytes]
+        return nbytes
+
+    @property
+    def in_waiting(self):
+        return len(self.rx)
+
+    def reset_input_buffer(self):
+        self.rx.clear()
+
+    def deinit(self):
+        pass
+
+
+class FakeMuxUart:
+    """CD4051 in front of several FakeTmc2208, channel picked by the select pins."""
+    def __init__(self, drivers, select_pins):
+        self.drivers = drivers
+        self.select_pins = select_pins
+        self.baudrate = 115200
+        self.timeout = 1
+
+    @property
+    def driver(self):
+        channel = 0
+        for bit, pin in enumerate(self.select_pins):
+            channel |= int(pin.value) << bit
+        return self.drivers[channel]
+
+    def write(self, data):
+        return self.driver.write(data)
+
+    def read(self, nbytes=None):
+        return self.driver.read(nbytes)
+
+    def readinto(self, buf):
+        return self.driver.readinto(buf)
+
+    @property
+    def in_waiting(self):
+        return self.driver.in_waiting
+
+    def reset_input_buffer(self):
+        self.driver.reset_input_buffer()
+
+    def deinit(self):
+        pass
+
+
+def _install():
+    board = types.ModuleType("board")
+    board.__getattr__ = lambda name: name
+    sys.modules["board"] = board
+
+    digitalio = types.ModuleType("digitalio")
+    digitalio.DigitalInOut = FakePin
+    digitalio.Direction = types.SimpleNamespace(OUTPUT="OUTPUT", INPUT="INPUT")
+    sys.modules["digitalio"] = digitalio
+
+    busio = types.ModuleType("busio")
+    busio.UART = FakeUART
+    busio.I2C = FakeI2C
+    sys.modules["busio"] = busio
+
+    if SRC not in sys.path:
+        sys.path.insert(0, SRC)
+
+
+_install()
+
+
+def fake_step_backend(max_burst=32, window_ns=2_000_000):
+    """Burst step backend which records pulse times; send() blocks like PulseOut does."""
+    from array import array
+    from step_backend import StepBackend, STEP_PULSE_US
+
+    class FakeStepBackend(StepBackend):
+        def __init__(self):
+            self.max_burst = max_burst
+            self.window_ns = window_ns
+            self.intervals = array("L", [0] * max_burst)
+            self.edges = []
+            self.calls = 0
+
+        def pulse(self):
+            self.calls += 1
+            self.edges.append(clock.now_ns)
+
+        def send(self, count):
+            self.calls += 1
+            t = clock.now_ns
+            for i in range(count):
+                self.edges.append(t)
+                if i < count - 1:
+                    t += max(2 * STEP_PULSE_US * 1000, self.intervals[i])
+            clock.now_ns = t
+
+    return FakeStepBackend()
+
+
+def use_virtual_time():
+    """Makes time.monotonic_ns()/monotonic() follow the virtual clock."""
+    import time
+    time.monotonic_ns = lambda: clock.now_ns
+    time.monotonic = lambda: clock.now_ns / 1e9
+
+
+def quiet_logs():
+    """Stops firmware pdebug/perror from echoing to stdout during a benchmark."""
+    import log
+    log.print = lambda *args, **kwargs: None
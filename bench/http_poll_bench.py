@@ -0,0 +1,86 @@
+"""Step loop gaps under HTTP load, every poll with inline handlers vs. throttled polls and jobs.
+
+A motion is in progress the whole run. motors_task sleeps through its
+profiler TaskStats like code.py, the loop gap is its wake-up lag. A poll costs POLL_S of blocking work, every CONFIG_EVERY-th
+request is a motor config doing CONFIG_S of UART transactions. "before"
+polls on every loop iteration and runs the config inside the poll,
+"after" polls every HTTP_POLL_MOVING_S while moving and queues the config
+as a job, which waits for the motion to end.
+
+    python bench/http_poll_bench.py
+"""
+
+import asyncio
+import time
+
+from fakes import quiet_logs
+
+quiet_logs()
+
+import config
+from jobs import JobQueue
+from loop_stats import Histogram
+from profiler import Profiler
+
+RUN_S = 1.0
+POLL_S = 0.0003
+CONFIG_S = 0.02
+CONFIG_EVERY = 10
+
+
+def busy_wait(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+async def scenario(throttle):
+    motors = Profiler(enabled=True).task("motors")
+    polls = Histogram()
+    jobs = JobQueue(max_jobs=1000)
+    moving = [True]
+    count = [0]
+
+    def poll():
+        started = time.monotonic_ns()
+        busy_wait(POLL_S)
+        count[0] += 1
+        if count[0] % CONFIG_EVERY == 0:
+            if throttle:
+                jobs.submit("config", busy_wait, CONFIG_S)
+            else:
+                busy_wait(CONFIG_S)
+        polls.add((time.monotonic_ns() - started) // 1000)
+
+    async def motors_task():
+        while True:
+            await motors.sleep(0)
+
+    async def http_task():
+        while True:
+            poll()
+            await asyncio.sleep(config.HTTP_POLL_MOVING_S if throttle and moving[0] else 0)
+
+    tasks = [asyncio.create_task(motors_task()), asyncio.create_task(http_task()),
+             asyncio.create_task(jobs.run(lambda: moving[0]))]
+    await asyncio.sleep(0)
+    motors.iterations.reset()
+    motors.lag.reset()
+    await asyncio.sleep(RUN_S)
+    moving[0] = False
+    # the motors iteration is empty, its lag is the gap between two iterations
+    loop = motors.lag.stats()
+    for task in tasks:
+        task.cancel()
+    return loop, polls.stats(), jobs.stats()
+
+
+def main():
+    print(f"{'':7} {'polls':>6} {'loop p50 us':>11} {'p99 us':>7} {'max us':>7} {'jobs queued':>11}")
+    for name, throttle in (("before", False), ("after", True)):
+        loop, polls, jobs = asyncio.run(scenario(throttle))
+        print(f"{name:7} {polls['count']:6} {loop['p50_us']:11} {loop['p99_us']:7} {loop['max_us']:7} {jobs['queued']:11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""I2C transactions per LCD render, full rewrite vs. frame diff.
+
+The network screen is rendered once a second with only the clock changing,
+like on the device after boot. "full rewrite" is the old render_about
+which wrote the IP and timestamp through Lcd.write every time.
+
+    python bench/lcd_frame_bench.py
+"""
+
+import time
+
+from fakes import quiet_logs
+
+quiet_logs()
+
+import lcd_pico_lib
+lcd_pico_lib.sleep = lambda seconds: None
+
+import state
+from lcd import Lcd
+from screen import Screen
+from tools import format_datetime
+from state import MtuState
+
+RENDERS = 60
+
+
+class FullRewriteScreen(Screen):
+    def render(self):
+        self.lcd.move_to(0,0)
+        self.lcd.write("IP: ")
+        self.lcd.write(self.state.get(state.SK_IP_ADDRESS))
+        self.lcd.move_to(0,3)
+        self.lcd.write(format_datetime(time.localtime()))
+        return 1
+
+
+def measure(screen_class):
+    mtu_state = MtuState()
+    mtu_state.put(state.SK_IP_ADDRESS, "192.168.1.117")
+    lcd = Lcd()
+    screen = screen_class(lcd, mtu_state)
+    seconds = [1_700_000_000]
+    time.localtime = lambda: real_localtime(seconds[0])
+    # first render (whole screen) is not steady state
+    tick(mtu_state)
+    screen.render()
+    lcd.i2c.reset_counters()
+    for _ in range(RENDERS):
+        seconds[0] += 1
+        tick(mtu_state)
+        screen.render()
+    time.localtime = real_localtime
+    return lcd.i2c.transactions / RENDERS, lcd.i2c.bytes / RENDERS
+
+
+real_localtime = time.localtime
+
+
+def tick(mtu_state):
+    # what state_task does, but with seconds to have something change every render
+    mtu_state.put(state.SK_CLOCK, format_datetime(time.localtime()))
+
+
+def main():
+    full = measure(FullRewriteScreen)
+    diff = measure(Screen)
+    print(f"{'':14} {'transactions':>12} {'bytes':>8}   per render")
+    for name, (transactions, nbytes) in (("full rewrite", full), ("frame diff", diff)):
+        print(f"{name:14} {transactions:12.1f} {nbytes:8.1f}")
+    print(f"reduction {100 * (1 - diff[0] / full[0]):.1f} %")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""I2C bytes and transactions per rendered screen, per-nibble vs. batched HAL.
+
+"per nibble" is the I2cLcd HAL as it was: four writeto calls of a freshly
+allocated one byte bytearray per LCD byte. "batched" encodes the cursor
+move and the whole run into I2cLcd.run_buf and sends it at once. Both go
+through the frame diff, "full" repaints all four lines, "steady" is the
+network screen with only the clock ticking.
+
+    python bench/lcd_i2c_bench.py
+"""
+
+import time
+
+from fakes import quiet_logs
+
+quiet_logs()
+
+import lcd_pico_lib
+lcd_pico_lib.sleep = lambda seconds: None
+
+import lcd
+import state
+from lcd_pico_lib import I2cLcd, LcdApi, MASK_E, MASK_RS, SHIFT_BACKLIGHT, SHIFT_DATA
+from screen import Screen
+from state import MtuState
+from tools import format_datetime
+
+RENDERS = 60
+
+
+class PerNibbleI2cLcd(I2cLcd):
+    putbytes_at = LcdApi.putbytes_at
+
+    def hal_write_command(self, cmd):
+        byte = ((self.backlight << SHIFT_BACKLIGHT) | (((cmd >> 4) & 0x0f) << SHIFT_DATA))
+        self.i2c.writeto(self.i2c_addr, bytearray([byte | MASK_E]))
+        self.i2c.writeto(self.i2c_addr, bytearray([byte]))
+        byte = ((self.backlight << SHIFT_BACKLIGHT) | ((cmd & 0x0f) << SHIFT_DATA))
+        self.i2c.writeto(self.i2c_addr, bytearray([byte | MASK_E]))
+        self.i2c.writeto(self.i2c_addr, bytearray([byte]))
+
+    def hal_write_data(self, data):
+        byte = (MASK_RS | (self.backlight << SHIFT_BACKLIGHT) | (((data >> 4) & 0x0f) << SHIFT_DATA))
+        self.i2c.writeto(self.i2c_addr, bytearray([byte | MASK_E]))
+        self.i2c.writeto(self.i2c_addr, bytearray([byte]))
+        byte = (MASK_RS | (self.backlight << SHIFT_BACKLIGHT) | ((data & 0x0f) << SHIFT_DATA))
+        self.i2c.writeto(self.i2c_addr, bytearray([byte | MASK_E]))
+        self.i2c.writeto(self.i2c_addr, bytearray([byte]))
+
+
+def measure(lcd_class):
+    lcd.I2cLcd = lcd_class
+    mtu_state = MtuState()
+    mtu_state.put(state.SK_IP_ADDRESS, "192.168.1.117")
+    display = lcd.Lcd()
+    screen = Screen(display, mtu_state)
+    seconds = [1_700_000_000]
+    time.localtime = lambda: real_localtime(seconds[0])
+    i2c = display.i2c
+
+    i2c.reset_counters()
+    tick(mtu_state)
+    screen.render()
+    full = (i2c.transactions, i2c.bytes)
+
+    i2c.reset_counters()
+    started = time.perf_counter()
+    for _ in range(RENDERS):
+        seconds[0] += 1
+        tick(mtu_state)
+        screen.render()
+    elapsed = time.perf_counter() - started
+    time.localtime = real_localtime
+    steady = (i2c.transactions / RENDERS, i2c.bytes / RENDERS, elapsed / RENDERS * 1e6)
+    return full, steady
+
+
+real_localtime = time.localtime
+
+
+def tick(mtu_state):
+    # what state_task does, but with seconds to have something change every render
+    mtu_state.put(state.SK_CLOCK, format_datetime(time.localtime()))
+
+
+def main():
+    print(f"{'':11} | {'full: transactions':>18} {'bytes':>6} | {'steady: transactions':>20} {'bytes':>6} {'host us':>8}")
+    for name, lcd_class in (("per nibble", PerNibbleI2cLcd), ("batched", I2cLcd)):
+        full, steady = measure(lcd_class)
+        print(f"{name:11} | {full[0]:18} {full[1]:6} | {steady[0]:20.1f} {steady[1]:6.1f} {steady[2]:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Renders and I2C traffic of the event driven screens over ten idle minutes.
+
+state_task publishes the clock (to the minute) and motor status every
+0.5 s, the joystick moves the throttle axes now and then. Each screen is
+shown for the whole run; "polled" renders the network screen every second
+regardless, like screen_task did. The last part turns a fake rotary encoder
+one detent per screen and prints what the LCD shows.
+
+    python bench/lcd_screens_bench.py
+"""
+
+import time
+
+from fakes import quiet_logs
+
+quiet_logs()
+
+import lcd_pico_lib
+lcd_pico_lib.sleep = lambda seconds: None
+
+import state
+from encoder import RotaryEncoder
+from lcd import Lcd
+from screen import Screen
+from state import MtuState
+from tools import format_datetime
+
+TICKS = 1200            # 0.5 s each
+THROTTLE_EVERY = 40     # joystick change every 20 s
+
+
+class Pin:
+    def __init__(self, value=True):
+        self.value = value
+
+
+def make_screen():
+    mtu_state = MtuState()
+    mtu_state.put(state.SK_IP_ADDRESS, "192.168.1.117")
+    screen = Screen(Lcd(), mtu_state)
+    return screen, mtu_state
+
+
+def publish(mtu_state, tick):
+    now = time.localtime(1_700_000_000 + tick // 2)
+    mtu_state.put(state.SK_CLOCK, format_datetime(now)[:16])
+    mtu_state.put(state.SK_MOTORS, ("OK", "OK", "OK", "OK", "OK", "OK"))
+    if tick % THROTTLE_EVERY == 0:
+        mtu_state.put(state.SK_THROTTLE_1, tick * 7 % 4096)
+        mtu_state.put(state.SK_THROTTLE_2, tick * 5 % 4096)
+
+
+def run(screen_index, polled=False):
+    screen, mtu_state = make_screen()
+    screen.show(screen_index)
+    publish(mtu_state, 0)
+    screen.render()
+    i2c = screen.lcd.i2c
+    i2c.reset_counters()
+    renders = screen.renders
+    for tick in range(1, TICKS):
+        publish(mtu_state, tick)
+        if polled and tick % 2 == 0:
+            screen.mark_dirty()
+        screen.render()
+    return screen.renders - renders, i2c.transactions, i2c.bytes
+
+
+def turn(encoder, pin_a, pin_b, clockwise=True):
+    # one detent, four quadrature transitions
+    sequence = ((False, True), (False, False), (True, False), (True, True))
+    if not clockwise:
+        sequence = ((True, False), (False, False), (False, True), (True, True))
+    detents = 0
+    for a, b in sequence:
+        pin_a.value, pin_b.value = a, b
+        detents += encoder.poll()[0]
+    return detents
+
+
+def show(screen):
+    return " | ".join(row.decode() for row in screen.frame.shown)
+
+
+def main():
+    print(f"{'screen':16} {'renders':>7} {'transactions':>12} {'bytes':>6}   in {TICKS // 120} min")
+    for name, index, polled in (("network, polled", 0, True), ("network", 0, False),
+                                ("throttle", 1, False), ("motors", 2, False)):
+        renders, transactions, nbytes = run(index, polled)
+        print(f"{name:16} {renders:7} {transactions:12} {nbytes:6}")
+
+    screen, mtu_state = make_screen()
+    publish(mtu_state, 0)
+    pin_a, pin_b = Pin(), Pin()
+    encoder = RotaryEncoder(pin_a, pin_b)
+    screen.render()
+    print(show(screen))
+    for clockwise in (True, True, False):
+        screen.next(turn(encoder, pin_a, pin_b, clockwise))
+        screen.render()
+        print(show(screen))
+
+
+if __name__ == "__main__":
+    main()
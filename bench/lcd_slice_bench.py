@@ -0,0 +1,70 @@
+"""Longest event loop stall caused by an LCD repaint, blocking vs. sliced.
+
+A full repaint of the 4x20 display (after invalidate) is driven step by
+step: every step of the coroutine is one slice, between slices the other
+tasks (motors_task) get to run. I2C time comes from the fake bus at
+100 kHz in virtual time.
+
+    python bench/lcd_slice_bench.py
+"""
+
+from fakes import clock, quiet_logs, use_virtual_time
+
+quiet_logs()
+use_virtual_time()
+
+import lcd_pico_lib
+lcd_pico_lib.sleep = lambda seconds: None
+
+import state
+from lcd import Lcd
+from screen import Screen
+from state import MtuState
+
+
+def make_screen():
+    mtu_state = MtuState()
+    mtu_state.put(state.SK_IP_ADDRESS, "192.168.1.117")
+    screen = Screen(Lcd(), mtu_state)
+    screen.render()
+    screen.frame.invalidate()
+    screen.mark_dirty()
+    return screen
+
+
+def blocking():
+    screen = make_screen()
+    started = clock.now_ns
+    screen.render()
+    return 1, clock.now_ns - started
+
+
+def sliced(max_bytes):
+    screen = make_screen()
+    screen.compose()
+    coro = screen.frame.flush_async(max_bytes)
+    slices = 0
+    longest = 0
+    while True:
+        started = clock.now_ns
+        try:
+            coro.send(None)
+        except StopIteration:
+            break
+        finally:
+            slices += 1
+            longest = max(longest, clock.now_ns - started)
+    return slices, longest
+
+
+def main():
+    print(f"{'':18} {'slices':>6} {'longest stall us':>17}")
+    slices, longest = blocking()
+    print(f"{'blocking render':18} {slices:6} {longest / 1000:17.0f}")
+    for max_bytes in (16, 8, 2):
+        slices, longest = sliced(max_bytes)
+        print(f"{f'sliced, {max_bytes} bytes':18} {slices:6} {longest / 1000:17.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Log calls per second and heap per call, deque of LogItem vs. LogBuffer.
+
+Both store what pdebug passes on (the joined message string); print is
+silenced. "deque" is the previous log store: a LogItem per record with
+the timestamp formatted eagerly. Heap per call is what tracemalloc sees
+allocated and still alive after a call once the ring is full, plus the
+peak while logging (temporary objects the GC has to collect on the device).
+
+    python bench/log_buffer_bench.py
+"""
+
+import time
+import tracemalloc
+from collections import deque
+
+from fakes import quiet_logs
+
+quiet_logs()
+
+from log import LogBuffer, LOG_CAPACITY, LOG_ARENA_SIZE, LEVEL_DEBUG
+from tools import format_datetime
+
+CALLS = 50_000
+MESSAGE = "From regiter 0x6f read value 0x1c0000"
+
+
+class LogItem:
+    def __init__(self, log_number, log_time, level, message):
+        self.log_number = log_number
+        self.log_time = format_datetime(log_time)
+        self.level = level
+        self.message = message
+
+    def to_string(self):
+        return f"{self.log_time}: {self.level} {self.message}"
+
+
+class DequeLog:
+    def __init__(self):
+        self.items = deque([], LOG_CAPACITY)
+        self.counter = 0
+
+    def debug(self, message):
+        self.items.append(LogItem(self.counter, time.localtime(), "DEBUG", message))
+        self.counter += 1
+
+
+class BufferLog:
+    def __init__(self):
+        self.buffer = LogBuffer(LOG_CAPACITY, LOG_ARENA_SIZE)
+
+    def debug(self, message):
+        self.buffer.add(time.time(), LEVEL_DEBUG, message)
+
+
+def measure(store):
+    for _ in range(2 * LOG_CAPACITY):
+        store.debug(MESSAGE)
+    started = time.perf_counter()
+    for _ in range(CALLS):
+        store.debug(MESSAGE)
+    rate = CALLS / (time.perf_counter() - started)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    for _ in range(1000):
+        store.debug(MESSAGE)
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return rate, (after - before) / 1000, peak - before
+
+
+def main():
+    print(f"{'':7} {'calls/s':>9} {'retained B/call':>16} {'peak B':>7}")
+    for name, store in (("deque", DequeLog()), ("buffer", BufferLog())):
+        rate, retained, peak = measure(store)
+        print(f"{name:7} {rate:9.0f} {retained:16.1f} {peak:7}")
+    print(f"record storage: deque {LOG_CAPACITY} LogItems with 3 strings each, "
+          f"buffer {LOG_ARENA_SIZE} B arena + {LOG_CAPACITY * 18} B of arrays allocated once")
+
+
+if __name__ == "__main__":
+    main()
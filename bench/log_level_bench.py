@@ -0,0 +1,65 @@
+"""UART transactions per second with tmc2208 debug logging on and off.
+
+Every read_int and write_reg used to log its register and value, so the
+message was formatted, printed and stored for every frame. The fake driver
+answers immediately and the inter-frame pause is zero, which leaves the
+cost of the transaction itself plus logging. "echo" prints to an in-memory
+sink standing in for the serial console.
+
+    python bench/log_level_bench.py
+"""
+
+import io
+import time
+
+from fakes import FakeTmc2208, quiet_logs
+
+quiet_logs()
+
+import log
+import tmc2208
+from tmc2208 import TMC_UART
+
+TRANSACTIONS = 20_000
+
+
+def make_tmc():
+    tmc = TMC_UART(115200)
+    tmc.ser = FakeTmc2208()
+    tmc.communication_pause = 0
+    return tmc
+
+
+def rate(tmc):
+    """best of three runs, the host is noisy"""
+    best = 0
+    for _ in range(3):
+        started = time.perf_counter()
+        for i in range(TRANSACTIONS // 2):
+            tmc.read_int(tmc2208.IFCNT)
+            tmc.write_reg(tmc2208.IHOLD_IRUN, i)
+        best = max(best, TRANSACTIONS / (time.perf_counter() - started))
+    return best
+
+
+def main():
+    real_sleep = time.sleep
+    time.sleep = lambda seconds: None
+    sink = io.StringIO()
+    tmc = make_tmc()
+    rate(tmc)
+    print(f"{'tmc2208 level':14} {'echo':5} {'frames/s':>9} {'logs':>6}")
+    for level, echo in (("DEBUG", True), ("DEBUG", False), ("ERROR", False)):
+        log.set_level("tmc2208", level)
+        log.set_echo(echo)
+        log.print = (lambda *args: print(*args, file=sink)) if echo else (lambda *args: None)
+        sink.seek(0)
+        sink.truncate()
+        before = log.get_last_log()
+        frames = rate(tmc)
+        print(f"{level:14} {str(echo):5} {frames:9.0f} {(log.get_last_log() - before) // 3:6}")
+    time.sleep = real_sleep
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Websocket log payload and heap per tick, whole deque vs. incremental stream.
+
+A debug heavy UART session logs LOGS_PER_TICK messages between two
+send_logs_if_needed ticks (one second). "whole deque" is the previous
+implementation serializing all kept log items every tick, "incremental"
+is LogStream sending what the client has not got yet. The skip check
+drops one log too big for the budget while the first sends are rejected
+(WsBroadcaster over budget) and expects it counted in skipped only once.
+
+    python bench/log_stream_bench.py
+"""
+
+import json
+import tracemalloc
+
+from fakes import quiet_logs
+
+quiet_logs()
+
+from log import pdebug, log_buffer, get_last_log
+from log_stream import LogStream
+
+TICKS = 30
+LOGS_PER_TICK = 12
+DATA = b'{"memory":123456,"lcd_max_slice_us":2970}'
+
+
+class FakeWebsocket:
+    """Copies like adafruit_httpserver does: str is encoded, payload goes into a new frame."""
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, message, fail_silently=False):
+        if isinstance(message, str):
+            message = message.encode()
+        frame = bytearray([0x82, 126])
+        frame.extend(message)
+        self.sent.append(frame)
+
+
+class RejectingWebsocket(FakeWebsocket):
+    """send_message returns False for the first `reject` messages, like WsBroadcaster over budget"""
+    def __init__(self, reject):
+        super().__init__()
+        self.reject = reject
+
+    def send_message(self, message, fail_silently=False):
+        if self.reject:
+            self.reject -= 1
+            return False
+        super().send_message(message, fail_silently)
+
+
+def skip_check():
+    """returns (skipped count, logs not delivered)"""
+    websocket = RejectingWebsocket(3)
+    first = get_last_log()
+    stream = LogStream(websocket, first, budget=512)
+    pdebug("x" * 600)
+    for i in range(4):
+        pdebug(f"From regiter 0x6f read value {hex(i)}")
+    ticks = 0
+    while stream.pending() and ticks < 20:
+        stream.send(DATA)
+        ticks += 1
+    delivered = set()
+    for frame in websocket.sent:
+        delivered.update(json.loads(bytes(frame[2:]))["logs"])
+    return stream.skipped, get_last_log() - first - len(delivered)
+
+
+def whole_deque(websocket, state):
+    if state[0] != get_last_log():
+        def to_json_item(slot):
+            return f"\"{log_buffer.numbers[slot]}\":\"{log_buffer.to_string(slot)}\""
+        json_logs_element = "{" + ",".join(map(to_json_item, log_buffer.slots())) + "}"
+        data_element = DATA.decode()
+        websocket.send_message("{\"logs\":"+json_logs_element+",\"data\":"+data_element+"}", fail_silently=True)
+        state[0] = get_last_log()
+
+
+def run(name, make_sender):
+    websocket = FakeWebsocket()
+    send = make_sender(websocket)
+    # fill the ring like after a while of running
+    for i in range(100):
+        pdebug(f"From regiter 0x6f read value {hex(i)}")
+    send()
+    websocket.sent.clear()
+    allocated = 0
+    for tick in range(TICKS):
+        for i in range(LOGS_PER_TICK):
+            pdebug(f"From regiter 0x6f read value {hex(tick * 100 + i)}")
+        tracemalloc.start()
+        send()
+        allocated += tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    payload = sum(len(m) - 2 for m in websocket.sent)
+    print(f"{name:12} {payload / TICKS:10.0f} {allocated / TICKS:12.0f}")
+    return websocket
+
+
+def main():
+    print(f"{'':12} {'bytes/tick':>10} {'heap B/tick':>12}")
+    state = [None]
+    run("whole deque", lambda ws: lambda: whole_deque(ws, state))
+    streams = []
+    def incremental(ws):
+        stream = LogStream(ws, get_last_log())
+        streams.append(stream)
+        return lambda: stream.send(DATA)
+    websocket = run("incremental", incremental)
+    print("last message:", bytes(websocket.sent[-1][2:122]), "...")
+    print("stream stats:", streams[0].stats())
+    skipped, lost = skip_check()
+    print(f"skip check: skipped {skipped}, not delivered {lost}")
+    assert skipped == lost == 1, "dropped logs miscounted"
+
+
+if __name__ == "__main__":
+    main()
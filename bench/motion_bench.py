@@ -0,0 +1,89 @@
+"""Pulses/second MotionController sustains with 1, 2 and 6 axes on fake pins.
+
+Every moving axis runs at RPM (16000 steps/s at 8 microsteps) while the
+simulated loop ticks every TICK_NS of virtual time. The wall clock time the
+host needs for SIMULATED_NS of stepping gives the pulses per CPU second the
+scheduling costs. For comparison the naive loop calls check_step on every
+motor each iteration, the way motors_task did with a single motor. The
+second part checks that a coordinated move finishes all axes on the same
+pulse.
+
+    python bench/motion_bench.py
+"""
+
+import time
+
+from fakes import clock, quiet_logs, use_virtual_time
+
+quiet_logs()
+use_virtual_time()
+
+from motor import Motor
+from motion import MotionController
+
+RPM = 600
+TICK_NS = 20_000
+SIMULATED_NS = 500_000_000
+
+
+def make_motors(count):
+    motors = [Motor(None, f"STEP{i}", f"DIR{i}") for i in range(count)]
+    for motor in motors:
+        motor.set_acceleration(0)
+    return motors
+
+
+def run_loop(motors, service):
+    clock.now_ns = 0
+    started = time.perf_counter()
+    while clock.now_ns < SIMULATED_NS:
+        service()
+        clock.now_ns += TICK_NS
+    elapsed = time.perf_counter() - started
+    return sum(len(m.backend.pin.edges) for m in motors) / elapsed
+
+
+def bench_controller(axes, moving):
+    clock.now_ns = 0
+    motion = MotionController(make_motors(axes))
+    for index in range(moving):
+        # stagger axes so their deadlines interleave like real moves do
+        clock.now_ns = index * 7_000
+        motion.move(index, 1 << 30, RPM)
+    return run_loop(motion.motors, motion.check_steps)
+
+
+def bench_naive(axes, moving):
+    clock.now_ns = 0
+    motors = make_motors(axes)
+    for index in range(moving):
+        clock.now_ns = index * 7_000
+        motors[index].move(1 << 30, RPM)
+    def service():
+        for motor in motors:
+            motor.check_step()
+    return run_loop(motors, service)
+
+
+def coordinated():
+    clock.now_ns = 0
+    motion = MotionController(make_motors(2))
+    motion.motors[0].set_acceleration(16000)
+    motion.move_coordinated([1600, -1100], 300)
+    while motion.is_moving():
+        clock.now_ns = motion.next_deadline_ns
+        motion.check_steps()
+    throttle1, throttle2 = (m.backend.pin.edges for m in motion.motors)
+    print(f"coordinated move: throttle 1 {len(throttle1)} pulses, throttle 2 {len(throttle2)} pulses, "
+          f"finish difference {(throttle1[-1] - throttle2[-1]) / 1000:.1f} us")
+
+
+def main():
+    print(f"{'axes':>4} {'moving':>6} | {'controller pulses/s':>20} | {'naive pulses/s':>15}")
+    for axes, moving in ((1, 1), (2, 2), (6, 6), (6, 2)):
+        print(f"{axes:>4} {moving:>6} | {bench_controller(axes, moving):>20.0f} | {bench_naive(axes, moving):>15.0f}")
+    coordinated()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Checks Motor.move acceleration profiles against the analytic motion profile.
+
+An ideal loop calls check_step exactly at every deadline, the fake step pin
+records the pulses. Total time and peak rate are compared with closed-form
+trapezoid / S-curve values; exits non-zero when the error exceeds TOLERANCE.
+The resync check stalls the loop during the acceleration and expects the
+schedule to go on with one ramp interval per pulse, none used twice.
+
+    python bench/motion_profile_bench.py
+"""
+
+import math
+import sys
+import time
+
+from fakes import clock, quiet_logs, use_virtual_time
+
+quiet_logs()
+use_virtual_time()
+
+from motor import Motor, STEPS_PER_REVOLUTION, DEFAULT_MICRO_STEPS
+
+TOLERANCE = 0.01
+
+
+def analytic(steps, rate, accel, jerk):
+    """Returns (total time in s, peak rate) of a symmetric profile covering steps."""
+    if jerk == 0:
+        if steps >= rate * rate / accel:
+            return steps / rate + rate / accel, rate
+        return 2 * math.sqrt(steps / accel), math.sqrt(steps * accel)
+    accel_time = rate / accel + accel / jerk
+    if rate < accel * accel / jerk:
+        accel_time = 2 * math.sqrt(rate / jerk)
+    if steps >= rate * accel_time:
+        return steps / rate + accel_time, rate
+    return None, None
+
+
+def run(steps, rpm, accel, jerk):
+    clock.now_ns = 0
+    motor = Motor(None, "GPIO17", "GPIO18")
+    motor.set_acceleration(accel, jerk)
+    started = time.perf_counter()
+    motor.move(steps, rpm)
+    prepare_s = time.perf_counter() - started
+    while motor.steps_to_do > 0:
+        clock.now_ns = motor.scheduler.next_pulse_ns
+        motor.check_step()
+    edges = motor.backend.pin.edges
+    # a pulse marks the start of its step, the move ends one interval after the last pulse
+    total_s = (edges[-1] - edges[0]) / 1e9 + 1 / (rpm * STEPS_PER_REVOLUTION * DEFAULT_MICRO_STEPS / 60)
+    peak = 1e9 / min(edges[i + 1] - edges[i] for i in range(len(edges) - 1))
+    return len(edges), total_s, peak, prepare_s
+
+
+def resync_check():
+    """returns gaps (ns) before the stall, after the resync and after the next pulse, and the expected ones"""
+    clock.now_ns = 0
+    motor = Motor(None, "GPIO17", "GPIO18")
+    motor.move(16000, 600)
+    scheduler = motor.scheduler
+    for _ in range(100):
+        clock.now_ns = scheduler.next_pulse_ns
+        motor.check_step()
+    clock.now_ns += 50_000_000
+    motor.check_step()
+    pulses = len(motor.backend.pin.edges)
+    gaps = [scheduler.next_pulse_ns - clock.now_ns]
+    clock.now_ns = scheduler.next_pulse_ns
+    motor.check_step()
+    gaps.append(scheduler.next_pulse_ns - clock.now_ns)
+    # the resync takes the ramp interval after the pulses made, the next pulse the one after it
+    reference = Motor(None, "GPIO17", "GPIO18")
+    reference.move(16000, 600)
+    expected = [reference.scheduler.ramp_interval(i) for i in range(pulses + 2)][-2:]
+    return gaps, expected
+
+
+def main():
+    failed = False
+    gaps, expected = resync_check()
+    line = f"resync during acceleration: gaps after it {gaps} ns, ramp {expected} ns"
+    if gaps != expected:
+        failed = True
+        line += " FAIL"
+    print(line)
+    cases = (
+        (16000, 600, 16000, 0),
+        (3200, 300, 16000, 0),
+        (400, 600, 16000, 0),
+        (20000, 600, 16000, 200000),
+        (32000, 900, 32000, 100000),
+    )
+    for steps, rpm, accel, jerk in cases:
+        rate = rpm * STEPS_PER_REVOLUTION * DEFAULT_MICRO_STEPS // 60
+        pulses, total_s, peak, prepare_s = run(steps, rpm, accel, jerk)
+        expected_s, expected_peak = analytic(steps, rate, accel, jerk)
+        line = (f"steps {steps:6} rate {rate:6} accel {accel:6} jerk {jerk:6}: pulses {pulses:6} "
+                f"time {total_s:7.4f}s peak {peak:8.1f}/s ramp build {prepare_s * 1000:6.1f}ms")
+        if expected_s is not None:
+            time_err = abs(total_s - expected_s) / expected_s
+            peak_err = abs(peak - expected_peak) / expected_peak
+            line += f" | analytic {expected_s:7.4f}s {expected_peak:8.1f}/s err {time_err:.2%} / {peak_err:.2%}"
+            if time_err > TOLERANCE or peak_err > TOLERANCE or pulses != steps:
+                failed = True
+                line += " FAIL"
+        print(line)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Time and heap per /joy request, rendered every hit vs. PageCache vs. 304.
+
+"render" is what the route did before the cache: read joy.html from flash
+and wrap it in the page template with the navigation. web.py needs wifi
+and adafruit_httpserver, so the template here is a stand-in of the same
+size. Heap is the peak tracemalloc sees while producing the body.
+
+    python bench/page_cache_bench.py
+"""
+
+import os
+import time
+import tracemalloc
+
+from fakes import SRC, quiet_logs
+
+quiet_logs()
+
+from page_cache import PageCache
+
+HITS = 5_000
+PAGES = ("/", "/log", "/joy", "/motors", "/about")
+
+
+def nav(current):
+    return " ".join(f"<li>{p}</li>" if p == current else f"<li><a href=\"{p}\">{p}</a></li>" for p in PAGES)
+
+
+def render():
+    with open(os.path.join(SRC, "static", "joy.html"), "r") as file:
+        content = file.read()
+    return f"""
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="utf-8" />
+    <meta name="viewport" content="width=device-width, initial-scale=1" />
+    <title>Joystick</title>
+    <link rel="stylesheet" href="main.css" />
+</head>
+<body>
+    <script src="joy.js"></script>
+    <div id="wrapper">
+        <header>Joystick</header>
+        <section id="content">
+            <nav><ul>{nav("/joy")}</ul></nav>
+            <article>{content}</article>
+        </section>
+        <footer>Footer</footer>
+    </div>
+    <script src="scripts.js"></script>
+</body>
+</html>
+    """.encode()
+
+
+def measure(name, hit):
+    hit()
+    started = time.perf_counter()
+    for _ in range(HITS):
+        hit()
+    us = (time.perf_counter() - started) / HITS * 1e6
+    tracemalloc.start()
+    hit()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{name:8} {us:8.1f} {peak:8}")
+
+
+def main():
+    cache = PageCache()
+    cache.add("/joy", render)
+    etag = cache.get("/joy")[1]
+    print(f"{'':8} {'us/hit':>8} {'peak B':>8}")
+    measure("render", render)
+    measure("cached", lambda: cache.get("/joy"))
+    measure("304", lambda: cache.is_fresh("/joy", etag))
+    print(f"page {len(cache.get('/joy')[0])} B, ETag {etag}, stats {cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
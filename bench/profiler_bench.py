@@ -0,0 +1,73 @@
+"""Profiler overhead per task iteration, and which task it blames for a stall.
+
+Overhead is the rate of a bare `await sleep(0)` loop, like motors_task,
+against the same loop sleeping through TaskStats.sleep. The second part
+runs a motors-like task next to a task which blocks for STALL_S every
+100 ms and prints what /api/stats would show.
+
+    python bench/profiler_bench.py
+"""
+
+import asyncio
+import time
+
+from fakes import quiet_logs
+
+quiet_logs()
+
+from profiler import Profiler
+
+RUN_S = 0.5
+STALL_S = 0.01
+
+
+async def spin(sleep, seconds):
+    count = 0
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        count += 1
+        await sleep(0)
+    return count
+
+
+async def stall_demo():
+    profiler = Profiler(enabled=True)
+
+    async def motors():
+        stats = profiler.task("motors")
+        while True:
+            await stats.sleep(0)
+
+    async def slow():
+        stats = profiler.task("slow")
+        while True:
+            end = time.perf_counter() + STALL_S
+            while time.perf_counter() < end:
+                pass
+            await stats.sleep(0.1)
+
+    tasks = [asyncio.create_task(motors()), asyncio.create_task(slow())]
+    await asyncio.sleep(RUN_S)
+    for task in tasks:
+        task.cancel()
+    for name, stats in profiler.stats()["tasks"].items():
+        iteration, lag = stats["iteration"], stats["lag"]
+        print(f"{name:7} iteration mean {iteration['mean_us']:6} max {iteration['max_us']:6} us | "
+              f"lag p50 {lag['p50_us']:6} p99 {lag['p99_us']:6} max {lag['max_us']:6} us")
+
+
+def main():
+    bare = asyncio.run(spin(asyncio.sleep, RUN_S)) / RUN_S
+    stats = Profiler(enabled=True).task("motors")
+    profiled = asyncio.run(spin(stats.sleep, RUN_S)) / RUN_S
+    idle = Profiler(enabled=False).task("motors")
+    disabled = asyncio.run(spin(idle.sleep, RUN_S)) / RUN_S
+    print(f"{'':9} {'iter/s':>8} {'us/iter':>8}")
+    for name, rate in (("bare", bare), ("profiled", profiled), ("disabled", disabled)):
+        print(f"{name:9} {rate:8.0f} {1e6 / rate:8.2f}")
+    print(f"overhead {1e6 / profiled - 1e6 / bare:.2f} us per iteration")
+    asyncio.run(stall_demo())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""MtuState put/get cost and what a change wakes, dict store vs. slot store.
+
+"dict" is the store as of the multi-screen change: string keys in a dict,
+callbacks per key. "slots" keeps values in a list indexed by key and wakes
+subscription Events by key mask. Heap is what tracemalloc sees per call.
+
+    python bench/state_bench.py
+"""
+
+import asyncio
+import time
+import tracemalloc
+
+from fakes import quiet_logs
+
+quiet_logs()
+
+import state
+from state import MtuState
+
+CALLS = 200_000
+
+
+class DictMtuState:
+    def __init__(self):
+        self.data = dict()
+        self.listeners = dict()
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def put(self, key, value):
+        if key in self.data and self.data[key] == value:
+            return
+        self.data[key] = value
+        for listener in self.listeners.get(key, ()):
+            listener(key)
+
+    def subscribe(self, keys, listener):
+        for key in keys:
+            self.listeners.setdefault(key, []).append(listener)
+
+
+def per_call(fn):
+    fn(1000)
+    started = time.perf_counter()
+    fn(CALLS)
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    fn(1000)
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed / CALLS * 1e9, (after - before) / 1000
+
+
+def bench(store, clock_key, throttle_key):
+    values = [str(i) for i in range(64)]
+    def unchanged(n):
+        for _ in range(n):
+            store.put(clock_key, "2024-01-01 12:00")
+    def changed(n):
+        for i in range(n):
+            store.put(throttle_key, values[i & 63])
+    def get(n):
+        for _ in range(n):
+            store.get(clock_key)
+    return [per_call(fn) for fn in (unchanged, changed, get)]
+
+
+def incremental():
+    store = MtuState()
+    seen = store.version
+    store.put(state.SK_IP_ADDRESS, "192.168.1.117")
+    store.put(state.SK_CLOCK, "2024-01-01 12:00")
+    keys = store.changes_since(seen)
+    print(f"changes_since({seen}) -> {[state.KEY_NAMES[k] for k in keys]}, version {store.version}")
+    seen = store.version
+    store.put(state.SK_CLOCK, "2024-01-01 12:00")
+    store.put(state.SK_THROTTLE_1, 1234)
+    print(f"changes_since({seen}) -> {store.to_dict(store.changes_since(seen))}")
+
+    async def consumer(subscription, woken):
+        while True:
+            keys = await subscription.wait()
+            woken.append([state.KEY_NAMES[k] for k in keys])
+
+    async def main():
+        woken = []
+        task = asyncio.create_task(consumer(store.subscribe((state.SK_THROTTLE_1, state.SK_THROTTLE_2)), woken))
+        await asyncio.sleep(0)
+        for value in range(3):
+            store.put(state.SK_CLOCK, f"2024-01-01 12:0{value}")
+            store.put(state.SK_THROTTLE_2, value)
+            await asyncio.sleep(0)
+        task.cancel()
+        print(f"throttle subscriber woken {len(woken)} times: {woken}")
+    asyncio.run(main())
+
+
+def main():
+    dict_store = DictMtuState()
+    dict_store.subscribe(("thr1",), lambda key: None)
+    slot_store = MtuState()
+    slot_store.subscribe((state.SK_THROTTLE_1,))
+    print(f"{'':6} | {'put unchanged ns':>16} {'B':>4} | {'put changed ns':>14} {'B':>4} | {'get ns':>6} {'B':>4}")
+    for name, results in (("dict", bench(dict_store, "clock", "thr1")),
+                          ("slots", bench(slot_store, state.SK_CLOCK, state.SK_THROTTLE_1))):
+        (u_ns, u_b), (c_ns, c_b), (g_ns, g_b) = results
+        print(f"{name:6} | {u_ns:16.0f} {u_b:4.0f} | {c_ns:14.0f} {c_b:4.0f} | {g_ns:6.0f} {g_b:4.0f}")
+    incremental()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""css/js body bytes per full page load, plain vs. gzip, first load vs. reload.
+
+Packs a copy of src/static with tools/pack_static.py and adds up what each
+page pulls in: main.css, scripts.js and the page script. "before" is every
+asset uncompressed on every load. "gzip" is the first load with gzip
+variants, "reload" a reload within STATIC_MAX_AGE where the browser uses
+its cache. The html itself is covered by page_cache_bench.py.
+
+    python bench/static_bench.py
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+from fakes import SRC
+
+sys.path.append(os.path.join(os.path.dirname(SRC), "tools"))
+
+from pack_static import pack
+
+PAGES = {
+    "/": (),
+    "/log": ("log.js",),
+    "/joy": ("joy.js",),
+    "/motors": ("motors.js",),
+}
+COMMON = ("main.css", "scripts.js")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as static_dir:
+        for name in os.listdir(os.path.join(SRC, "static")):
+            shutil.copy(os.path.join(SRC, "static", name), static_dir)
+        sizes = {name: (size, size if gz_size is None else gz_size) for name, size, gz_size in pack(static_dir)}
+    print(f"{'page':8} {'before':>7} {'gzip':>7} {'reload':>7}")
+    total_before = total_gzip = 0
+    for page, scripts in PAGES.items():
+        assets = COMMON + scripts
+        before = sum(sizes[name][0] for name in assets)
+        gzip = sum(sizes[name][1] for name in assets)
+        total_before += before
+        total_gzip += gzip
+        print(f"{page:8} {before:7} {gzip:7} {0:7}")
+    print(f"{'all':8} {total_before:7} {total_gzip:7} {0:7}  ({total_gzip / total_before:.0%} of before on first load)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Bit-bang vs. burst step backend under the same simulated loop.
+
+Uses the loop latency model of step_scheduler_bench. The fake burst backend
+blocks for the length of each pulse train like PulseOut does; "calls" counts
+how often Python had to touch the backend.
+
+    python bench/step_backend_bench.py
+"""
+
+import random
+
+from fakes import clock, fake_step_backend
+from step_scheduler_bench import DURATION_NS, loop_latency_ns, report
+
+from motor import Motor, STEPS_PER_REVOLUTION, DEFAULT_MICRO_STEPS
+
+
+def run(rpm, burst, seed=1):
+    rnd = random.Random(seed)
+    clock.now_ns = 0
+    backend = fake_step_backend() if burst else None
+    motor = Motor(None, "GPIO17", "GPIO18", backend=backend)
+    motor.set_acceleration(0)
+    motor.move(1 << 30, rpm)
+    calls = 0
+    while clock.now_ns < DURATION_NS:
+        calls += 1 if motor.check_step() else 0
+        clock.advance(loop_latency_ns(rnd))
+    edges = motor.backend.edges if burst else motor.backend.pin.edges
+    edges = [t for t in edges if t < DURATION_NS]
+    return rpm * STEPS_PER_REVOLUTION * DEFAULT_MICRO_STEPS, edges, calls
+
+
+def main():
+    for rpm in (60, 300, 600):
+        print(f"rpm {rpm}, {DEFAULT_MICRO_STEPS} microsteps")
+        for name, burst in (("bitbang", False), ("burst", True)):
+            steps_per_minute, edges, calls = run(rpm, burst)
+            report(name, steps_per_minute, edges)
+            print(f"          loop passes which stepped: {calls}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Achieved vs. requested step rate of Motor.check_step on a fake step pin.
+
+The event loop is simulated on a virtual clock: every iteration costs a random
+latency and now and then a long stall (HTTP poll, LCD refresh). The legacy
+millisecond scheduler is run on the same loop model for comparison.
+
+    python bench/step_scheduler_bench.py
+"""
+
+import random
+
+from fakes import clock, quiet_logs, use_virtual_time
+
+quiet_logs()
+use_virtual_time()
+
+from motor import Motor, STEPS_PER_REVOLUTION, DEFAULT_MICRO_STEPS
+
+DURATION_NS = 2_000_000_000
+HIST_BUCKETS_US = (10, 50, 100, 250, 500, 1000, 5000)
+
+
+def loop_latency_ns(rnd):
+    if rnd.random() < 0.002:
+        return rnd.randint(5_000_000, 20_000_000)
+    return rnd.randint(80_000, 400_000)
+
+
+class LegacyScheduler:
+    """The original scheduler: whole milliseconds, next pulse counted from now."""
+    def __init__(self, pin, steps_per_minute):
+        self.pin = pin
+        self.step_delay_ms = 60_000 / steps_per_minute
+        self.next_pulse_ms = 0
+        self.steps_to_do = 1 << 30
+
+    def check_step(self, now_ns):
+        now = now_ns // 1_000_000
+        if now >= self.next_pulse_ms:
+            self.pin.value = True
+            self.pin.value = False
+            self.next_pulse_ms = now + self.step_delay_ms
+            self.steps_to_do -= 1
+
+
+def run(rpm, legacy, seed=1):
+    rnd = random.Random(seed)
+    clock.now_ns = 0
+    steps_per_minute = rpm * STEPS_PER_REVOLUTION * DEFAULT_MICRO_STEPS
+    if legacy:
+        motor = Motor(None, "GPIO17", "GPIO18")
+        stepper = LegacyScheduler(motor.backend.pin, steps_per_minute)
+    else:
+        motor = Motor(None, "GPIO17", "GPIO18")
+        # constant rate, acceleration is covered by motion_profile_bench
+        motor.set_acceleration(0)
+        motor.move(1 << 30, rpm)
+        stepper = motor
+    while clock.now_ns < DURATION_NS:
+        stepper.check_step(clock.now_ns)
+        clock.advance(loop_latency_ns(rnd))
+    return steps_per_minute, motor.backend.pin.edges
+
+
+def report(name, steps_per_minute, edges):
+    requested = steps_per_minute / 60
+    achieved = len(edges) * 1e9 / DURATION_NS
+    period = 60e9 / steps_per_minute
+    hist = [0] * (len(HIST_BUCKETS_US) + 1)
+    for i in range(1, len(edges)):
+        jitter_us = abs(edges[i] - edges[i - 1] - period) / 1000
+        for b, limit in enumerate(HIST_BUCKETS_US):
+            if jitter_us < limit:
+                hist[b] += 1
+                break
+        else:
+            hist[-1] += 1
+    print(f"  {name:7} requested {requested:8.1f} steps/s, achieved {achieved:8.1f} steps/s ({100 * achieved / requested:5.1f}%)")
+    labels = [f"<{b}us" for b in HIST_BUCKETS_US] + [f">={HIST_BUCKETS_US[-1]}us"]
+    print("          pulse interval jitter: " + "  ".join(f"{l}:{c}" for l, c in zip(labels, hist)))
+
+
+def main():
+    for rpm in (60, 300, 600):
+        print(f"rpm {rpm}, {DEFAULT_MICRO_STEPS} microsteps")
+        report("legacy", *run(rpm, True))
+        report("ns", *run(rpm, False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""UART frames per motor data request, and what the background poller collects.
+
+Before the poller every GET /api/motor/<index>/data read GCONF and IFCNT
+over the UART; now it is served from the shadow and the telemetry
+snapshot. The second part runs TelemetryPoller for a short while against
+three fake drivers behind the mux, one of them overheating.
+
+    python bench/telemetry_bench.py
+"""
+
+import asyncio
+import time
+
+from fakes import FakeMuxUart, FakeTmc2208, quiet_logs
+
+quiet_logs()
+
+import tmc2208
+from tmc_bus import MuxedTmcBus
+from motor import Motor
+from telemetry import TelemetryPoller
+
+DRIVERS = 3
+POLL_S = 0.5
+
+
+def make_bus():
+    drivers = [FakeTmc2208() for _ in range(DRIVERS)]
+    bus = MuxedTmcBus(115200, ("A", "B", "C"), DRIVERS, settle_s=0)
+    bus.ser = FakeMuxUart(drivers, bus.select_pins)
+    for handle in bus.handles:
+        handle.ser = bus.ser
+        handle.communication_pause = 0
+    return bus, drivers
+
+
+def legacy_collect_data(motor):
+    tmc = motor.tmc_uart
+    return {"GCONF": bin(tmc.read_cached(tmc2208.GCONF)), "IFCNT": tmc.read_int(tmc2208.IFCNT)}
+
+
+def frames(drivers):
+    return sum(d.reads + d.writes for d in drivers)
+
+
+async def poll_for(poller, seconds):
+    task = asyncio.create_task(poller.run())
+    await asyncio.sleep(seconds)
+    task.cancel()
+
+
+def main():
+    bus, drivers = make_bus()
+    motors = [Motor(bus.handle(i), f"STEP{i}", f"DIR{i}") for i in range(DRIVERS)]
+    poller = TelemetryPoller(bus.handles, reads_per_second=200, history_len=8)
+    for i, motor in enumerate(motors):
+        motor.telemetry = poller.motor(i)
+
+    for name, collect in (("legacy", legacy_collect_data), ("snapshot", Motor.collect_data)):
+        before = frames(drivers)
+        for _ in range(10):
+            collect(motors[0])
+        print(f"{name:8} UART frames per data request: {(frames(drivers) - before) / 10:.1f}")
+
+    drivers[1].registers[tmc2208.DRVSTATUS] |= tmc2208.otpw | tmc2208.t120
+    real_sleep = time.sleep
+    time.sleep = lambda seconds: None
+    switches = bus.switches
+    asyncio.run(poll_for(poller, POLL_S))
+    time.sleep = real_sleep
+    print(f"poller: {poller.reads} reads in {POLL_S} s, budget {int(POLL_S * 200)}, "
+          f"mux switches {bus.switches - switches}")
+    for i, motor in enumerate(motors):
+        data = motor.collect_data(history=True)
+        status = data["telemetry"]["DRVSTATUS"]
+        print(f"motor {i}: otpw {status['otpw']}  t120 {status['t120']}  cs_actual {status['cs_actual']}  "
+              f"samples {data['telemetry']['samples']}  history {len(data['history'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Event loop stalls of motor init through blocking TMC_UART vs. AsyncTMC_UART.
+
+A ticker task standing in for motors_task yields with sleep(0) and records
+the longest gap between its wake-ups while Motor.init / Motor.init_async,
+read_int and write_reg_check run against a fake TMC2208 with the default
+communication pause (real time). max_stall_ns is the longest stretch the
+async driver itself went without yielding.
+
+    python bench/tmc_async_bench.py
+"""
+
+import asyncio
+import time
+
+from fakes import FakeTmc2208, quiet_logs
+
+quiet_logs()
+
+import tmc2208
+from tmc2208 import TMC_UART
+from motor import Motor
+
+
+def make_motor():
+    tmc = TMC_UART(115200)
+    tmc.ser = FakeTmc2208()
+    return Motor(tmc, "STEP", "DIR")
+
+
+async def ticker(gaps, done):
+    last = time.perf_counter_ns()
+    while not done:
+        await asyncio.sleep(0)
+        now = time.perf_counter_ns()
+        gaps.append(now - last)
+        last = now
+
+
+async def measure(work):
+    gaps = []
+    done = []
+    task = asyncio.create_task(ticker(gaps, done))
+    await asyncio.sleep(0)
+    started = time.perf_counter_ns()
+    result = await work()
+    elapsed = time.perf_counter_ns() - started
+    done.append(True)
+    await task
+    return result, elapsed, max(gaps)
+
+
+async def run():
+    print(f"{'':24} {'result':>16} {'total ms':>9} {'max loop gap ms':>16} {'max_stall_us':>12}")
+    rows = []
+
+    motor = make_motor()
+    async def blocking_init():
+        return motor.init()
+    rows.append(("init (blocking)", motor) + await measure(blocking_init))
+
+    motor = make_motor()
+    rows.append(("init_async", motor) + await measure(motor.init_async))
+
+    motor = make_motor()
+    aio = motor.tmc_uart.aio
+    async def read_int():
+        return hex(await aio.read_int(tmc2208.CHOPCONF))
+    rows.append(("aio.read_int", motor) + await measure(read_int))
+
+    async def write_reg_check():
+        return await aio.write_reg_check(tmc2208.IHOLD_IRUN, 0x1F10)
+    rows.append(("aio.write_reg_check", motor) + await measure(write_reg_check))
+
+    for name, motor, result, elapsed, gap in rows:
+        stall = motor.tmc_uart.aio.stats()["max_stall_us"]
+        print(f"{name:24} {str(result):>16} {elapsed / 1e6:9.1f} {gap / 1e6:16.2f} {stall:12}")
+
+    blocking_gap = rows[0][4]
+    pause_ns = rows[1][1].tmc_uart.communication_pause * 1e9
+    for name, motor, result, elapsed, gap in rows[1:]:
+        assert gap < pause_ns, f"{name} held the loop for {gap / 1e6:.2f} ms"
+    assert rows[1][2] == "Motor init OK" and rows[3][2] is True
+    assert rows[3][1].tmc_uart.ser.registers[tmc2208.IHOLD_IRUN] == 0x1F10
+    print(f"blocking init held the loop {blocking_gap / 1e6:.1f} ms, async calls at most {max(r[4] for r in rows[1:]) / 1e6:.2f} ms")
+
+
+def main():
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
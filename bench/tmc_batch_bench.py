@@ -0,0 +1,57 @@
+"""UART frames for Motor.configure with batched vs. per-register write verification.
+
+Runs against the FakeTmc2208 register model, the last case drops one write
+to show the per-register fallback still leaves the driver configured.
+
+    python bench/tmc_batch_bench.py
+"""
+
+from fakes import FakeTmc2208, quiet_logs
+
+quiet_logs()
+
+import tmc2208
+from tmc2208 import TMC_UART
+from motor import Motor
+
+
+class PerRegisterTMC_UART(TMC_UART):
+    """Verifies every queued write on its own, as before batching."""
+    def write_batch(self, registers, values):
+        ok = True
+        for i in range(len(registers)):
+            if self.write_reg_check(registers[i], values[i]) is not True:
+                ok = False
+        return ok
+
+
+def run(uart_class, drop_writes=0):
+    tmc = uart_class(115200)
+    tmc.ser = FakeTmc2208()
+    tmc.communication_pause = 0
+    motor = Motor(tmc, "GPIO17", "GPIO18")
+    # fill the shadow so only the configuration writes are counted
+    tmc.read_cached(tmc2208.GCONF)
+    tmc.read_cached(tmc2208.CHOPCONF)
+    tmc.ser.drop_writes = drop_writes
+    before = tmc.ser.reads + tmc.ser.writes
+    ok = motor.configure(16, 16)
+    frames = tmc.ser.reads + tmc.ser.writes - before
+    registers = tmc.ser.registers
+    configured = (registers.get(tmc2208.IHOLD_IRUN) == 0x1010
+                  and registers[tmc2208.CHOPCONF] >> 24 & 0x0F == tmc2208.mres_16
+                  and registers[tmc2208.GCONF] & tmc2208.mstep_reg_select != 0)
+    return frames, ok, configured
+
+
+def main():
+    for name, uart_class, drops in (
+            ("per register", PerRegisterTMC_UART, 0),
+            ("batch", TMC_UART, 0),
+            ("batch, 1 dropped write", TMC_UART, 1)):
+        frames, ok, configured = run(uart_class, drops)
+        print(f"{name:24} frames {frames:3}  verified {ok}  driver configured {configured}")
+
+
+if __name__ == "__main__":
+    main()
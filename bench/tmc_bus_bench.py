@@ -0,0 +1,79 @@
+"""Mux channel switches for register traffic to six TMC2208 behind a CD4051.
+
+A polling pass reads DRVSTATUS from all six drivers while configuration
+writes for random motors are queued in between. "submit order" executes the
+operations as they arrive, "grouped" is MuxedTmcBus.run. Time assumes every
+switch costs the settle delay and every frame its communication pause.
+
+    python bench/tmc_bus_bench.py
+"""
+
+import random
+
+from fakes import FakeMuxUart, FakeTmc2208, quiet_logs
+
+quiet_logs()
+
+import tmc2208
+from tmc_bus import MuxedTmcBus
+
+CHANNELS = 6
+PASSES = 50
+
+
+def make_bus():
+    bus = MuxedTmcBus(115200, ("GPIO6", "GPIO7", "GPIO8"), CHANNELS)
+    drivers = [FakeTmc2208() for _ in range(CHANNELS)]
+    bus.ser = FakeMuxUart(drivers, bus.select_pins)
+    for handle in bus.handles:
+        handle.ser = bus.ser
+        handle.communication_pause = 0
+    bus.settle_s = 0
+    return bus, drivers
+
+
+def workload(rnd):
+    ops = []
+    for channel in range(CHANNELS):
+        ops.append((channel, tmc2208.DRVSTATUS, None))
+        if rnd.random() < 0.5:
+            ops.append((rnd.randrange(CHANNELS), tmc2208.IHOLD_IRUN, rnd.randrange(0x2000)))
+    rnd.shuffle(ops)
+    return ops
+
+
+def run(grouped):
+    rnd = random.Random(1)
+    bus, drivers = make_bus()
+    for _ in range(PASSES):
+        ops = workload(rnd)
+        if grouped:
+            for op in ops:
+                bus.submit(*op)
+            bus.run()
+        else:
+            for channel, register, val in ops:
+                handle = bus.handle(channel)
+                if val is None:
+                    handle.read_int(register)
+                else:
+                    handle.write_reg_check(register, val)
+    frames = sum(d.reads + d.writes for d in drivers)
+    return bus.switches, frames
+
+
+def main():
+    pause_s = 500 / 115200
+    for name, grouped in (("submit order", False), ("grouped", True)):
+        switches, frames = run(grouped)
+        # reads pause twice, writes once; count 1.5 pauses per frame as an estimate
+        estimate_ms = (switches * 0.0001 + frames * 1.5 * pause_s) * 1000 / PASSES
+        print(f"{name:13} switches/pass {switches / PASSES:5.1f}  frames/pass {frames / PASSES:5.1f}  ~{estimate_ms:5.1f} ms/pass")
+    bus, _ = make_bus()
+    before = bus.switches
+    values = bus.read_all(tmc2208.DRVSTATUS)
+    print(f"read_all DRVSTATUS: {len(values)} drivers, {bus.switches - before} switches")
+
+
+if __name__ == "__main__":
+    main()
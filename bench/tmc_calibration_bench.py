@@ -0,0 +1,104 @@
+"""Calibrated vs. default TMC UART pause/timeout, and how tuning follows line noise.
+
+The fake driver answers incompletely when the pause or read timeout is
+below what the simulated line needs, and corrupts a share of replies when
+noise is set. Reported time per read is the sleeping TMC_UART does, which
+is where the default pause spends most of a transaction. The last part is
+a line which works without any pause, its pause must still rise with noise.
+
+    python bench/tmc_calibration_bench.py
+"""
+
+import random
+import time
+
+from fakes import FakeTmc2208, quiet_logs
+
+quiet_logs()
+
+import tmc2208
+import tmc_calibration
+from tmc2208 import TMC_UART
+
+NEED_PAUSE_S = 0.0006
+NEED_TIMEOUT_S = 0.0015
+READS = 2000
+
+
+class SlowLineTmc2208(FakeTmc2208):
+    def __init__(self, tmc, need_pause=NEED_PAUSE_S):
+        super().__init__()
+        self.tmc = tmc
+        self.need_pause = need_pause
+        self.noise = 0.0
+
+    def readinto(self, buf):
+        count = super().readinto(buf)
+        if self.tmc.communication_pause < self.need_pause or self.timeout < NEED_TIMEOUT_S:
+            return count // 2
+        if random.random() < self.noise:
+            buf[count - 1] ^= 0xFF
+        return count
+
+
+def make_tmc(need_pause=NEED_PAUSE_S):
+    tmc = TMC_UART(115200)
+    tmc.ser = SlowLineTmc2208(tmc, need_pause)
+    return tmc
+
+
+def sleep_per_read(tmc, reads):
+    slept = [0.0]
+    def sleep(seconds):
+        slept[0] += seconds
+    time.sleep = sleep
+    for _ in range(reads):
+        tmc.read_int(tmc2208.IFCNT)
+    time.sleep = real_sleep
+    return slept[0] / reads * 1_000_000
+
+
+real_sleep = time.sleep
+
+
+def main():
+    random.seed(1)
+    default = make_tmc()
+    calibrated = make_tmc()
+    time.sleep = lambda seconds: None
+    ok = tmc_calibration.calibrate(calibrated)
+    time.sleep = real_sleep
+    for name, tmc in (("default", default), ("calibrated", calibrated)):
+        link = tmc.link_stats()
+        print(f"{name:10} pause {link['pause_us']:5} us  timeout {link['timeout_us']:5} us  "
+              f"sleep per read {sleep_per_read(tmc, READS):7.1f} us  errors {link['read_errors']}")
+    print(f"calibration ok {ok}")
+    follow_noise(calibrated)
+
+    # a line working without pause calibrates to one byte time, not 0
+    no_pause = make_tmc(need_pause=0)
+    time.sleep = lambda seconds: None
+    tmc_calibration.calibrate(no_pause)
+    time.sleep = real_sleep
+    link = no_pause.link_stats()
+    print(f"no pause needed: calibrated pause {link['pause_us']} us  timeout {link['timeout_us']} us")
+    floor_us = link["pause_us"]
+    no_pause.ser.noise = 0.1
+    sleep_per_read(no_pause, READS)
+    link = no_pause.link_stats()
+    print(f"noise 0.10: pause {link['pause_us']:5} us  timeout {link['timeout_us']:5} us")
+    assert floor_us > 0 and link["pause_us"] > floor_us, "pause did not rise from the calibrated floor"
+
+
+def follow_noise(tmc):
+    for noise in (0.0, 0.05, 0.0, 0.0):
+        tmc.ser.noise = noise
+        errors = tmc.read_errors
+        sleep_per_read(tmc, READS)
+        link = tmc.link_stats()
+        print(f"noise {noise:4.2f}: pause {link['pause_us']:5} us  timeout {link['timeout_us']:5} us  "
+              f"failed reads {tmc.read_errors - errors}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""UART transactions per motor configuration change with the register shadow.
+
+Counts frames seen by a FakeTmc2208 for typical configuration sequences,
+once with LegacyMotor (read_int + write_reg_check for every change, as
+before the shadow) and once with the shadowed Motor.
+
+    python bench/tmc_shadow_bench.py
+"""
+
+from fakes import FakeTmc2208, quiet_logs
+
+quiet_logs()
+
+import math
+
+import tmc2208
+from tmc2208 import TMC_UART
+from motor import Motor
+
+
+class LegacyMotor(Motor):
+    def init(self):
+        self.set_current(1, 1)
+        self.set_microsteps(8)
+
+    def set_just_current(self, ihold, irun, ihold_delay=0, writer=None):
+        return self.tmc_uart.write_reg_check(tmc2208.IHOLD_IRUN, ihold | irun << 8 | ihold_delay << 16)
+
+    def set_microsteps(self, number_of_steps, writer=None):
+        chopconf = self.tmc_uart.read_int(tmc2208.CHOPCONF)
+        chopconf &= ~(tmc2208.msres0 | tmc2208.msres1 | tmc2208.msres2 | tmc2208.msres3)
+        chopconf |= (8 - int(math.log(number_of_steps, 2))) << 24
+        self.tmc_uart.write_reg_check(tmc2208.CHOPCONF, chopconf)
+        gconf = self.tmc_uart.read_int(tmc2208.GCONF)
+        self.tmc_uart.write_reg_check(tmc2208.GCONF, gconf | tmc2208.mstep_reg_select)
+
+SEQUENCES = (
+    ("init", lambda m: m.init()),
+    ("set_microsteps(16)", lambda m: m.set_microsteps(16)),
+    ("set_microsteps(16) again", lambda m: m.set_microsteps(16)),
+    ("set_current(8, 16)", lambda m: m.set_current(8, 16)),
+    ("hold on/off", lambda m: (m.hold("0"), m.hold("1"))),
+)
+
+
+def run(motor_class):
+    tmc = TMC_UART(115200)
+    tmc.ser = FakeTmc2208()
+    tmc.communication_pause = 0
+    motor = motor_class(tmc, "GPIO17", "GPIO18")
+    results = []
+    for name, action in SEQUENCES:
+        before = tmc.ser.reads + tmc.ser.writes
+        action(motor)
+        results.append((name, tmc.ser.reads + tmc.ser.writes - before))
+    return results, tmc.shadow.stats()
+
+
+def main():
+    legacy, _ = run(LegacyMotor)
+    shadowed, stats = run(Motor)
+    print(f"{'sequence':28} {'legacy':>7} {'shadow':>7}")
+    for (name, legacy_frames), (_, shadow_frames) in zip(legacy, shadowed):
+        print(f"{name:28} {legacy_frames:>7} {shadow_frames:>7}")
+    print("shadow", stats)
+
+
+if __name__ == "__main__":
+    main()
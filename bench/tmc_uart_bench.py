@@ -0,0 +1,111 @@
+"""Frames/second of TMC_UART read and write on a loopback fake TMC2208.
+
+time.sleep is disabled during the measurement so the numbers show the CPU cost of frame
+building, CRC and response validation. LegacyTMC_UART is the bit by bit CRC
+and slicing implementation the table driven one replaced.
+
+    python bench/tmc_uart_bench.py
+"""
+
+import random
+import struct
+import time
+
+from fakes import FakeTmc2208, quiet_logs
+
+quiet_logs()
+
+import tmc2208
+from tmc2208 import TMC_UART
+
+FRAMES = 5000
+
+
+class LegacyTMC_UART(TMC_UART):
+    def compute_crc8_atm(self, datagram, initial_value=0, start=0, end=None):
+        crc = initial_value
+        for byte in datagram:
+            for _ in range(0, 8):
+                if (crc >> 7) ^ (byte & 0x01):
+                    crc = ((crc << 1) ^ 0x07) & 0xFF
+                else:
+                    crc = (crc << 1) & 0xFF
+                byte = byte >> 1
+        return crc
+
+    def read_int(self, register, tries=10):
+        while True:
+            tries -= 1
+            self.ser.reset_input_buffer()
+            self.r_frame[1] = self.mtr_id
+            self.r_frame[2] = register
+            self.r_frame[3] = self.compute_crc8_atm(self.r_frame[:-1])
+            self.ser.write(self.r_frame)
+            time.sleep(self.communication_pause)
+            rtn = self.ser.read(12)
+            time.sleep(self.communication_pause)
+            rtn_data = rtn[7:11]
+            not_zero_count = len([elem for elem in rtn if elem != 0])
+            if len(rtn) < 12 or not_zero_count == 0:
+                pass
+            elif rtn[11] != self.compute_crc8_atm(rtn[4:11]):
+                pass
+            else:
+                break
+            if tries <= 0:
+                return -1
+        val = struct.unpack(">i", rtn_data)[0]
+        tmc2208.pdebug(f"From regiter {hex(register)} read value {hex(val)}")
+        return val
+
+    def write_reg(self, register, val):
+        self.ser.reset_input_buffer()
+        self.w_frame[1] = self.mtr_id
+        self.w_frame[2] = register | 0x80
+        self.w_frame[3] = 0xFF & (val >> 24)
+        self.w_frame[4] = 0xFF & (val >> 16)
+        self.w_frame[5] = 0xFF & (val >> 8)
+        self.w_frame[6] = 0xFF & val
+        self.w_frame[7] = self.compute_crc8_atm(self.w_frame[:-1])
+        tmc2208.pdebug(f"Writing to reg {hex(register)} value {hex(val)}")
+        self.ser.write(self.w_frame)
+        time.sleep(self.communication_pause)
+        return True
+
+
+def make(cls):
+    tmc = cls(115200)
+    tmc.ser = FakeTmc2208()
+    return tmc
+
+
+def measure(tmc):
+    # the pauses are bus timing, not CPU cost
+    sleep = time.sleep
+    time.sleep = lambda seconds: None
+    started = time.perf_counter()
+    for _ in range(FRAMES):
+        tmc.read_int(tmc2208.CHOPCONF)
+    reads = FRAMES / (time.perf_counter() - started)
+    started = time.perf_counter()
+    for i in range(FRAMES):
+        tmc.write_reg(tmc2208.CHOPCONF, 0x10000053 + i)
+    writes = FRAMES / (time.perf_counter() - started)
+    time.sleep = sleep
+    return reads, writes
+
+
+def main():
+    rnd = random.Random(1)
+    tmc = make(TMC_UART)
+    legacy = make(LegacyTMC_UART)
+    for _ in range(1000):
+        data = bytearray(rnd.randrange(256) for _ in range(7))
+        assert tmc.compute_crc8_atm(data) == legacy.compute_crc8_atm(data)
+    for name, uart in (("legacy", legacy), ("table", tmc)):
+        reads, writes = measure(uart)
+        print(f"{name:7} read {reads:9.0f} frames/s   write {writes:9.0f} frames/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Websocket fan-out to several clients, a LogStream per client vs. WsBroadcaster.
+
+"per client" serializes the pending logs separately for every client,
+"broadcast" builds the message once and hands the same buffer to all.
+One of the clients stops accepting data halfway through and is dropped
+after WS_MAX_FAILURES failed sends. The last parts flood the broadcaster
+with telemetry frames to show the window budget dropping them, and stream
+a log burst through a window budget smaller than clients * WS_LOG_BUDGET.
+
+    python bench/ws_broadcast_bench.py
+"""
+
+import time
+import tracemalloc
+
+from fakes import quiet_logs
+
+quiet_logs()
+
+from log import pdebug, get_last_log
+from log_stream import LogStream
+from ws_broadcast import WsBroadcaster
+
+CLIENTS = 3
+TICKS = 30
+LOGS_PER_TICK = 12
+DATA = b'{"memory":123456,"lcd_max_slice_us":2970}'
+
+
+class FakeWebsocket:
+    """Copies like adafruit_httpserver does, raises like a full socket when stalled."""
+    def __init__(self):
+        self.bytes = 0
+        self.stalled = False
+        self.closed = False
+
+    def send_message(self, message, fail_silently=False):
+        if self.stalled:
+            if fail_silently:
+                return
+            raise OSError(11)
+        frame = bytearray([0x82, 126])
+        frame.extend(message)
+        self.bytes += len(message)
+
+    def close(self):
+        self.closed = True
+
+
+def run(name, make_send, websockets):
+    start = get_last_log()
+    send = make_send(start)
+    allocated = 0
+    started = time.perf_counter()
+    for tick in range(TICKS):
+        if tick == TICKS // 2:
+            websockets[-1].stalled = True
+        for i in range(LOGS_PER_TICK):
+            pdebug(f"From regiter 0x6f read value {hex(tick * 100 + i)}")
+        tracemalloc.start()
+        send()
+        allocated += tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    ms = (time.perf_counter() - started) * 1000 / TICKS
+    print(f"{name:11} {ms:8.2f} {allocated / TICKS:12.0f} {[ws.bytes for ws in websockets]}")
+
+
+def main():
+    print(f"{'':11} {'ms/tick':>8} {'heap B/tick':>12} bytes per client")
+    websockets = [FakeWebsocket() for _ in range(CLIENTS)]
+    def per_client(start):
+        streams = [LogStream(ws, start) for ws in websockets]
+        return lambda: [stream.send(DATA) for stream in streams]
+    run("per client", per_client, websockets)
+
+    websockets = [FakeWebsocket() for _ in range(CLIENTS)]
+    broadcaster = WsBroadcaster(max_clients=CLIENTS, budget=1 << 20, window_ms=100, max_failures=3)
+    for ws in websockets:
+        broadcaster.add(ws)
+    def broadcast(start):
+        stream = LogStream(broadcaster, start)
+        return lambda: stream.send(DATA)
+    run("broadcast", broadcast, websockets)
+    print("broadcast stats:", broadcaster.stats(), "stalled client closed:", websockets[-1].closed)
+
+    broadcaster = WsBroadcaster(max_clients=CLIENTS, budget=4096, window_ms=100, max_failures=3)
+    for _ in range(CLIENTS):
+        broadcaster.add(FakeWebsocket())
+    frame = bytes(76)
+    for _ in range(100):
+        broadcaster.send_message(frame)
+    print(f"100 frames of {len(frame)} B to {CLIENTS} clients within one 4096 B window:", broadcaster.stats())
+
+    # 3 clients * 2048 B log budget > 4096 B window, each message is capped at 4096 // 3
+    broadcaster = WsBroadcaster(max_clients=CLIENTS, budget=4096, window_ms=0, max_failures=3)
+    websockets = [FakeWebsocket() for _ in range(CLIENTS)]
+    for ws in websockets:
+        broadcaster.add(ws)
+    stream = LogStream(broadcaster, get_last_log())
+    for i in range(LOGS_PER_TICK * 4):
+        pdebug(f"From regiter 0x6f read value {hex(i)}")
+    ticks = 0
+    while stream.pending() and ticks < 100:
+        stream.send(DATA)
+        ticks += 1
+    print(f"log burst through a 4096 B window: {ticks} ticks, pending {stream.pending()},", stream.stats())
+
+
+if __name__ == "__main__":
+    main()
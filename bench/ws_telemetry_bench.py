@@ -0,0 +1,76 @@
+"""Cost per joystick sample, JSON for GET /api/joy vs. the binary telemetry frame.
+
+"json" is what getJoystick built for every poll, json.dumps of the axes
+dict (the HTTP request and response around it come on top). "frame" is
+TelemetryFrame.pack into its preallocated buffer, which also carries six
+motors, free memory and loop timing. Heap is the peak tracemalloc sees.
+
+    python bench/ws_telemetry_bench.py
+"""
+
+import json
+import time
+import tracemalloc
+import types
+
+from fakes import quiet_logs
+
+quiet_logs()
+
+from ws_telemetry import TelemetryFrame, HEADER_SIZE, MOTOR_SIZE
+
+CALLS = 50_000
+
+
+class FakeMotor:
+    def __init__(self, steps):
+        self.steps_to_do = steps
+        self.rpm = 120
+
+    def status(self):
+        return "RUN" if self.steps_to_do else "OK"
+
+
+class FakeJoystick:
+    """snapshot accessors of joy.Joystick, which needs usb_hid"""
+    def axes(self):
+        return (1234, 2345, 0, 4095, 17, 2048)
+
+    def buttons(self):
+        return 0x0105
+
+
+def make_joystick():
+    return FakeJoystick()
+
+
+def to_json(joy):
+    x, y, z, r_x, r_y, r_z = joy.axes()
+    return json.dumps({"x": x, "y": y, "z": z, "rx": r_x, "ry": r_y, "rz": r_z, "buttons": joy.buttons()})
+
+
+def measure(name, sample):
+    sample()
+    started = time.perf_counter()
+    for _ in range(CALLS):
+        payload = sample()
+    us = (time.perf_counter() - started) / CALLS * 1e6
+    tracemalloc.start()
+    sample()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{name:6} {us:7.2f} {len(payload):8} {peak:7}")
+
+
+def main():
+    joy = make_joystick()
+    motion = types.SimpleNamespace(motors=[FakeMotor(i * 100) for i in range(6)])
+    frame = TelemetryFrame(joy, motion)
+    print(f"{'':6} {'us':>7} {'payload':>8} {'peak B':>7}")
+    measure("json", lambda: to_json(joy))
+    measure("frame", lambda: frame.pack(123456, 850))
+    print(f"frame: {HEADER_SIZE} B header + {MOTOR_SIZE} B per motor, hex {bytes(frame.pack(123456, 850)).hex()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,6 @@
 from api.joy_api import JoyApi
-from api.motor_api import MotorApi
\ No newline at end of file
+from api.motor_api import MotorApi
+from api.state_api import StateApi
+from api.log_api import LogApi
+from api.job_api import JobApi
+from api.stats_api import StatsApi
\ No newline at end of file
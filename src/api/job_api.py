@@ -0,0 +1,29 @@
+from adafruit_httpserver import Route, GET, JSONResponse, NOT_FOUND_404
+
+class JobApi:
+    def __init__(self, server, jobs):
+        self.server = server
+        self.jobs = jobs
+
+        def get_job(request, job_id):
+            job = self.jobs.get(int(job_id))
+            if job is None:
+                return JSONResponse(request, {"error": f"no job {job_id}"}, status=NOT_FOUND_404)
+            return JSONResponse(request, job.to_dict())
+
+        def get_jobs(request):
+            return JSONResponse(request, {"stats": self.jobs.stats(), "jobs": [job.to_dict() for job in self.jobs.jobs]})
+
+        self.server.add_routes(
+            [
+                Route(
+                    path="/api/job/<job_id>",
+                    methods=GET,
+                    handler=get_job,
+                ),
+                Route(
+                    path="/api/jobs",
+                    methods=GET,
+                    handler=get_jobs,
+                ),
+            ])
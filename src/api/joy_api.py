@@ -1,5 +1,8 @@
 from adafruit_httpserver import Route, Request, Response, GET, POST, JSONResponse
-from log import pdebug
+from log import get_logger
+
+logger = get_logger("joy_api")
+pdebug = logger.debug
 
 class JoyApi:
     def __init__(self, joystick, server):
@@ -16,14 +19,15 @@ class JoyApi:
             return Response(request, response, content_type='text/plain')
 
         def getJoystick(request):
+            x, y, z, r_x, r_y, r_z = self.joystick.axes()
             data = {
-                "x": self.joystick._joy_x,
-                "y": self.joystick._joy_y,
-                "z": self.joystick._joy_z,
-                "rx": self.joystick._joy_r_x,
-                "ry": self.joystick._joy_r_y,
-                "rz": self.joystick._joy_r_z,
-                "buttons": self.joystick._buttons_state,
+                "x": x,
+                "y": y,
+                "z": z,
+                "rx": r_x,
+                "ry": r_y,
+                "rz": r_z,
+                "buttons": self.joystick.buttons(),
             }
             return JSONResponse(request, data)
 
@@ -0,0 +1,38 @@
+from adafruit_httpserver import Route, GET, POST, JSONResponse, BAD_REQUEST_400
+import log
+
+class LogApi:
+    def __init__(self, server):
+        self.server = server
+
+        def levels(request):
+            return JSONResponse(request, {"levels": log.levels(), "echo": log.echo})
+
+        def set_level(request, module, level):
+            # /api/log/level/tmc2208/ERROR, module "root" covers modules without own logger
+            if not log.set_level(module, level.upper()):
+                return JSONResponse(request, {"error": f"level must be one of {log.LEVEL_NAMES}"}, status=BAD_REQUEST_400)
+            return levels(request)
+
+        def set_echo(request, on):
+            log.set_echo(on in ("1", "on", "true"))
+            return levels(request)
+
+        self.server.add_routes(
+            [
+                Route(
+                    path="/api/log/levels",
+                    methods=GET,
+                    handler=levels,
+                ),
+                Route(
+                    path="/api/log/level/<module>/<level>",
+                    methods=POST,
+                    handler=set_level,
+                ),
+                Route(
+                    path="/api/log/echo/<on>",
+                    methods=POST,
+                    handler=set_echo,
+                ),
+            ])
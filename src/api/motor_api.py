@@ -1,36 +1,63 @@
-from adafruit_httpserver import Route, Request, Response, GET, POST, JSONResponse
-from log import pdebug
+from adafruit_httpserver import Route, Request, Response, GET, POST, JSONResponse, ACCEPTED_202, SERVICE_UNAVAILABLE_503
+from log import get_logger
+import tmc_calibration
+
+logger = get_logger("motor_api")
+pdebug = logger.debug
 
 class MotorApi:
-    def __init__(self, server, motor):
-        self.motor = motor
+    def __init__(self, server, motion, jobs):
+        self.motion = motion
         self.server = server
+        self.jobs = jobs
+
+        # UART transactions run as async jobs outside the HTTP poll, they yield while waiting on the wire
 
         def init_motor(request, index):
-            message = self.motor.init()
-            return Response(request, message, content_type='text/plain')
+            return self.submit(request, "init", self.get_motor(index).init_async)
 
         def config(request, index):
+            motor = self.get_motor(index)
             steps = request.query_params.get("steps") or 1
-            current = request.query_params.get("current") or 1
-            self.motor.set_current(current, current)
-            self.motor.set_microsteps(steps)
-            return Response(request, "OK", content_type='text/plain')
+            current = int(request.query_params.get("current") or 1)
+            accel = request.query_params.get("accel")
+            jerk = request.query_params.get("jerk") or 0
+            async def configure():
+                ok = await motor.configure_async(current, steps)
+                if accel is not None:
+                    motor.set_acceleration(int(accel), int(jerk))
+                return "OK" if ok else "Config not verified"
+            return self.submit(request, "config", configure)
+
+        def calibrate(request, index):
+            tmc = self.get_motor(index).tmc_uart
+            async def run_calibration():
+                ok = await tmc_calibration.calibrate_async(tmc)
+                if ok:
+                    tmc_calibration.save([motor.tmc_uart for motor in self.motion.motors])
+                return {"ok": ok, "link": tmc.link_stats()}
+            return self.submit(request, "calibrate", run_calibration)
 
         def get_data(request, index):
-            return JSONResponse(request, self.motor.collect_data())
+            history = request.query_params.get("history") == "1"
+            return JSONResponse(request, self.get_motor(index).collect_data(history))
 
         def move_motor(request, index, steps, rpm):
-            message = self.motor.move(int(steps), int(rpm))
+            message = self.motion.move(int(index), int(steps), int(rpm))
             return Response(request, message, content_type='text/plain')
 
-        def run_motor(request, index, speed):
-            message = self.motor.run_with_speed(int(speed))
+        def move_coordinated(request, rpm):
+            # steps per motor index, e.g. ?steps=800,-800
+            steps = [int(s or 0) for s in (request.query_params.get("steps") or "").split(",")]
+            steps = (steps + [0] * len(self.motion.motors))[:len(self.motion.motors)]
+            message = self.motion.move_coordinated(steps, int(rpm))
             return Response(request, message, content_type='text/plain')
 
+        def run_motor(request, index, speed):
+            return self.submit(request, "run", self.get_motor(index).run_with_speed_async, int(speed))
+
         def hold_motor(request, index, val):
-            message = self.motor.hold(val)
-            return Response(request, message, content_type='text/plain')
+            return self.submit(request, "hold", self.get_motor(index).hold_async, val)
 
         self.server.add_routes(
             [
@@ -44,6 +71,11 @@ class MotorApi:
                     methods=POST,
                     handler=move_motor,
                 ),
+                Route(
+                    path="/api/motors/move/<rpm>",
+                    methods=POST,
+                    handler=move_coordinated,
+                ),
                 Route(
                     path="/api/motor/<index>/hold/<val>",
                     methods=POST,
@@ -59,9 +91,24 @@ class MotorApi:
                     methods=POST,
                     handler=config,
                 ),
+                Route(
+                    path="/api/motor/<index>/calibrate",
+                    methods=POST,
+                    handler=calibrate,
+                ),
                 Route(
                     path="/api/motor/<index>/data",
                     methods=GET,
                     handler=get_data,
                 ),
-            ])
\ No newline at end of file
+            ])
+
+    def submit(self, request, name, function, *args):
+        """202 with the async job awaiting function(*args), poll GET /api/job/<id> for the result"""
+        job = self.jobs.submit_async(name, function, *args)
+        if job is None:
+            return JSONResponse(request, {"error": "too many pending jobs"}, status=SERVICE_UNAVAILABLE_503)
+        return JSONResponse(request, job.to_dict(), status=ACCEPTED_202)
+
+    def get_motor(self, index):
+        return self.motion.motors[int(index)]
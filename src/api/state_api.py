@@ -0,0 +1,21 @@
+from adafruit_httpserver import Route, GET, JSONResponse
+
+class StateApi:
+    def __init__(self, server, state):
+        self.server = server
+        self.state = state
+
+        def get_state(request):
+            # ?since=<version> returns only keys changed after it, poll with the returned version
+            since = int(request.query_params.get("since") or 0)
+            keys = self.state.changes_since(since)
+            return JSONResponse(request, {"version": self.state.version, "values": self.state.to_dict(keys)})
+
+        self.server.add_routes(
+            [
+                Route(
+                    path="/api/state",
+                    methods=GET,
+                    handler=get_state,
+                ),
+            ])
@@ -0,0 +1,27 @@
+from adafruit_httpserver import Route, GET, JSONResponse
+import gc
+
+class StatsApi:
+    def __init__(self, server, profiler, sources):
+        """sources maps a name to a function returning its stats dict"""
+        self.server = server
+        self.profiler = profiler
+        self.sources = sources
+
+        def get_stats(request):
+            # ?reset=1 starts new task statistics, e.g. before a load test
+            data = {"memory": gc.mem_free(), "profiler": self.profiler.stats()}
+            for name, source in self.sources.items():
+                data[name] = source()
+            if request.query_params.get("reset") == "1":
+                self.profiler.reset()
+            return JSONResponse(request, data)
+
+        self.server.add_routes(
+            [
+                Route(
+                    path="/api/stats",
+                    methods=GET,
+                    handler=get_stats,
+                ),
+            ])
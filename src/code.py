@@ -10,6 +10,9 @@ from asyncio import create_task, gather, run, sleep as async_sleep
 from lcd import enumerate_i2c
 from container import Container
 import state
+import config
+import time
+from tools import format_datetime
 
 #led = digitalio.DigitalInOut(board.LED)
 #led.direction = digitalio.Direction.OUTPUT
@@ -39,16 +42,26 @@ log_memory()
 
 container.state.put(state.SK_IP_ADDRESS, str(wifi.radio.ipv4_address))
 
+# every task sleeps through its profiler TaskStats, see /api/stats
+profiler = container.profiler
+
 async def handle_http_requests():
+    stats = profiler.task("http")
     while True:
         container.server.poll()
-        await async_sleep(0)
+        # while moving the step loop gets the time, requests wait a bit longer
+        await stats.sleep(config.HTTP_POLL_MOVING_S if container.motion.is_moving() else 0)
+
+async def jobs_task():
+    # slow motor API calls, run when no motion is in progress
+    await container.jobs.run(container.motion.is_moving, profiler.task("jobs"))
 
 async def send_http_logs():
+    stats = profiler.task("logs")
     while True:
         #log_memory()
         container.server.send_logs_if_needed()
-        await async_sleep(1)
+        await stats.sleep(1)
 
 async def led_blicks():
     while True:
@@ -61,23 +74,63 @@ async def led_blicks():
         await async_sleep(1)
 
 async def screen_task():
+    stats = profiler.task("screen")
     while True:
-        # for now make it simple, no change screen trigger
-        wait_time = container.screen.render()
-        await async_sleep(wait_time)
+        # renders only when the shown screen's state changed or another screen was selected
+        await container.screen.wait_dirty()
+        # iteration is the whole time-sliced render, other tasks run between its slices
+        stats.begin()
+        await container.screen.render_async()
+        stats.end()
+
+async def state_task():
+    stats = profiler.task("state")
+    while True:
+        # put notifies only on change: the clock once a minute, motors on start/stop/flags
+        container.state.put(state.SK_CLOCK, format_datetime(time.localtime())[:16])
+        container.state.put(state.SK_MOTORS, container.motion.status())
+        await stats.sleep(0.5)
+
+async def encoder_task():
+    stats = profiler.task("encoder")
+    while True:
+        detents, pressed = container.encoder.poll()
+        if detents:
+            container.screen.next(detents)
+        if pressed:
+            container.screen.show(0)
+        await stats.sleep(0.002)
 
 async def motors_task():
+    stats = profiler.task("motors")
+    while True:
+        container.motion.check_steps()
+        await stats.sleep(0)
+
+async def ws_telemetry_task():
+    stats = profiler.task("ws_telemetry")
+    motors = profiler.task("motors")
     while True:
-        container.motor.check_step()
-        await async_sleep(0)
+        container.server.send_telemetry(motors.take_peak_us())
+        await stats.sleep(1 / config.WS_TELEMETRY_HZ)
+
+async def telemetry_task():
+    await container.telemetry.run(profiler.task("telemetry"))
 
 async def main():
-    await gather(
+    tasks = [
         create_task(handle_http_requests()),
+        create_task(jobs_task()),
         #create_task(led_blicks()),
         create_task(send_http_logs()),
         create_task(screen_task()),
         create_task(motors_task()),
-    )
+        create_task(telemetry_task()),
+        create_task(ws_telemetry_task()),
+        create_task(state_task()),
+    ]
+    if container.encoder is not None:
+        tasks.append(create_task(encoder_task()))
+    await gather(*tasks)
 
 run(main())
\ No newline at end of file
@@ -4,4 +4,70 @@ LCD_I2C_DATA = board.GPIO1
 LCD_I2C_CLOCK = board.GPIO2
 
 UART_RX = board.GPIO4
-UART_TX = board.GPIO5
\ No newline at end of file
+UART_TX = board.GPIO5
+# GPIOs driving CD4051 select inputs A, B, C (README: UART addr 0/1/2), channel = motor index.
+# Leave empty while the drivers are not multiplexed, all motors then share one TMC_UART.
+UART_MUX_SELECT = ()
+UART_BAUDRATE = 115200
+# communication pause and read timeout per channel found by tmc_calibration are kept in microcontroller.nvm
+NVM_CALIBRATION_OFFSET = 0
+# calibrate at boot when nothing is stored yet, otherwise only through POST /api/motor/<index>/calibrate
+UART_CALIBRATE_ON_START = False
+# background reads of DRVSTATUS/TSTEP/MSCNT/GSTAT, one register of one driver per read
+TELEMETRY_READS_PER_SECOND = 20
+# complete samples kept per driver
+TELEMETRY_HISTORY = 16
+
+# (step, dir) pins per stepper, index is the motor index used by the web API.
+# Order from README: throttle 1, throttle 2, trim 1, trim 2, speed brake, trim wheel
+MOTOR_PINS = (
+    (board.GPIO17, board.GPIO18),
+)
+# names shown on the LCD motor screen, same order, at most 4 characters
+MOTOR_NAMES = ("THR1", "THR2", "TRM1", "TRM2", "SPDB", "WHEL")
+
+# rotary encoder A, B and push button (README inputs 15-17) for LCD screen navigation.
+# They sit on the input MCP23017, leave empty until it is supported, pins with .value work as well.
+ROTARY_PINS = ()
+
+# LCD bytes sent per event loop slice (about 0.4 ms each at 100 kHz I2C), fewer while motors move
+LCD_SLICE_BYTES = 8
+LCD_SLICE_BYTES_MOVING = 2
+
+# log level (DEBUG, ERROR, OFF) for modules not listed in LOG_LEVELS, change at runtime through /api/log
+LOG_LEVEL = "DEBUG"
+LOG_LEVELS = {
+    # e.g. "tmc2208": "ERROR" silences per register read/write messages
+}
+# print log messages to the serial console too
+LOG_ECHO = True
+
+# websocket log message size limit, logs beyond it go with the next send (once a second)
+WS_LOG_BUDGET = 2048
+# browser may use css/js without asking for this many seconds, then revalidates by ETag
+STATIC_MAX_AGE = 3600
+# binary telemetry frames per second pushed to the websocket client
+WS_TELEMETRY_HZ = 10
+# websocket clients kept at once, the oldest is closed for a new one
+WS_MAX_CLIENTS = 3
+# bytes sent to all clients together within WS_WINDOW_MS, messages over it wait or are dropped
+WS_WINDOW_BUDGET = 8192
+WS_WINDOW_MS = 100
+# consecutive failed sends after which a client is dropped
+WS_MAX_FAILURES = 3
+
+# seconds between HTTP polls while a motion is in progress, 0 otherwise
+HTTP_POLL_MOVING_S = 0.05
+# jobs (motor init/config/calibrate) kept for /api/job/<id>, pending ones included
+HTTP_MAX_JOBS = 8
+# how often the job task looks for work or for the motion to end
+HTTP_JOB_IDLE_S = 0.05
+
+# per task iteration time and wake-up lag for /api/stats, cheap enough to leave on
+PROFILER_ENABLED = True
+
+# S-curve ramp table entries (4 bytes each), longer ramps keep one averaged interval per 2, 4, ... steps
+RAMP_MAX_ENTRIES = 256
+
+# "bitbang" toggles step pins from Python, "pulseout" sends hardware timed pulse trains
+STEP_BACKEND = "bitbang"
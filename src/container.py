@@ -4,17 +4,40 @@ from web import WebServer
 from lcd import Lcd
 from screen import Screen
 from tmc2208 import TMC_UART
+from tmc_bus import MuxedTmcBus
 from motor import Motor
-import board
+from motion import MotionController
+from step_backend import create_backend
+from encoder import RotaryEncoder
+import tmc_calibration
+from telemetry import TelemetryPoller
+from jobs import JobQueue
+from profiler import Profiler
+import config
 
 class Container:
     def __init__(self, pool):
         self.state = MtuState()
-        self.tmc = TMC_UART(115200)
-        self.joy = Joystick()
-        self.motor = Motor(self.tmc, board.GPIO17, board.GPIO18)
-        self.server = WebServer(pool, self.joy, self.motor)
-        self.screen = Screen(Lcd(), self.state)
+        if config.UART_MUX_SELECT:
+            self.tmc_bus = MuxedTmcBus(config.UART_BAUDRATE, config.UART_MUX_SELECT, len(config.MOTOR_PINS))
+            tmcs = self.tmc_bus.handles
+        else:
+            self.tmc_bus = None
+            tmcs = [TMC_UART(config.UART_BAUDRATE)] * len(config.MOTOR_PINS)
+        if not tmc_calibration.load(tmcs) and config.UART_CALIBRATE_ON_START:
+            tmc_calibration.calibrate_all(tmcs)
+        self.joy = Joystick(self.state)
+        self.motors = [Motor(tmcs[i], step_pin, dir_pin, backend=create_backend(config.STEP_BACKEND, step_pin))
+                       for i, (step_pin, dir_pin) in enumerate(config.MOTOR_PINS)]
+        self.telemetry = TelemetryPoller(tmcs)
+        for i, motor in enumerate(self.motors):
+            motor.telemetry = self.telemetry.motor(i)
+        self.motion = MotionController(self.motors)
+        self.screen = Screen(Lcd(), self.state, busy=self.motion.is_moving)
+        self.encoder = RotaryEncoder(*config.ROTARY_PINS) if config.ROTARY_PINS else None
+        self.jobs = JobQueue()
+        self.profiler = Profiler()
+        self.server = WebServer(pool, self.joy, self.motion, self.screen, self.state, self.jobs, self.profiler)
 
 #tmc.test_uart(0x02)
 #pdebug("GCONF", tmc.read_int(0))
@@ -0,0 +1,46 @@
+import digitalio
+
+# quadrature transitions indexed by (previous AB << 2) | current AB, invalid ones count 0
+TRANSITIONS = (0, -1, 1, 0, 1, 0, 0, -1, -1, 0, 0, 1, 0, 1, -1, 0)
+# quarter steps per detent of a common mechanical encoder
+STEPS_PER_DETENT = 4
+
+
+def input_pin(pin):
+    """pins from board are set up as inputs with pull-up, anything with .value (e.g. MCP23017 pin) is used as is"""
+    if hasattr(pin, "value"):
+        return pin
+    io = digitalio.DigitalInOut(pin)
+    io.direction = digitalio.Direction.INPUT
+    io.pull = digitalio.Pull.UP
+    return io
+
+
+class RotaryEncoder:
+    """polled quadrature decoder, poll() must run at least every couple of ms while turning"""
+    def __init__(self, pin_a, pin_b, pin_button = None):
+        self.pin_a = input_pin(pin_a)
+        self.pin_b = input_pin(pin_b)
+        self.pin_button = None if pin_button is None else input_pin(pin_button)
+        self.state = self.read_ab()
+        self.steps = 0
+        self.button_down = False
+
+    def read_ab(self):
+        return (self.pin_a.value << 1) | self.pin_b.value
+
+    def poll(self):
+        """returns (detents turned since last call, True when the button was just pressed)"""
+        ab = self.read_ab()
+        if ab != self.state:
+            self.steps += TRANSITIONS[(self.state << 2) | ab]
+            self.state = ab
+        detents = int(self.steps / STEPS_PER_DETENT)
+        self.steps -= detents * STEPS_PER_DETENT
+        pressed = False
+        if self.pin_button is not None:
+            # pulled up, pressed is low
+            down = not self.pin_button.value
+            pressed = down and not self.button_down
+            self.button_down = down
+        return detents, pressed
@@ -0,0 +1,107 @@
+from asyncio import sleep as async_sleep
+import config
+from log import get_logger
+
+logger = get_logger("jobs")
+perror = logger.error
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class Job:
+    def __init__(self, job_id, name, function, args, is_async = False):
+        self.id = job_id
+        self.name = name
+        self.function = function
+        self.args = args
+        # function is a coroutine function, awaited by the jobs task
+        self.is_async = is_async
+        self.status = QUEUED
+        self.result = None
+
+    def to_dict(self):
+        return {"id": self.id, "name": self.name, "status": self.status, "result": self.result}
+
+
+class JobQueue:
+    """runs slow handlers (many UART transactions) outside of the HTTP poll
+
+    The handler answers 202 with the job id right away, run() executes the
+    jobs one by one. A blocking job does not start while busy() is true, so
+    a motor config does not stall stepping. Async jobs (submit_async) yield
+    during their UART transactions and run while motors move as well.
+    Finished jobs are kept for GET /api/job/<id> until max_jobs newer ones
+    push them out.
+    """
+    def __init__(self, max_jobs = None):
+        self.max_jobs = config.HTTP_MAX_JOBS if max_jobs is None else max_jobs
+        self.jobs = []
+        self.next_id = 1
+        self.rejected = 0
+
+    def submit(self, name, function, *args):
+        """queues function(*args), returns the job or None when the queue is full of pending jobs"""
+        return self.add(name, function, args, False)
+
+    def submit_async(self, name, function, *args):
+        """submit for a coroutine function, the job awaits function(*args)"""
+        return self.add(name, function, args, True)
+
+    def add(self, name, function, args, is_async):
+        if len(self.jobs) >= self.max_jobs:
+            finished = [job for job in self.jobs if job.status in (DONE, FAILED)]
+            if not finished:
+                self.rejected += 1
+                return None
+            self.jobs.remove(finished[0])
+        job = Job(self.next_id, name, function, args, is_async)
+        self.next_id += 1
+        self.jobs.append(job)
+        return job
+
+    def get(self, job_id):
+        for job in self.jobs:
+            if job.id == job_id:
+                return job
+        return None
+
+    def next_queued(self):
+        for job in self.jobs:
+            if job.status == QUEUED:
+                return job
+        return None
+
+    async def run_job(self, job):
+        job.status = RUNNING
+        try:
+            if job.is_async:
+                job.result = await job.function(*job.args)
+            else:
+                job.result = job.function(*job.args)
+            job.status = DONE
+        except Exception as e:
+            perror(f"Job {job.id} {job.name} failed: {e}")
+            job.result = str(e)
+            job.status = FAILED
+
+    async def run(self, busy = None, stats = None):
+        """runs jobs forever, sleeps through stats (profiler TaskStats) when given"""
+        sleep = async_sleep if stats is None else stats.sleep
+        while True:
+            job = self.next_queued()
+            if job is None or (not job.is_async and busy is not None and busy()):
+                await sleep(config.HTTP_JOB_IDLE_S)
+                continue
+            await self.run_job(job)
+            await sleep(0)
+
+    def stats(self):
+        return {
+            "queued": sum(1 for job in self.jobs if job.status == QUEUED),
+            "kept": len(self.jobs),
+            "submitted": self.next_id - 1,
+            "rejected": self.rejected,
+            }
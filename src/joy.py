@@ -3,6 +3,7 @@ import time
 
 import usb_hid
 import random
+import state
 
 def get_device() -> usb_hid.Device:
     """Find a Joystick device in the list of active USB HID devices."""
@@ -16,8 +17,10 @@ def get_device() -> usb_hid.Device:
     raise ValueError("Could not find Joystick HID device - check boot.py.)")
 
 class Joystick:
-    def __init__(self):
+    def __init__(self, mtu_state = None):
         self._joy_device = get_device()
+        # throttle axes are published here for the LCD
+        self._state = mtu_state
         self._report = bytearray(14)
 
         # Remember the last report as well, so we can avoid sending
@@ -85,6 +88,14 @@ class Joystick:
         if r_z is not None:
             self._joy_r_z = self._validate_joystick_value(r_z)
 
+    def axes(self):
+        """current (x, y, z, r_x, r_y, r_z), 0 to 4095 each"""
+        return (self._joy_x, self._joy_y, self._joy_z, self._joy_r_x, self._joy_r_y, self._joy_r_z)
+
+    def buttons(self):
+        """pressed buttons as bits, button 1 is bit 0"""
+        return self._buttons_state
+
     def reset_all(self):
         """Release all buttons and set joysticks to zero."""
         self._buttons_state = 0
@@ -128,6 +139,9 @@ class Joystick:
             self._joy_device.send_report(self._report)
             # Remember what we sent, without allocating new storage.
             self._last_report[:] = self._report
+            if self._state is not None:
+                self._state.put(state.SK_THROTTLE_1, self._joy_x)
+                self._state.put(state.SK_THROTTLE_2, self._joy_y)
 
     @staticmethod
     def _validate_button_number(button):
@@ -1,8 +1,11 @@
 import config
 import busio
-from log import pdebug
+from log import get_logger
 from lcd_pico_lib import I2cLcd
 
+logger = get_logger("lcd")
+pdebug = logger.debug
+
 def enumerate_i2c():
     pdebug("Enumerating i2c...")
     #i2c = board.STEMMA_I2C()  # uses board.SCL and board.SDA
@@ -35,6 +38,14 @@ class Lcd:
         finally:
             self.i2c.unlock()
 
+    def write_run(self, x, y, data, start, end):
+        """writes bytes data[start:end] at x, y with a single cursor move"""
+        self.i2c.try_lock()
+        try:
+            self.lcd.putbytes_at(x, y, data, start, end)
+        finally:
+            self.i2c.unlock()
+
     def move_to(self, x, y):
         self.i2c.try_lock()
         try:
@@ -0,0 +1,152 @@
+import time
+from asyncio import sleep as async_sleep
+
+LCD_LINES = 4
+LCD_COLUMNS = 20
+# a cursor move is one command byte, rewriting one unchanged char costs the same
+MERGE_GAP = 1
+# never shown by the display code, marks shadow content as unknown
+UNKNOWN = 0
+
+
+class LcdFrame:
+    """4x20 framebuffer between Screen and Lcd
+
+    Screens write text into `frame`, flush compares it with `shown` (what the
+    display currently shows) and sends only changed runs, each as one
+    cursor move plus the changed bytes.
+    """
+    def __init__(self, lcd, lines=LCD_LINES, columns=LCD_COLUMNS):
+        self.lcd = lcd
+        self.lines = lines
+        self.columns = columns
+        self.frame = [bytearray(b" " * columns) for _ in range(lines)]
+        # content after boot is unknown (splash), first flush writes everything
+        self.shown = [bytearray(columns) for _ in range(lines)]
+        self.runs = 0
+        self.bytes = 0
+        # flush_async: I2C time of the longest slice, the event loop stands still that long
+        self.slices = 0
+        self.max_slice_ns = 0
+
+    def write(self, x, y, text):
+        """puts text into the frame at x, y, clipped at the end of the line"""
+        row = self.frame[y]
+        for ch in text:
+            if x >= self.columns:
+                break
+            row[x] = ord(ch)
+            x += 1
+        return x
+
+    def write_line(self, y, text):
+        """replaces whole line y, the rest after text is blanked"""
+        x = self.write(0, y, text)
+        self.clear(x, y)
+
+    def clear(self, x=0, y=None, end=None):
+        """blanks line y from x to end (default whole line), y None blanks every line"""
+        if end is None:
+            end = self.columns
+        for line in range(self.lines) if y is None else (y,):
+            row = self.frame[line]
+            for i in range(x, end):
+                row[i] = 32
+
+    def invalidate(self):
+        """forget what the display shows, e.g. after it was cleared or reinitialized"""
+        for row in self.shown:
+            for i in range(self.columns):
+                row[i] = UNKNOWN
+
+    def next_run(self, y, x):
+        """first changed run of line y at or after x as (start, end), None when the rest is unchanged"""
+        frame = self.frame[y]
+        shown = self.shown[y]
+        columns = self.columns
+        while x < columns and frame[x] == shown[x]:
+            x += 1
+        if x >= columns:
+            return None
+        start = x
+        end = x + 1
+        x = end
+        while x < columns:
+            if frame[x] != shown[x]:
+                end = x + 1
+            elif x - end >= MERGE_GAP:
+                break
+            x += 1
+        return start, end
+
+    def send_run(self, y, start, end):
+        frame = self.frame[y]
+        shown = self.shown[y]
+        self.lcd.write_run(start, y, frame, start, end)
+        for i in range(start, end):
+            shown[i] = frame[i]
+        self.runs += 1
+        self.bytes += end - start
+
+    def flush(self):
+        """sends all differences to the display, returns number of runs sent"""
+        sent = 0
+        for y in range(self.lines):
+            x = 0
+            while True:
+                run = self.next_run(y, x)
+                if run is None:
+                    break
+                self.send_run(y, run[0], run[1])
+                x = run[1]
+                sent += 1
+        return sent
+
+    async def flush_async(self, max_bytes):
+        """flush in slices of at most max_bytes LCD bytes, yielding to the event loop between them
+
+        A run costs its bytes plus one for the cursor move. Runs longer than
+        a slice are split, the rest is found again by next_run as it still
+        differs from shown. Returns number of slices.
+        """
+        # below 2 a cursor move and a character never fit
+        max_bytes = max(2, max_bytes)
+        slices = 0
+        budget = max_bytes
+        started = time.monotonic_ns()
+        for y in range(self.lines):
+            x = 0
+            while True:
+                run = self.next_run(y, x)
+                if run is None:
+                    break
+                if budget < 2:
+                    # no room for cursor move + 1 byte
+                    self.end_slice(started)
+                    slices += 1
+                    await async_sleep(0)
+                    budget = max_bytes
+                    started = time.monotonic_ns()
+                start, end = run
+                end = min(end, start + budget - 1)
+                self.send_run(y, start, end)
+                budget -= end - start + 1
+                x = end
+        if budget < max_bytes:
+            self.end_slice(started)
+            slices += 1
+        return slices
+
+    def end_slice(self, started):
+        duration = time.monotonic_ns() - started
+        self.slices += 1
+        if duration > self.max_slice_ns:
+            self.max_slice_ns = duration
+
+    def stats(self):
+        return {
+            "runs": self.runs,
+            "bytes": self.bytes,
+            "slices": self.slices,
+            "max_slice_us": self.max_slice_ns // 1000,
+            }
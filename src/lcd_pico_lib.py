@@ -7,6 +7,10 @@
 
 import time
 from time import sleep
+from log import get_logger
+
+logger = get_logger("lcd_pico_lib")
+perror = logger.error
 
 class LcdApi:
     """Implements the API for talking with HD44780 compatible character LCDs.
@@ -165,18 +169,30 @@ class LcdApi:
         self.backlight = False
         self.hal_backlight_off()
 
+    def ddram_address(self, cursor_x, cursor_y):
+        addr = cursor_x & 0x3f
+        if cursor_y & 1:
+            addr += 0x40    # Lines 1 & 3 add 0x40
+        if cursor_y & 2:    # Lines 2 & 3 add number of columns
+            addr += self.num_columns
+        return addr
+
     def move_to(self, cursor_x, cursor_y):
         """Moves the cursor position to the indicated position. The cursor
         position is zero based (i.e. cursor_x == 0 indicates first column).
         """
         self.cursor_x = cursor_x
         self.cursor_y = cursor_y
-        addr = cursor_x & 0x3f
-        if cursor_y & 1:
-            addr += 0x40    # Lines 1 & 3 add 0x40
-        if cursor_y & 2:    # Lines 2 & 3 add number of columns
-            addr += self.num_columns
-        self.hal_write_command(self.LCD_DDRAM | addr)
+        self.hal_write_command(self.LCD_DDRAM | self.ddram_address(cursor_x, cursor_y))
+
+    def putbytes_at(self, cursor_x, cursor_y, data, start, end):
+        """Writes data[start:end] (character codes) from the indicated
+        position on, without wrapping. The cursor ends after the last byte.
+        """
+        self.move_to(cursor_x, cursor_y)
+        for i in range(start, end):
+            self.hal_write_data(data[i])
+        self.cursor_x = cursor_x + end - start
 
     def putchar(self, char):
         """Writes the indicated character to the LCD at the current cursor
@@ -272,11 +288,22 @@ MASK_E = 0x04
 SHIFT_BACKLIGHT = 3
 SHIFT_DATA = 4
 
+# every byte goes to the LCD as two nibbles, each clocked by E high then E low
+I2C_BYTES_PER_LCD_BYTE = 4
+
 class I2cLcd(LcdApi):
-    """Implements a HD44780 character LCD connected via PCF8574 on I2C."""
+    """Implements a HD44780 character LCD connected via PCF8574 on I2C.
+
+    Single commands and data bytes go out as one 4 byte writeto from a
+    scratch buffer, putbytes_at encodes cursor move and a whole run into
+    one preallocated buffer and sends it as a single I2C transaction.
+    """
     def __init__(self, i2c, i2c_addr = DEFAULT_I2C_ADDR, num_lines = 2, num_columns = 16):
         self.i2c = i2c
         self.i2c_addr = i2c_addr
+        self.scratch = bytearray(I2C_BYTES_PER_LCD_BYTE)
+        # cursor command + one line of data
+        self.run_buf = bytearray(I2C_BYTES_PER_LCD_BYTE * (1 + min(num_columns, 40)))
         self.i2c.writeto(self.i2c_addr, bytearray([0]))
         sleep(0.02)   # Allow LCD time to powerup
         # Send reset 3 times
@@ -312,17 +339,23 @@ class I2cLcd(LcdApi):
         """Allows the hal layer to turn the backlight off."""
         self.i2c.writeto(self.i2c_addr, bytearray([0]))
 
-    def hal_write_command(self, cmd):
-        """Writes a command to the LCD.
+    def encode(self, buf, pos, rs, val):
+        """Encodes one LCD byte as the four PCF8574 port writes at buf[pos].
 
         Data is latched on the falling edge of E.
         """
-        byte = ((self.backlight << SHIFT_BACKLIGHT) | (((cmd >> 4) & 0x0f) << SHIFT_DATA))
-        self.i2c.writeto(self.i2c_addr, bytearray([byte | MASK_E]))
-        self.i2c.writeto(self.i2c_addr, bytearray([byte]))
-        byte = ((self.backlight << SHIFT_BACKLIGHT) | ((cmd & 0x0f) << SHIFT_DATA))
-        self.i2c.writeto(self.i2c_addr, bytearray([byte | MASK_E]))
-        self.i2c.writeto(self.i2c_addr, bytearray([byte]))
+        byte = rs | (self.backlight << SHIFT_BACKLIGHT) | (((val >> 4) & 0x0f) << SHIFT_DATA)
+        buf[pos] = byte | MASK_E
+        buf[pos + 1] = byte
+        byte = rs | (self.backlight << SHIFT_BACKLIGHT) | ((val & 0x0f) << SHIFT_DATA)
+        buf[pos + 2] = byte | MASK_E
+        buf[pos + 3] = byte
+        return pos + I2C_BYTES_PER_LCD_BYTE
+
+    def hal_write_command(self, cmd):
+        """Writes a command to the LCD."""
+        self.encode(self.scratch, 0, 0, cmd)
+        self.i2c.writeto(self.i2c_addr, self.scratch)
         if cmd <= 3:
             # The home and clear commands require a worst case delay of 4.1 msec
             sleep(0.005)
@@ -330,15 +363,29 @@ class I2cLcd(LcdApi):
     def hal_write_data(self, data):
         """Write data to the LCD."""
         try:
-            byte = (MASK_RS | (self.backlight << SHIFT_BACKLIGHT) | (((data >> 4) & 0x0f) << SHIFT_DATA))
-            self.i2c.writeto(self.i2c_addr, bytearray([byte | MASK_E]))
-            self.i2c.writeto(self.i2c_addr, bytearray([byte]))
-            byte = (MASK_RS | (self.backlight << SHIFT_BACKLIGHT) | ((data & 0x0f) << SHIFT_DATA))
-            self.i2c.writeto(self.i2c_addr, bytearray([byte | MASK_E]))
-            self.i2c.writeto(self.i2c_addr, bytearray([byte]))
+            self.encode(self.scratch, 0, MASK_RS, data)
+            self.i2c.writeto(self.i2c_addr, self.scratch)
         except OSError:
             perror("Error writing display data")
 
+    def putbytes_at(self, cursor_x, cursor_y, data, start, end):
+        """Cursor move and data in as few writeto calls as the buffer allows, one per line."""
+        buf = self.run_buf
+        chunk = len(buf) // I2C_BYTES_PER_LCD_BYTE - 1
+        try:
+            while start < end:
+                count = min(chunk, end - start)
+                pos = self.encode(buf, 0, 0, self.LCD_DDRAM | self.ddram_address(cursor_x, cursor_y))
+                for i in range(start, start + count):
+                    pos = self.encode(buf, pos, MASK_RS, data[i])
+                self.i2c.writeto(self.i2c_addr, buf, end=pos)
+                start += count
+                cursor_x += count
+        except OSError:
+            perror("Error writing display data")
+        self.cursor_x = cursor_x
+        self.cursor_y = cursor_y
+
     def hal_sleep_us(self, usecs):
         """Sleep for some time (given in microseconds)."""
         sleep(float(usecs)/1e6)
@@ -1,42 +1,198 @@
-from collections import deque
+from array import array
 import time
 import gc
 from tools import format_datetime
+import config
 
-class LogItem:
-    def __init__(self, log_number, log_time, level, message):
-        self.log_number = log_number
-        self.log_time = format_datetime(log_time)
+LOG_CAPACITY = 100
+# message bytes of all kept records, oldest records are dropped when it is full
+LOG_ARENA_SIZE = 6144
+LEVELS = ("DEBUG", "ERROR")
+LEVEL_DEBUG = 0
+LEVEL_ERROR = 1
+# only as logger level, nothing is logged
+LEVEL_OFF = 2
+LEVEL_NAMES = ("DEBUG", "ERROR", "OFF")
+
+class LogBuffer:
+    """ring of log records in preallocated storage
+
+    Per record: number, time (int seconds), level (index into LEVELS) and
+    message bytes in a shared arena, written sequentially and wrapping
+    around. The message text itself is made when logging (see emit), the
+    record only keeps its bytes; time stamp and level name are formatted by
+    to_string and the websocket stream when somebody reads the record.
+    """
+    def __init__(self, capacity, arena_size):
+        self.capacity = capacity
+        self.numbers = array("L", [0] * capacity)
+        self.times = array("L", [0] * capacity)
+        self.levels = bytearray(capacity)
+        # 1 when the message contains " or \ and needs escaping in JSON
+        self.escapes = bytearray(capacity)
+        self.starts = array("H", [0] * capacity)
+        self.lengths = array("H", [0] * capacity)
+        self.arena = bytearray(arena_size)
+        self.arena_size = arena_size
+        self.view = memoryview(self.arena)
+        self.first = 0          # slot of the oldest record
+        self.count = 0
+        self.head = 0           # arena write position
+        self.counter = 0        # number of the next record
+
+    def drop_oldest(self):
+        self.first = (self.first + 1) % self.capacity
+        self.count -= 1
+
+    def reserve(self, length):
+        """arena position for length bytes (at most the arena size), drops records in the way"""
+        start = self.head
+        starts = self.starts
+        if start + length > self.arena_size:
+            # records behind head are the oldest, the tail of the arena is left unused
+            while self.count and starts[self.first] >= start:
+                self.drop_oldest()
+            start = 0
+        end = start + length
+        while self.count and (self.count == self.capacity or start <= starts[self.first] < end):
+            self.drop_oldest()
+        self.head = end
+        return start
+
+    def add(self, log_time, level, message):
+        """message is str or bytes, control characters become spaces, cut on a UTF-8 character boundary"""
+        if isinstance(message, str):
+            message = message.encode()
+        # min runs in C, the copy is made only for the rare message with control characters
+        if message and min(message) < 0x20:
+            message = bytearray(message)
+            for i in range(len(message)):
+                if message[i] < 0x20:
+                    message[i] = 0x20
+        length = len(message)
+        if length > self.arena_size:
+            length = self.arena_size
+            # do not split a multi-byte character, message[length] must not be a continuation byte
+            while length > 0 and (message[length] & 0xC0) == 0x80:
+                length -= 1
+            message = message[:length]
+        start = self.reserve(length)
+        self.arena[start:start + length] = message
+        slot = self.first + self.count
+        if slot >= self.capacity:
+            slot -= self.capacity
+        self.count += 1
+        self.numbers[slot] = self.counter
+        self.times[slot] = int(log_time)
+        self.levels[slot] = level
+        self.escapes[slot] = b'"' in message or b'\\' in message
+        self.starts[slot] = start
+        self.lengths[slot] = length
+        self.counter += 1
+
+    def slots(self):
+        """slots oldest first"""
+        for i in range(self.count):
+            yield (self.first + i) % self.capacity
+
+    def message(self, slot):
+        """memoryview into the arena, valid until the next add"""
+        start = self.starts[slot]
+        return self.view[start:start + self.lengths[slot]]
+
+    def time_string(self, slot):
+        return format_datetime(time.localtime(self.times[slot]))
+
+    def to_string(self, slot):
+        return f"{self.time_string(slot)}: {LEVELS[self.levels[slot]]} {str(self.message(slot), 'utf-8')}"
+
+class Logger:
+    """log level of one module, see get_logger
+
+    debug_on / error_on are plain attributes, guard hot paths with
+    `if _log.debug_on:` so disabled messages do not even build their text.
+    """
+    def __init__(self, name, level):
+        self.name = name
+        self.set_level(level)
+
+    def set_level(self, level):
         self.level = level
-        self.message = message
+        self.debug_on = level <= LEVEL_DEBUG
+        self.error_on = level <= LEVEL_ERROR
+
+    def enabled(self, level):
+        return level >= self.level
+
+    def debug(self, *args):
+        if self.debug_on:
+            emit(LEVEL_DEBUG, args)
+
+    def error(self, *args):
+        if self.error_on:
+            emit(LEVEL_ERROR, args)
+
+log_buffer = LogBuffer(LOG_CAPACITY, LOG_ARENA_SIZE)
+loggers = {}
+# print to the serial console as well, independent of the levels which decide what is logged at all
+echo = config.LOG_ECHO
 
-    def to_string(self):
-        return f"{self.log_time}: {self.level} {self.message}"
+def get_logger(name):
+    logger = loggers.get(name)
+    if logger is None:
+        logger = Logger(name, LEVEL_NAMES.index(config.LOG_LEVELS.get(name, config.LOG_LEVEL)))
+        loggers[name] = logger
+    return logger
 
-log_items = deque([], 100)
-log_counter = 0
+def set_level(name, level_name):
+    """changes level of a module at runtime, returns False for unknown level"""
+    if level_name not in LEVEL_NAMES:
+        return False
+    get_logger(name).set_level(LEVEL_NAMES.index(level_name))
+    return True
+
+def set_echo(on):
+    global echo
+    echo = on
+
+def levels():
+    return {name: LEVEL_NAMES[logger.level] for name, logger in loggers.items()}
+
+def emit(level, args):
+    """formats args right away, like print, whether or not anybody reads the log
+
+    str of every arg, the joined text and its bytes are short lived
+    temporaries, only the bytes copied into the arena stay. Skipping a
+    disabled level (the callers check debug_on / error_on) is what saves
+    the work, not the buffer.
+    """
+    if echo:
+        print(*args)
+    add_raw_log(time.time(), level, " ".join(map(str, args)))
 
 def add_raw_log(log_time, level, message):
-    global log_items, log_counter
-    log_items.append(LogItem(log_counter, log_time, level, message))
-    log_counter += 1
+    log_buffer.add(log_time, level, message)
+
+# modules without their own logger
+root = get_logger("root")
 
 def debug(message):
-    add_raw_log(time.localtime(), "DEBUG", message)
+    if root.debug_on:
+        add_raw_log(time.time(), LEVEL_DEBUG, message)
 
 # print and debug
 def pdebug(*args):
-    print(*args)
-    debug(" ".join(map(str, args)))
+    if root.debug_on:
+        emit(LEVEL_DEBUG, args)
 
 # print and error
 def perror(*args):
-    print(*args)
-    add_raw_log(time.localtime(), "ERROR", " ".join(map(str, args)))
+    if root.error_on:
+        emit(LEVEL_ERROR, args)
 
 def log_memory():
     gc.collect()
     pdebug("Free mem:", gc.mem_free())
 
 def get_last_log():
-    return log_counter
\ No newline at end of file
+    return log_buffer.counter
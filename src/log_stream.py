@@ -0,0 +1,124 @@
+import config
+import log
+
+LOGS_START = b'{"logs":{'
+DATA_START = b'},"data":'
+MESSAGE_END = b'}'
+# space kept free for DATA_START, the data element and MESSAGE_END
+DATA_RESERVE = 96
+LEVEL_NAMES = tuple(level.encode() for level in log.LEVELS)
+
+
+def json_escape(data):
+    """message bytes with " and \\ escaped for a JSON string, control characters are replaced by LogBuffer.add"""
+    return data.replace(b'\\', b'\\\\').replace(b'"', b'\\"')
+
+
+class LogStream:
+    """sends one websocket client the logs it has not seen yet
+
+    next_log is the number of the first log the client still needs. Every
+    send builds {"logs":{...},"data":{...}} into one reusable buffer with as
+    many new logs as fit the byte budget, the rest goes with the next tick.
+    A websocket with message_limit (WsBroadcaster) lowers the budget to what
+    its window budget takes, otherwise a full message would never be sent.
+    Sent as a binary frame, log.js decodes it as UTF-8 JSON.
+    """
+    def __init__(self, websocket, next_log, budget = None):
+        if budget is None:
+            budget = config.WS_LOG_BUDGET
+        self.websocket = websocket
+        self.next_log = next_log
+        self.buf = bytearray(budget)
+        self.message_limit = getattr(websocket, "message_limit", None)
+        self.messages = 0
+        self.bytes = 0
+        self.skipped = 0
+
+    def pending(self):
+        return log.get_last_log() > self.next_log
+
+    def put(self, pos, data):
+        end = pos + len(data)
+        if pos < 0 or end > len(self.buf):
+            return -1
+        self.buf[pos:end] = data
+        return end
+
+    def fill(self, data_element):
+        """builds the message, returns its length"""
+        if len(data_element) > DATA_RESERVE - len(DATA_START) - len(MESSAGE_END):
+            data_element = b'{}'
+        pos = self.put(0, LOGS_START)
+        size = len(self.buf)
+        if self.message_limit is not None:
+            size = min(size, self.message_limit())
+        limit = size - DATA_RESERVE
+        first = True
+        logs = log.log_buffer
+        for slot in logs.slots():
+            number = logs.numbers[slot]
+            if number < self.next_log:
+                continue
+            if number > self.next_log:
+                # fell out of the ring before the client got it
+                self.skipped += number - self.next_log
+                self.next_log = number
+            start = pos
+            if not first:
+                pos = self.put(pos, b',"')
+            else:
+                pos = self.put(pos, b'"')
+            message = logs.message(slot)
+            if logs.escapes[slot]:
+                message = json_escape(bytes(message))
+            for part in (str(number).encode(), b'":"', logs.time_string(slot).encode(), b': ',
+                         LEVEL_NAMES[logs.levels[slot]], b' ', message, b'"'):
+                if pos < 0 or pos > limit:
+                    break
+                pos = self.put(pos, part)
+            if pos < 0 or pos > limit:
+                if first:
+                    # alone too big for the budget, drop it rather than stall the stream
+                    self.next_log = number + 1
+                    self.skipped += 1
+                pos = start
+                break
+            first = False
+            self.next_log = number + 1
+        pos = self.put(pos, DATA_START)
+        pos = self.put(pos, data_element)
+        pos = self.put(pos, MESSAGE_END)
+        return pos
+
+    def rewind(self, next_log):
+        """a client joined which needs older logs, the others skip duplicates by log number"""
+        if next_log < self.next_log:
+            self.next_log = next_log
+
+    def send(self, data_element):
+        """sends pending logs, returns bytes sent"""
+        if not self.pending():
+            return 0
+        next_log = self.next_log
+        skipped = self.skipped
+        length = self.fill(data_element)
+        if length <= 0:
+            return 0
+        if self.websocket.send_message(memoryview(self.buf)[:length], fail_silently=True) is False:
+            # not sent (WsBroadcaster budget), the same logs go with the next tick and fill
+            # counts the ones it drops again then, so forget this round's count
+            self.next_log = next_log
+            self.skipped = skipped
+            return 0
+        self.messages += 1
+        self.bytes += length
+        return length
+
+    def stats(self):
+        return {
+            "next_log": self.next_log,
+            "messages": self.messages,
+            "bytes": self.bytes,
+            "skipped": self.skipped,
+            }
@@ -0,0 +1,70 @@
+from array import array
+
+# upper bound of bucket i is BUCKET_BASE_US << i, the last bucket takes everything above
+BUCKET_SHIFT = 4
+BUCKET_BASE_US = 1 << BUCKET_SHIFT
+BUCKETS = 14
+
+
+class Histogram:
+    """durations in us counted into fixed power of two buckets
+
+    Everything is preallocated, add does not allocate. Percentiles are
+    read from the buckets, so they are upper bounds with the resolution of
+    the bucket width.
+    """
+    def __init__(self, buckets = BUCKETS):
+        self.counts = array("L", [0] * buckets)
+        self.last = buckets - 1
+        self.reset()
+
+    def reset(self):
+        for i in range(len(self.counts)):
+            self.counts[i] = 0
+        self.count = 0
+        self.total_us = 0
+        self.min_us = 0
+        self.max_us = 0
+
+    def add(self, us):
+        if us > BUCKET_BASE_US:
+            # (BUCKET_BASE_US << (i - 1), BUCKET_BASE_US << i] -> i
+            bucket = ((us - 1) >> BUCKET_SHIFT).bit_length()
+            if bucket > self.last:
+                bucket = self.last
+        else:
+            bucket = 0
+        self.counts[bucket] += 1
+        if self.count == 0 or us < self.min_us:
+            self.min_us = us
+        if us > self.max_us:
+            self.max_us = us
+        self.count += 1
+        self.total_us += us
+
+    def percentile(self, p):
+        """bucket bound below which p percent of the durations are, max for the last bucket"""
+        if self.count == 0:
+            return 0
+        needed = self.count * p / 100
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= needed:
+                if i == len(self.counts) - 1:
+                    return self.max_us
+                return min(BUCKET_BASE_US << i, self.max_us)
+        return self.max_us
+
+    def stats(self):
+        return {
+            "count": self.count,
+            "min_us": self.min_us,
+            "mean_us": self.total_us // self.count if self.count else 0,
+            "max_us": self.max_us,
+            "p50_us": self.percentile(50),
+            "p90_us": self.percentile(90),
+            "p99_us": self.percentile(99),
+            "buckets_us": [BUCKET_BASE_US << i for i in range(len(self.counts) - 1)],
+            "counts": list(self.counts),
+            }
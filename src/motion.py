@@ -0,0 +1,160 @@
+import time
+from log import get_logger
+
+logger = get_logger("motion")
+pdebug = logger.debug
+
+NEVER = 1 << 62
+
+class MotionController:
+    """Drives all motors from one timing loop.
+
+    Moving axes are kept in `order`, sorted by their next pulse deadline, so a
+    call to check_steps costs one comparison until the earliest axis is due,
+    no matter how many axes are configured. Coordinated moves step follower
+    axes from the leader's pulses (Bresenham), so all of them arrive together.
+    """
+    def __init__(self, motors):
+        self.motors = motors
+        self.order = []
+        self.next_deadline_ns = NEVER
+        # per leader axis list of [follower index, follower steps, error]
+        self.followers = [None] * len(motors)
+        self.leader_steps = [0] * len(motors)
+        self.pulses = 0
+
+    def move(self, index, steps, rpm):
+        self.release(index)
+        motor = self.motors[index]
+        message = motor.move(steps, rpm)
+        self.pulses += abs(steps) - motor.steps_to_do
+        self.schedule(index)
+        return message
+
+    def move_coordinated(self, steps, rpm):
+        """Moves several axes so they start and finish together.
+
+        Args:
+            steps (list): steps per axis (index in list = motor index), 0 for axes not moving
+            rpm (int): speed of the axis with the longest move
+        """
+        leader = 0
+        for index, count in enumerate(steps):
+            if abs(count) > abs(steps[leader]):
+                leader = index
+        total = abs(steps[leader])
+        if total == 0:
+            return "Nothing to move"
+        followers = []
+        for index, count in enumerate(steps):
+            if count == 0:
+                # axes not part of this move keep doing what they do
+                continue
+            self.release(index)
+            if index != leader:
+                follower = self.motors[index]
+                follower.dir_pin.value = (count > 0)
+                follower.steps_to_do = abs(count)
+                followers.append([index, abs(count), 0])
+        self.followers[leader] = followers
+        self.leader_steps[leader] = total
+        motor = self.motors[leader]
+        motor.move(steps[leader], rpm)
+        self.pulses += total - motor.steps_to_do
+        self.follow(leader, total - motor.steps_to_do)
+        self.schedule(leader)
+        pdebug(f"Coordinated move led by motor {leader}, {total} steps, {len(followers)} followers")
+        return "OK"
+
+    def release(self, index):
+        """Stops index as a scheduled axis, coordinated leader or follower, its pending steps are dropped"""
+        self.motors[index].steps_to_do = 0
+        if index in self.order:
+            self.order.remove(index)
+            self.update_deadline()
+        followers = self.followers[index]
+        if followers is not None:
+            for follower in followers:
+                self.motors[follower[0]].steps_to_do = 0
+            self.followers[index] = None
+        for followers in self.followers:
+            if followers is not None:
+                for follower in followers:
+                    if follower[0] == index:
+                        followers.remove(follower)
+                        break
+
+    def schedule(self, index):
+        motor = self.motors[index]
+        if motor.steps_to_do <= 0:
+            return
+        deadline = motor.scheduler.next_pulse_ns
+        position = 0
+        while position < len(self.order) and self.motors[self.order[position]].scheduler.next_pulse_ns <= deadline:
+            position += 1
+        self.order.insert(position, index)
+        self.update_deadline()
+
+    def update_deadline(self):
+        if self.order:
+            self.next_deadline_ns = self.motors[self.order[0]].scheduler.next_pulse_ns
+        else:
+            self.next_deadline_ns = NEVER
+
+    def follow(self, leader, count):
+        followers = self.followers[leader]
+        if followers is None:
+            return
+        total = self.leader_steps[leader]
+        for _ in range(count):
+            for follower in followers:
+                follower[2] += follower[1]
+                if 2 * follower[2] >= total:
+                    follower[2] -= total
+                    motor = self.motors[follower[0]]
+                    if motor.steps_to_do > 0:
+                        motor.make_step()
+                        motor.steps_to_do -= 1
+                        self.pulses += 1
+
+    def check_steps(self, now = None):
+        """Services all axes which are due, returns number of pulses made"""
+        if now is None:
+            if not self.order:
+                return 0
+            now = time.monotonic_ns()
+        if now < self.next_deadline_ns:
+            return 0
+        made = 0
+        order = self.order
+        # every axis at most once per pass, an axis stepping "as fast as possible" stays due
+        for _ in range(len(order)):
+            index = order[0]
+            motor = self.motors[index]
+            if now < motor.scheduler.next_pulse_ns:
+                break
+            count = motor.check_step(now)
+            if self.followers[index] is not None:
+                self.follow(index, count)
+            made += count
+            if motor.steps_to_do > 0:
+                # sift the axis back into deadline order in place
+                deadline = motor.scheduler.next_pulse_ns
+                position = 1
+                while position < len(order) and self.motors[order[position]].scheduler.next_pulse_ns <= deadline:
+                    order[position - 1] = order[position]
+                    position += 1
+                order[position - 1] = index
+            else:
+                order.pop(0)
+                self.followers[index] = None
+        self.update_deadline()
+        self.pulses += made
+        return made
+
+    def is_moving(self):
+        return len(self.order) > 0
+
+    def status(self):
+        """tuple of Motor.status per motor, compares equal while nothing changes"""
+        return tuple(motor.status() for motor in self.motors)
@@ -0,0 +1,96 @@
+import math
+from array import array
+import config
+
+NS_PER_S = 1_000_000_000
+# AVR446: the recurrence starts from a shortened first interval to make up for its error at small n
+FIRST_STEP_CORRECTION = 0.676
+# Newton iterations per table entry in the jerk down phase, stops earlier once converged
+NEWTON_ITERATIONS = 8
+
+class Ramp:
+    """Step intervals of an acceleration from standstill to max_rate.
+
+    A trapezoidal ramp (jerk 0) is not stored: StepScheduler derives each
+    interval from the previous one with the integer recurrence of AVR446,
+    c(n) = c(n-1) - 2 c(n-1) / (4n + 1), starting at c0_ns. The first
+    interval itself is the exact first_ns. An S-curve
+    is precomputed into intervals, at most max_entries long; a longer ramp
+    keeps one averaged interval per 1 << shift steps. Deceleration runs the
+    same ramp backwards, so moves are symmetric.
+
+    Args:
+        max_rate (int): cruise rate in steps/s
+        accel (int): max acceleration in steps/s^2
+        jerk (int): max jerk in steps/s^3, 0 for trapezoidal profile
+        max_entries (int): S-curve table size limit, default config.RAMP_MAX_ENTRIES
+    """
+    def __init__(self, max_rate, accel, jerk=0, max_entries=None):
+        self.max_rate = max_rate
+        self.accel = accel
+        self.jerk = jerk
+        # rounding at the end of the ramp must not produce an interval shorter than cruise
+        self.shortest_ns = round(NS_PER_S / max_rate)
+        self.first_ns = 0
+        self.c0_ns = 0
+        self.shift = 0
+        self.intervals = None
+        if jerk > 0:
+            self._s_curve(config.RAMP_MAX_ENTRIES if max_entries is None else max_entries)
+        else:
+            # s(t) = a t^2 / 2  ->  v^2 / 2a steps until v = max_rate, first pulse after sqrt(2 / a)
+            self.steps = max(1, math.ceil(max_rate * max_rate / (2 * accel)))
+            self.first_ns = max(self.shortest_ns, round(math.sqrt(2 / accel) * NS_PER_S))
+            self.c0_ns = round(FIRST_STEP_CORRECTION * math.sqrt(2 / accel) * NS_PER_S)
+
+    def __len__(self):
+        return self.steps
+
+    def matches(self, max_rate, accel, jerk):
+        return self.max_rate == max_rate and self.accel == accel and self.jerk == jerk
+
+    def _s_curve(self, max_entries):
+        v, a, j = self.max_rate, self.accel, self.jerk
+        t1 = a / j
+        t2 = v / a - t1
+        if t2 < 0:
+            # max acceleration is never reached
+            t1 = math.sqrt(v / j)
+            t2 = 0
+        a = j * t1
+        # phase ends: position and velocity after jerk up (1) and constant accel (2)
+        v1 = j * t1 * t1 / 2
+        s1 = j * t1 * t1 * t1 / 6
+        v2 = v1 + a * t2
+        s2 = s1 + v1 * t2 + a * t2 * t2 / 2
+        s3 = s2 + v2 * t1 + a * t1 * t1 / 2 - j * t1 * t1 * t1 / 6
+        steps = max(1, math.ceil(s3))
+        shift = 0
+        while ((steps - 1) >> shift) + 1 > max_entries:
+            shift += 1
+        entries = ((steps - 1) >> shift) + 1
+        intervals = array("L", [0] * entries)
+        t = 0.0
+        last = 0.0
+        for k in range(entries):
+            first = k << shift
+            n = min(first + (1 << shift), steps)
+            # time of step n, closed form for the jerk up and constant accel phases
+            if n <= s1:
+                t = (6 * n / j) ** (1 / 3)
+            elif n <= s2:
+                t = t1 + (math.sqrt(v1 * v1 + 2 * a * (n - s1)) - v1) / a
+            else:
+                # jerk down: Newton from the previous step time
+                d = max(0.0, t - t1 - t2)
+                for _ in range(NEWTON_ITERATIONS):
+                    delta = (n - (s2 + v2 * d + a * d * d / 2 - j * d * d * d / 6)) / (v2 + a * d - j * d * d / 2)
+                    d += delta
+                    if -1e-9 < delta < 1e-9:
+                        break
+                t = t1 + t2 + d
+            intervals[k] = max(self.shortest_ns, round((t - last) * NS_PER_S / (n - first)))
+            last = t
+        self.steps = steps
+        self.shift = shift
+        self.intervals = intervals
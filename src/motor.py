@@ -1,16 +1,28 @@
 import tmc2208
-from log import pdebug
+import telemetry
+from log import get_logger
+from step_scheduler import StepScheduler, DEFAULT_MAX_CATCHUP
+from motion_profile import Ramp
+from step_backend import StepBackend, BitBangStepBackend
 import math
 import digitalio
 import time
 
+logger = get_logger("motor")
+pdebug = logger.debug
+
 DEFAULT_MICRO_STEPS = 8
+STEPS_PER_REVOLUTION = 200
+# steps/s^2 and steps/s^3, jerk 0 means trapezoidal profile
+DEFAULT_MAX_ACCEL = 16000
+DEFAULT_MAX_JERK = 0
 
 class Motor:
-    def __init__(self, tmc_uart: tmc2208.TMC_UART, step_pin, dir_pin):
+    def __init__(self, tmc_uart: tmc2208.TMC_UART, step_pin, dir_pin, max_catchup = DEFAULT_MAX_CATCHUP,
+                 backend: StepBackend = None):
         self.tmc_uart = tmc_uart
-        self.step_pin = digitalio.DigitalInOut(step_pin)
-        self.step_pin.direction = digitalio.Direction.OUTPUT
+        # step_pin is only used for the default bit-bang backend
+        self.backend = backend if backend is not None else BitBangStepBackend(step_pin)
         self.dir_pin = digitalio.DigitalInOut(dir_pin)
         self.dir_pin.direction = digitalio.Direction.OUTPUT
         self.ihold = 0
@@ -18,28 +30,67 @@ class Motor:
         self.steps_to_do = 0
         self.rpm = 0
         self.microsteps = DEFAULT_MICRO_STEPS
-        self.step_delay_ms = 0
-        self.next_pulse_ms = 0
+        self.scheduler = StepScheduler(max_catchup)
+        self.max_accel = DEFAULT_MAX_ACCEL
+        self.max_jerk = DEFAULT_MAX_JERK
+        self.ramp = None
+        # MotorTelemetry filled by the background poller, see telemetry.TelemetryPoller
+        self.telemetry = None
 
     def init(self):
-        self.set_current(1,1)
-        self.set_microsteps(DEFAULT_MICRO_STEPS)
+        # a power cycled driver is back at defaults, whatever the shadow says
+        self.tmc_uart.check_reset()
+        if not self.configure(1, DEFAULT_MICRO_STEPS):
+            return "Motor init failed"
         return "Motor init OK"
 
-    def collect_data(self):
-        gconf = self.tmc_uart.read_int(tmc2208.GCONF)
-        ifcnt = self.tmc_uart.read_int(tmc2208.IFCNT)
-        return {
-            "GCONF": bin(gconf),
-            "IFCNT": ifcnt,
-            }
+    def configure(self, current, microsteps):
+        """sets run/hold current and microsteps, verified as one batch"""
+        with self.tmc_uart.batch() as batch:
+            self.set_current(current, current, writer = batch)
+            self.set_microsteps(microsteps, writer = batch)
+        return batch.ok
+
+    async def init_async(self):
+        """init through tmc_uart.aio, the event loop keeps running during the transactions"""
+        await self.tmc_uart.aio.check_reset()
+        if not await self.configure_async(1, DEFAULT_MICRO_STEPS):
+            return "Motor init failed"
+        return "Motor init OK"
 
-    def set_current(self, ihold, irun, ihold_delay = 0):
+    async def configure_async(self, current, microsteps):
+        """configure through tmc_uart.aio"""
+        async with self.tmc_uart.aio.batch() as batch:
+            # set_microsteps modifies these, the batch only looks at the shadow
+            await batch.load(tmc2208.CHOPCONF, tmc2208.GCONF)
+            self.set_current(current, current, writer = batch)
+            self.set_microsteps(microsteps, writer = batch)
+        return batch.ok
+
+    def collect_data(self, history = False):
+        """served from shadow and telemetry snapshot, does not touch the UART"""
+        gconf = self.tmc_uart.shadow.values.get(tmc2208.GCONF)
+        data = {
+            "GCONF": None if gconf is None else bin(gconf),
+            "shadow": self.tmc_uart.shadow.stats(),
+            "uart": self.tmc_uart.aio.stats(),
+            "link": self.tmc_uart.link_stats(),
+            }
+        if self.tmc_uart.bus is not None:
+            data["bus"] = self.tmc_uart.bus.stats()
+        if self.telemetry is not None:
+            data["telemetry"] = self.telemetry.snapshot()
+            if history:
+                data["history"] = self.telemetry.history_items()
+        return data
+
+    def set_current(self, ihold, irun, ihold_delay = 0, writer = None):
         self.ihold = ihold
         self.irun = irun
-        return self.set_just_current(ihold, irun)
+        return self.set_just_current(ihold, irun, ihold_delay, writer)
 
-    def set_just_current(self, ihold, irun, ihold_delay = 0):
+    def set_just_current(self, ihold, irun, ihold_delay = 0, writer = None):
+        """writer is the TMC_UART (default), a WriteBatch collecting the write or AsyncTMC_UART (await the result)"""
         # bit 4-0  IHOLD 0-31
         # bit 12-8 IRUN 0-31
         # bit 19-16 IHOLDDELAY 
@@ -48,70 +99,101 @@ class Motor:
         ihold_irun = ihold_irun | irun << 8
         ihold_irun = ihold_irun | ihold_delay << 16
         pdebug(f"ihold_irun: {hex(ihold_irun)}")
-        return self.tmc_uart.write_reg_check(tmc2208.IHOLD_IRUN, ihold_irun)        
+        return (writer or self.tmc_uart).write_cached(tmc2208.IHOLD_IRUN, ihold_irun)
 
 
-    def set_microsteps(self, number_of_steps):
-        chopconf = self.tmc_uart.read_int(tmc2208.CHOPCONF)
-        #setting all bits to zero
-        chopconf = chopconf & (~tmc2208.msres0 & ~tmc2208.msres1 &
-                                ~tmc2208.msres2 & ~tmc2208.msres3)
+    def set_microsteps(self, number_of_steps, writer = None):
+        writer = writer or self.tmc_uart
+        number_of_steps = int(number_of_steps)
         msresdezimal = int(math.log(number_of_steps, 2))
         msresdezimal = 8 - msresdezimal
-        chopconf = chopconf | msresdezimal <<24
         pdebug(f"writing {number_of_steps} microstep setting")
-        self.tmc_uart.write_reg_check(tmc2208.CHOPCONF, chopconf)
-        self.microstep = number_of_steps
-        self.set_mstep_resolution_reg_select(True)
+        writer.modify_reg(tmc2208.CHOPCONF,
+                          set_mask = msresdezimal << 24,
+                          clear_mask = tmc2208.msres0 | tmc2208.msres1 | tmc2208.msres2 | tmc2208.msres3)
+        self.microsteps = number_of_steps
+        self.set_mstep_resolution_reg_select(True, writer)
 
-    def set_mstep_resolution_reg_select(self, en):
+    def set_mstep_resolution_reg_select(self, en, writer = None):
         """sets the register bit "mstep_reg_select" to 1 or 0 depending to the given value.
         this is needed to set the microstep resolution via UART
         this method is called by "set_microstepping_resolution"
 
         Args:
             en (bool): true to set µstep resolution via UART
+            writer: TMC_UART (default) or WriteBatch collecting the write
         """
-        gconf = self.tmc_uart.read_int(tmc2208.GCONF)
-
+        writer = writer or self.tmc_uart
+        pdebug(f"writing MStep Reg Select: {en}")
         if en is True:
-            gconf = self.tmc_uart.set_bit(gconf, tmc2208.mstep_reg_select)
+            writer.modify_reg(tmc2208.GCONF, set_mask = tmc2208.mstep_reg_select)
         else:
-            gconf = self.tmc_uart.clear_bit(gconf, tmc2208.mstep_reg_select)
-
-        pdebug(f"writing MStep Reg Select: {en}")
-        self.tmc_uart.write_reg_check(tmc2208.GCONF, gconf)
+            writer.modify_reg(tmc2208.GCONF, clear_mask = tmc2208.mstep_reg_select)
 
     def move(self, steps, rpm):
         self.dir_pin.value = (steps > 0)
         self.steps_to_do = abs(steps)
         self.rpm = rpm
-        if (rpm == 0):
-            self.step_delay_ms = 0
-            self.next_pulse_ms = 0
-        else:
-            self.calculate_step_delay()
-        self.make_step()
-        now = time.monotonic_ns() // 1_000_000
-        self.next_pulse_ms = now + self.step_delay_ms
-        pdebug(f"Starting move at {now}, steps to be done {self.steps_to_do}, next step at {self.next_pulse_ms}")
+        self.calculate_step_delay()
+        self.prepare_profile()
+        now = time.monotonic_ns()
+        self.scheduler.start(now)
+        pdebug(f"Starting move at {now}, steps to be done {self.steps_to_do}")
+        self.check_step(now)
         return "OK"
 
-    def make_step(self):
-        self.step_pin.value = True
-        self.step_pin.value = False
+    def set_acceleration(self, accel, jerk = 0):
+        self.max_accel = accel
+        self.max_jerk = jerk
+        return f"Acceleration set to {accel}, jerk {jerk}"
+
+    def prepare_profile(self):
+        steps_per_second = self.rpm * STEPS_PER_REVOLUTION * self.microsteps // 60
+        if self.max_accel <= 0 or steps_per_second <= 0 or self.steps_to_do < 2:
+            return
+        # an S-curve ramp table is the expensive part, keep it while speed and acceleration stay the same
+        if self.ramp is None or not self.ramp.matches(steps_per_second, self.max_accel, self.max_jerk):
+            self.ramp = Ramp(steps_per_second, self.max_accel, self.max_jerk)
+            pdebug(f"Ramp calculated, {len(self.ramp)} steps to reach {steps_per_second} steps/s")
+        self.scheduler.set_profile(self.ramp, self.steps_to_do)
 
-    def check_step(self):
+    def make_step(self):
+        self.backend.pulse()
+
+    def check_step(self, now = None):
+        """Makes all steps which are due, returns how many were made"""
+        if self.steps_to_do <= 0:
+            return 0
+        if now is None:
+            now = time.monotonic_ns()
+        backend = self.backend
+        if backend.max_burst > 1:
+            count = self.scheduler.burst(now, min(self.steps_to_do, backend.max_burst), backend.window_ns, backend.intervals)
+            if count:
+                backend.send(count)
+        else:
+            count = self.scheduler.due(now, self.steps_to_do)
+            for _ in range(count):
+                backend.pulse()
+        self.steps_to_do -= count
+        return count
+
+    def status(self):
+        """short status for the LCD, from the last telemetry, no UART access"""
         if self.steps_to_do > 0:
-            now = time.monotonic_ns() // 1_000_000
-            if now >= self.next_pulse_ms:
-                #pdebug(f"Making step at {now}")
-                self.make_step()
-                self.next_pulse_ms = now + self.step_delay_ms
-                self.steps_to_do -= 1
+            return "RUN"
+        if self.telemetry is not None:
+            drv_status = self.telemetry.values[telemetry.DRVSTATUS_INDEX]
+            if drv_status & tmc2208.ot:
+                return "OT"
+            if drv_status & tmc2208.otpw:
+                return "OTPW"
+            if drv_status & (tmc2208.s2ga | tmc2208.s2gb | tmc2208.s2vsa | tmc2208.s2vsb):
+                return "SHRT"
+        return "OK"
 
     def run_with_speed(self, speed):
-        self.tmc_uart.write_reg_check(tmc2208.VACTUAL, speed)
+        self.tmc_uart.write_cached(tmc2208.VACTUAL, speed)
         return "OK"
 
     def hold(self, val):
@@ -121,11 +203,21 @@ class Motor:
             self.set_just_current(0, self.irun)
         return f"Motor set to hold {val}"
 
-    def calculate_step_delay(self, steps_per_revolution=200):
+    async def run_with_speed_async(self, speed):
+        await self.tmc_uart.aio.write_cached(tmc2208.VACTUAL, speed)
+        return "OK"
+
+    async def hold_async(self, val):
+        # with aio as writer set_just_current returns the awaitable write
+        if (val == "1"):
+            await self.set_just_current(self.ihold, self.irun, writer = self.tmc_uart.aio)
+        else:
+            await self.set_just_current(0, self.irun, writer = self.tmc_uart.aio)
+        return f"Motor set to hold {val}"
+
+    def calculate_step_delay(self, steps_per_revolution=STEPS_PER_REVOLUTION):
         # Calculate effective steps per revolution with microstepping
         effective_steps_per_revolution = steps_per_revolution * self.microsteps
-        # Calculate steps per second
-        steps_per_second = (self.rpm * effective_steps_per_revolution) / 60
-        # Calculate delay in milliseconds
-        self.step_delay_ms = 1000 / steps_per_second
-        pdebug(f"Step delay calculated to {self.step_delay_ms}, steps per second {steps_per_second}")
+        # rpm 0 means step as fast as the loop goes
+        self.scheduler.set_rate(self.rpm * effective_steps_per_revolution)
+        pdebug(f"Step delay calculated to {self.scheduler.interval_ns} ns, steps per minute {self.rpm * effective_steps_per_revolution}")
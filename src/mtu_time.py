@@ -1,6 +1,9 @@
 import adafruit_ntp
 import rtc
-from log import pdebug
+from log import get_logger
+
+logger = get_logger("mtu_time")
+pdebug = logger.debug
 
 my_tz_offset = +1  # CET
 
@@ -0,0 +1,69 @@
+from binascii import crc32
+
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match header value covers the etag"""
+    if not if_none_match:
+        return False
+    return if_none_match.strip() == "*" or etag in if_none_match
+
+
+class PageCache:
+    """rendered pages as bytes, keyed by route
+
+    A page is rendered by its render function on the first request or after
+    invalidate and then served from memory. The ETag is the CRC32 of the
+    body, so it stays the same across reboots as long as the page does and
+    the browser can revalidate with If-None-Match.
+    """
+    def __init__(self):
+        self.renderers = {}
+        self.bodies = {}
+        self.etags = {}
+        self.renders = 0
+        self.hits = 0
+        self.not_modified = 0
+
+    def add(self, route, render):
+        """render() returns the page as str or bytes"""
+        self.renderers[route] = render
+
+    def invalidate(self, route = None):
+        if route is None:
+            self.bodies.clear()
+            self.etags.clear()
+        else:
+            self.bodies.pop(route, None)
+            self.etags.pop(route, None)
+
+    def get(self, route):
+        """(body, etag) of the route, renders it if not cached"""
+        body = self.bodies.get(route)
+        if body is None:
+            body = self.renderers[route]()
+            if isinstance(body, str):
+                body = body.encode()
+            self.bodies[route] = body
+            self.etags[route] = '"%08x"' % crc32(body)
+            self.renders += 1
+        else:
+            self.hits += 1
+        return body, self.etags[route]
+
+    def is_fresh(self, route, if_none_match):
+        """True when the client copy matches, answer 304 then"""
+        if route not in self.etags:
+            return False
+        if etag_matches(if_none_match, self.etags[route]):
+            self.not_modified += 1
+            return True
+        return False
+
+    def stats(self):
+        return {
+            "pages": len(self.bodies),
+            "bytes": sum(len(body) for body in self.bodies.values()),
+            "renders": self.renders,
+            "hits": self.hits,
+            "not_modified": self.not_modified,
+            }
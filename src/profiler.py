@@ -0,0 +1,97 @@
+import time
+from asyncio import sleep as async_sleep
+import config
+from loop_stats import Histogram
+
+
+class TaskStats:
+    """iteration time and wake-up lag of one task
+
+    An iteration is the time from waking up to the next sleep, lag is how
+    much later than asked the task woke up, i.e. how long other tasks held
+    the loop. Both go into preallocated Histograms.
+    """
+    def __init__(self, name):
+        self.name = name
+        self.iterations = Histogram()
+        self.lag = Histogram()
+        self.started_ns = time.monotonic_ns()
+        # longest wake to wake cycle since take_peak_us, for the websocket telemetry
+        self.peak_ns = 0
+
+    def begin(self):
+        """for tasks not sleeping through sleep(), e.g. waiting on an Event"""
+        self.started_ns = time.monotonic_ns()
+
+    def end(self):
+        self.iterations.add((time.monotonic_ns() - self.started_ns) // 1000)
+
+    async def sleep(self, seconds):
+        """ends the iteration, sleeps and starts the next one"""
+        now = time.monotonic_ns()
+        self.iterations.add((now - self.started_ns) // 1000)
+        wake_ns = now + int(seconds * 1_000_000_000)
+        await async_sleep(seconds)
+        now = time.monotonic_ns()
+        self.lag.add(max(0, now - wake_ns) // 1000)
+        if now - self.started_ns > self.peak_ns:
+            self.peak_ns = now - self.started_ns
+        self.started_ns = now
+
+    def take_peak_us(self):
+        peak_us = self.peak_ns // 1000
+        self.peak_ns = 0
+        return peak_us
+
+    def stats(self):
+        return {"iteration": self.iterations.stats(), "lag": self.lag.stats()}
+
+
+class IdleTaskStats:
+    """stands in for TaskStats when profiling is off, sleep is a plain sleep"""
+    def __init__(self, name):
+        self.name = name
+
+    def begin(self):
+        pass
+
+    def end(self):
+        pass
+
+    async def sleep(self, seconds):
+        await async_sleep(seconds)
+
+    def take_peak_us(self):
+        return 0
+
+    def stats(self):
+        return None
+
+
+class Profiler:
+    """TaskStats per asyncio task, code.py tasks sleep through them"""
+    def __init__(self, enabled = None):
+        self.enabled = config.PROFILER_ENABLED if enabled is None else enabled
+        self.started_ns = time.monotonic_ns()
+        self.tasks = {}
+
+    def task(self, name):
+        stats = self.tasks.get(name)
+        if stats is None:
+            stats = TaskStats(name) if self.enabled else IdleTaskStats(name)
+            self.tasks[name] = stats
+        return stats
+
+    def reset(self):
+        self.started_ns = time.monotonic_ns()
+        for stats in self.tasks.values():
+            if self.enabled:
+                stats.iterations.reset()
+                stats.lag.reset()
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "since_reset_ms": (time.monotonic_ns() - self.started_ns) // 1_000_000,
+            "tasks": {name: stats.stats() for name, stats in self.tasks.items()},
+            }
@@ -1,21 +1,130 @@
-from tools import format_datetime
-import time
+from lcd_frame import LcdFrame
+from asyncio import Event
+import config
 import state
 
+# throttle bar width in characters, value 4095 fills it
+BAR_WIDTH = 14
+
+
+class LcdScreen:
+    """one page of the LCD
+
+    keys lists the MtuState keys the page shows, a change of any of them
+    makes the page render again while it is displayed. compose writes the
+    whole page into the frame, LcdFrame sends only what differs.
+    """
+    keys = ()
+
+    def compose(self, frame, state):
+        raise NotImplementedError
+
+
+class ThrottleScreen(LcdScreen):
+    keys = (state.SK_THROTTLE_1, state.SK_THROTTLE_2)
+
+    def compose(self, frame, mtu_state):
+        frame.write_line(0, "THROTTLE")
+        for line, key in ((1, state.SK_THROTTLE_1), (2, state.SK_THROTTLE_2)):
+            value = mtu_state.get(key, 0)
+            filled = value * BAR_WIDTH // 4095
+            frame.write_line(line, f"{line} {'#' * filled}{'.' * (BAR_WIDTH - filled)} {value * 100 // 4095:3}")
+        frame.clear(y=3)
+
+
+class MotorScreen(LcdScreen):
+    keys = (state.SK_MOTORS,)
+
+    def compose(self, frame, mtu_state):
+        frame.write_line(0, "MOTORS")
+        statuses = mtu_state.get(state.SK_MOTORS, ())
+        # two motors per line, 10 characters each
+        for line in range(1, 4):
+            frame.clear(y=line)
+            for column in range(2):
+                index = (line - 1) * 2 + column
+                if index < len(statuses):
+                    frame.write(column * 10, line, f"{config.MOTOR_NAMES[index]} {statuses[index]}")
+
+
+class NetworkScreen(LcdScreen):
+    keys = (state.SK_IP_ADDRESS, state.SK_CLOCK)
+
+    def compose(self, frame, mtu_state):
+        frame.write_line(0, "IP: " + mtu_state.get(state.SK_IP_ADDRESS, "-"))
+        frame.write_line(1, "       M T U")
+        frame.clear(y=2)
+        frame.write_line(3, mtu_state.get(state.SK_CLOCK, ""))
+
+
 class Screen:
-    def __init__(self, lcd, state):
+    """shows one of the screens, renders only when something it displays changed
+
+    Screens are switched with next/previous (rotary encoder). State changes
+    of keys the current screen does not show cost nothing.
+    """
+    def __init__(self, lcd, mtu_state, busy = None, screens = None):
         self.lcd = lcd
-        self.state = state
-        self.current_screen = "ABOUT"
+        self.frame = LcdFrame(lcd)
+        self.state = mtu_state
+        # returns True while display updates should yield more often, e.g. motors moving
+        self.busy = busy
+        self.screens = screens if screens is not None else [NetworkScreen(), ThrottleScreen(), MotorScreen()]
+        self.current = 0
+        self.dirty = True
+        self.changed = Event()
+        self.changed.set()
+        self.renders = 0
+        # wakes `changed` only for keys of the screen shown
+        self.subscription = mtu_state.subscribe(self.screens[0].keys, self.changed)
+
+    def needs_render(self):
+        return self.dirty or self.subscription.pending()
+
+    def mark_dirty(self):
+        self.dirty = True
+        self.changed.set()
+
+    def show(self, index):
+        index %= len(self.screens)
+        if index != self.current:
+            self.current = index
+            self.subscription.set_keys(self.screens[index].keys)
+            self.mark_dirty()
+
+    def next(self, delta = 1):
+        self.show(self.current + delta)
+
+    def compose(self):
+        self.dirty = False
+        self.changed.clear()
+        self.subscription.acknowledge()
+        self.renders += 1
+        self.screens[self.current].compose(self.frame, self.state)
 
     def render(self):
-        if (self.current_screen == "ABOUT"):
-            return self.render_about()
-
-    def render_about(self):
-        self.lcd.move_to(0,0)
-        self.lcd.write("IP: ")
-        self.lcd.write(self.state.get(state.SK_IP_ADDRESS))
-        self.lcd.move_to(0,3)
-        self.lcd.write(format_datetime(time.localtime()))
-        return 1
+        """renders when dirty, returns True when it did"""
+        if not self.needs_render():
+            return False
+        self.compose()
+        # only what changed since the last render goes over I2C
+        self.frame.flush()
+        return True
+
+    async def wait_dirty(self):
+        while not self.needs_render():
+            self.changed.clear()
+            await self.changed.wait()
+
+    async def render_async(self):
+        """render without blocking the event loop for more than one slice"""
+        if not self.needs_render():
+            return False
+        self.compose()
+        await self.frame.flush_async(self.slice_bytes())
+        return True
+
+    def slice_bytes(self):
+        if self.busy is not None and self.busy():
+            return config.LCD_SLICE_BYTES_MOVING
+        return config.LCD_SLICE_BYTES
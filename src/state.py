@@ -1,13 +1,113 @@
+from array import array
+from asyncio import Event
+
+# keys are slot indexes, KEY_NAMES gives them names for JSON and logs
+SK_IP_ADDRESS = 0
+# date and time to the minute, see code.py state_task
+SK_CLOCK = 1
+# HID axis values 0-4095 of the throttle levers
+SK_THROTTLE_1 = 2
+SK_THROTTLE_2 = 3
+# tuple of short status strings, one per motor (MotionController.status)
+SK_MOTORS = 4
+KEY_NAMES = ("ip", "clock", "thr1", "thr2", "motors")
+
+
+def key_mask(keys):
+    mask = 0
+    for key in keys:
+        mask |= 1 << key
+    return mask
+
+
+class Subscription:
+    """wakes an asyncio Event whenever one of the subscribed keys changes
+
+    version is the store version the subscriber has seen, changes() returns
+    keys changed since then and moves it forward.
+    """
+    def __init__(self, store, keys, event = None):
+        self.store = store
+        self.mask = key_mask(keys)
+        self.event = event if event is not None else Event()
+        self.version = store.version
+
+    def set_keys(self, keys):
+        self.mask = key_mask(keys)
+
+    def pending(self):
+        return self.store.changed_mask(self.version) & self.mask != 0
+
+    def changes(self):
+        keys = self.store.changes_since(self.version, self.mask)
+        self.version = self.store.version
+        return keys
+
+    def acknowledge(self):
+        self.version = self.store.version
+
+    async def wait(self):
+        """returns keys changed since the last call, waits when there are none"""
+        while not self.pending():
+            self.event.clear()
+            await self.event.wait()
+        return self.changes()
+
+    def close(self):
+        self.store.unsubscribe(self)
 
-SK_IP_ADDRESS = "ip"
 
 class MtuState:
+    """values shown on the LCD and elsewhere, versioned per key
+
+    Values live in fixed slots (keys are indexes), every real change bumps
+    the store version and stores it as the key version. Consumers either
+    subscribe (Event woken on change) or ask changes_since(version).
+    """
     def __init__(self):
-        self.data = dict()
+        self.values = [None] * len(KEY_NAMES)
+        self.versions = array("L", [0] * len(KEY_NAMES))
+        self.version = 0
+        self.subscriptions = []
 
-    def get(self, key):
-        return self.data[key]
+    def get(self, key, default = None):
+        value = self.values[key]
+        return default if value is None else value
 
     def put(self, key, value):
-        self.data[key] = value
+        if self.versions[key] and self.values[key] == value:
+            return
+        self.version += 1
+        self.values[key] = value
+        self.versions[key] = self.version
+        bit = 1 << key
+        for subscription in self.subscriptions:
+            if subscription.mask & bit:
+                subscription.event.set()
+
+    def key_version(self, key):
+        return self.versions[key]
+
+    def changed_mask(self, version):
+        mask = 0
+        for key in range(len(KEY_NAMES)):
+            if self.versions[key] > version:
+                mask |= 1 << key
+        return mask
+
+    def changes_since(self, version, mask = -1):
+        """keys changed after version, limited to mask"""
+        return [key for key in range(len(KEY_NAMES)) if self.versions[key] > version and mask & 1 << key]
+
+    def subscribe(self, keys, event = None):
+        subscription = Subscription(self, keys, event)
+        self.subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        if subscription in self.subscriptions:
+            self.subscriptions.remove(subscription)
 
+    def to_dict(self, keys = None):
+        """named values for JSON, all keys or the given ones"""
+        return {KEY_NAMES[key]: self.values[key] for key in (range(len(KEY_NAMES)) if keys is None else keys)}
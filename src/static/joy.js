@@ -11,24 +11,28 @@ const sendJoyCommand = (command) => {
     }); 
 };
 
-const getJoyData = () => { 
+// positions come with the websocket telemetry frames, see decodeTelemetry in scripts.js
+const joyWs = new WebSocket('ws://' + location.host + '/connect-websocket');
+joyWs.binaryType = 'arraybuffer';
+joyWs.onmessage = event => {
+    if (!isTelemetryFrame(event.data)) {
+        // log messages, shown on the log page
+        return;
+    }
+    const data = decodeTelemetry(event.data);
     const buttonConvert = val => (val >>> 0).toString(2).split('').join(' ');
-    fetch('/api/joy', {method: 'GET'})
-    .then(res => {
-        const posElement = document.querySelector("#positions");
-        posElement.innerHTML = '';
-        if (res.ok) {
-            res.json().then(data => {
-                ['x', 'y', 'z', 'rx', 'ry', 'rz', 'buttons'].forEach(k => {
-                    const parent = document.createElement("div");
-                    const val = (k == 'buttons') ? buttonConvert(data[k]) : data[k];
-                    parent.appendChild(document.createTextNode(`${k}: ${val}`));
-                    posElement.appendChild(parent);
-                })
-            });
-        } else {
-            console.console.error(res);
-            posElement.textContent = "API error, see console";
-        }
-    }); 
-};
\ No newline at end of file
+    const posElement = document.querySelector("#positions");
+    posElement.innerHTML = '';
+    ['x', 'y', 'z', 'rx', 'ry', 'rz', 'buttons', 'memFree', 'loopMaxUs'].forEach(k => {
+        const parent = document.createElement("div");
+        const val = (k == 'buttons') ? buttonConvert(data[k]) : data[k];
+        parent.appendChild(document.createTextNode(`${k}: ${val}`));
+        posElement.appendChild(parent);
+    });
+    data.motors.forEach((motor, i) => {
+        const parent = document.createElement("div");
+        parent.appendChild(document.createTextNode(`motor ${i}: ${motor.status} steps ${motor.stepsToDo} rpm ${motor.rpm}`));
+        posElement.appendChild(parent);
+    });
+};
+joyWs.onerror = error => console.log('Web socket error', error);
@@ -1,4 +1,7 @@
-let ws = new WebSocket('ws://' + location.host + '/connect-websocket');
+let ws = new WebSocket('ws://' + location.host + '/connect-websocket?logs=1');
+// logs come as UTF-8 JSON in binary frames, built in a reusable buffer on the device
+ws.binaryType = 'arraybuffer';
+const decoder = new TextDecoder();
 let maxLogNoRendered = 0;
 window.onload = () => {
     const lastLogElement = document.querySelector("#lastLog");
@@ -8,8 +11,12 @@ ws.onopen = () => console.log('WebSocket connection opened');
 ws.onclose = () => console.log('WebSocket connection closed');
 ws.onmessage = event => {
     //console.log('Web socket data', event.data);
+    if (isTelemetryFrame(event.data)) {
+        return;
+    }
     const ulElement = document.querySelector("#logs");
-    const dataAsObject = JSON.parse(event.data)
+    const text = typeof event.data === 'string' ? event.data : decoder.decode(event.data);
+    const dataAsObject = JSON.parse(text)
     Object.keys(dataAsObject.logs)
       .forEach(key => {
         const keyAsNum = Number(key)
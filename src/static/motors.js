@@ -1,9 +1,26 @@
+// init, config, run and hold run as jobs on the device, the POST answers 202 with the job id
+const showJobResult = (res, feedbackElement) => {
+    res.json().then(job => {
+        feedbackElement.textContent = `Job ${job.id} ${job.status}`;
+        const poll = () => fetch(`/api/job/${job.id}`)
+            .then(r => r.json())
+            .then(j => {
+                if (j.status == 'queued' || j.status == 'running') {
+                    setTimeout(poll, 200);
+                } else {
+                    feedbackElement.textContent = typeof j.result === 'string' ? j.result : JSON.stringify(j.result);
+                }
+            });
+        poll();
+    });
+};
+
 const sendMotorInit = (motorIndex) => { 
     fetch(`/api/motor/${motorIndex}/init`, {method: 'POST'})
     .then(res => {
         const feedbackElement = document.querySelector("#data");
         if (res.ok) {
-            res.text().then(t => feedbackElement.textContent = t);
+            showJobResult(res, feedbackElement);
         } else {
             console.console.error(res);
             feedbackElement.textContent = "API error, see console";
@@ -24,13 +41,14 @@ const getMotorData = (motorIndex) => {
     }); 
 };
 
-const sendMotorConfig = (motorIndex, steps, current) => { 
-    console.log(`Sending config for motor ${motorIndex}: steps ${steps}, current ${current}`)
-    fetch(`/api/motor/${motorIndex}/config/?steps=${steps}&current=${current}`, {method: 'POST'})
+const sendMotorConfig = (motorIndex, steps, current, accel) => { 
+    console.log(`Sending config for motor ${motorIndex}: steps ${steps}, current ${current}, accel ${accel}`)
+    const accelParam = accel ? `&accel=${accel}` : '';
+    fetch(`/api/motor/${motorIndex}/config/?steps=${steps}&current=${current}${accelParam}`, {method: 'POST'})
     .then(res => {
         const feedbackElement = document.querySelector("#data");
         if (res.ok) {
-            res.text().then(t => feedbackElement.textContent = t);
+            showJobResult(res, feedbackElement);
         } else {
             console.console.error(res);
             feedbackElement.textContent = "API error, see console";
@@ -59,7 +77,7 @@ const runMotor = (motorIndex, speed) => {
     .then(res => {
         const feedbackElement = document.querySelector("#data");
         if (res.ok) {
-            res.text().then(t => feedbackElement.textContent = t);
+            showJobResult(res, feedbackElement);
         } else {
             console.console.error(res);
             feedbackElement.textContent = "API error, see console";
@@ -73,7 +91,7 @@ const sendMotorHold = (motorIndex, val) => {
     .then(res => {
         const feedbackElement = document.querySelector("#data");
         if (res.ok) {
-            res.text().then(t => feedbackElement.textContent = t);
+            showJobResult(res, feedbackElement);
         } else {
             console.console.error(res);
             feedbackElement.textContent = "API error, see console";
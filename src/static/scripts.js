@@ -0,0 +1,35 @@
+// websocket telemetry frame packed by ws_telemetry.py, little endian
+const FRAME_TELEMETRY = 0x01;
+const TELEMETRY_HEADER_SIZE = 28;
+const TELEMETRY_MOTOR_SIZE = 8;
+const MOTOR_STATUSES = ['OK', 'RUN', 'OTPW', 'OT', 'SHRT'];
+
+const isTelemetryFrame = buffer => buffer instanceof ArrayBuffer && buffer.byteLength > 0 && new Uint8Array(buffer)[0] === FRAME_TELEMETRY;
+
+const decodeTelemetry = buffer => {
+    const view = new DataView(buffer);
+    const motorCount = view.getUint8(1);
+    const data = {
+        sequence: view.getUint16(2, true),
+        uptimeMs: view.getUint32(4, true),
+        buttons: view.getUint16(8, true),
+        x: view.getUint16(10, true),
+        y: view.getUint16(12, true),
+        z: view.getUint16(14, true),
+        rx: view.getUint16(16, true),
+        ry: view.getUint16(18, true),
+        rz: view.getUint16(20, true),
+        memFree: view.getUint32(22, true),
+        loopMaxUs: view.getUint16(26, true),
+        motors: [],
+    };
+    for (let i = 0; i < motorCount; i++) {
+        const offset = TELEMETRY_HEADER_SIZE + i * TELEMETRY_MOTOR_SIZE;
+        data.motors.push({
+            stepsToDo: view.getUint32(offset, true),
+            rpm: view.getUint16(offset + 4, true),
+            status: MOTOR_STATUSES[view.getUint8(offset + 6)],
+        });
+    }
+    return data;
+};
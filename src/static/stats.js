@@ -0,0 +1,47 @@
+// task iteration and wake-up lag statistics from /api/stats, refreshed every 2 s
+const statsColumns = ['count', 'min_us', 'mean_us', 'p50_us', 'p90_us', 'p99_us', 'max_us'];
+
+const statsRow = (cells, tag) => {
+    const tr = document.createElement("tr");
+    cells.forEach(c => {
+        const td = document.createElement(tag);
+        td.appendChild(document.createTextNode(c));
+        tr.appendChild(td);
+    });
+    return tr;
+};
+
+const getStats = (reset) => {
+    fetch('/api/stats' + (reset ? '?reset=1' : ''), {method: 'GET'})
+    .then(res => {
+        const feedbackElement = document.querySelector("#feedback");
+        if (res.ok) {
+            res.json().then(data => {
+                const table = document.querySelector("#stats");
+                table.innerHTML = '';
+                table.appendChild(statsRow(['task', 'what'].concat(statsColumns), 'th'));
+                Object.keys(data.profiler.tasks).forEach(task => {
+                    const taskStats = data.profiler.tasks[task];
+                    if (!taskStats) {
+                        return;
+                    }
+                    ['iteration', 'lag'].forEach(what => {
+                        table.appendChild(statsRow([task, what].concat(statsColumns.map(c => taskStats[what][c])), 'td'));
+                    });
+                });
+                ['http_poll'].forEach(name => {
+                    table.appendChild(statsRow([name, 'time'].concat(statsColumns.map(c => data[name][c])), 'td'));
+                });
+                document.querySelector("#other").textContent = JSON.stringify(
+                    {memory: data.memory, since_reset_ms: data.profiler.since_reset_ms, websocket: data.websocket, jobs: data.jobs}, null, 1);
+                feedbackElement.textContent = data.profiler.enabled ? '' : 'Profiler disabled in config';
+            });
+        } else {
+            console.error(res);
+            feedbackElement.textContent = "API error, see console";
+        }
+    });
+};
+
+window.onload = () => getStats(false);
+setInterval(() => getStats(false), 2000);
@@ -0,0 +1,71 @@
+import os
+from adafruit_httpserver import Route, Response, FileResponse, GET, MIMETypes, Status
+import config
+from page_cache import etag_matches
+
+NOT_MODIFIED_304 = Status(304, "Not Modified")
+# served through StaticFiles, anything else falls back to the server root_path handling
+EXTENSIONS = (".css", ".js")
+GZIP_SUFFIX = ".gz"
+
+
+def file_info(path):
+    """(etag, size), the etag is size and modification time and changes when the file is uploaded again"""
+    stat = os.stat(path)
+    return '"%x-%x"' % (stat[6], stat[8]), stat[6]
+
+
+class StaticFiles:
+    """css and js from root with gzip variants, ETag and Cache-Control
+
+    tools/pack_static.py writes <name>.gz next to each file. A client
+    sending Accept-Encoding: gzip gets the .gz variant with
+    Content-Encoding: gzip, others the original. Files are listed and
+    stat'ed once at start, upload new files and reset the board.
+    """
+    def __init__(self, server, root, max_age = None):
+        if max_age is None:
+            max_age = config.STATIC_MAX_AGE
+        self.root = root
+        self.cache_control = f"max-age={max_age}"
+        # name -> (etag, size) of the original and of the .gz variant or None
+        self.files = {}
+        self.bytes = 0
+        self.gzip_bytes = 0
+        self.not_modified = 0
+        names = os.listdir(root)
+        for name in names:
+            if not any(name.endswith(extension) for extension in EXTENSIONS):
+                continue
+            gz_info = file_info(f"{root}/{name}{GZIP_SUFFIX}") if name + GZIP_SUFFIX in names else None
+            self.files[name] = (file_info(f"{root}/{name}"), gz_info)
+        server.add_routes([Route(f"/{name}", GET, self.serve) for name in self.files])
+
+    def serve(self, request):
+        name = request.path[1:]
+        info, gz_info = self.files[name]
+        gzip = gz_info is not None and "gzip" in (request.headers.get("Accept-Encoding") or "")
+        headers = {"Cache-Control": self.cache_control, "Vary": "Accept-Encoding"}
+        if gzip:
+            info = gz_info
+            headers["Content-Encoding"] = "gzip"
+        etag, size = info
+        headers["ETag"] = etag
+        if etag_matches(request.headers.get("If-None-Match"), etag):
+            self.not_modified += 1
+            return Response(request, b"", headers=headers, status=NOT_MODIFIED_304)
+        content_type = MIMETypes.get_for_filename(name)
+        if gzip:
+            self.gzip_bytes += size
+            return FileResponse(request, name + GZIP_SUFFIX, self.root, headers=headers, content_type=content_type)
+        self.bytes += size
+        return FileResponse(request, name, self.root, headers=headers, content_type=content_type)
+
+    def stats(self):
+        return {
+            "files": len(self.files),
+            "gzip": sum(1 for _, gz_info in self.files.values() if gz_info is not None),
+            "bytes": self.bytes,
+            "gzip_bytes": self.gzip_bytes,
+            "not_modified": self.not_modified,
+            }
@@ -0,0 +1,89 @@
+from array import array
+import digitalio
+from log import get_logger
+
+logger = get_logger("step_backend")
+pdebug = logger.debug
+
+# high time of a step pulse, TMC2208 needs at least 100 ns
+STEP_PULSE_US = 2
+DEFAULT_MAX_BURST = 32
+# how far ahead a burst backend may take pulses, PulseOut.send blocks for the whole burst
+DEFAULT_BURST_WINDOW_NS = 2_000_000
+
+class StepBackend:
+    """Emits step pulses for a Motor.
+
+    Backends with max_burst 1 are driven pulse by pulse through pulse().
+    Burst backends get whole pulse trains: Motor fills `intervals` (ns between
+    consecutive pulses) for pulses due within window_ns and calls send(count).
+    """
+    max_burst = 1
+    window_ns = 0
+
+    def pulse(self):
+        raise NotImplementedError
+
+    def send(self, count):
+        raise NotImplementedError
+
+    def deinit(self):
+        pass
+
+
+class BitBangStepBackend(StepBackend):
+    """Toggles the step pin from Python, timing is as good as the loop is"""
+    def __init__(self, pin):
+        self.pin = digitalio.DigitalInOut(pin)
+        self.pin.direction = digitalio.Direction.OUTPUT
+
+    def pulse(self):
+        self.pin.value = True
+        self.pin.value = False
+
+    def deinit(self):
+        self.pin.deinit()
+
+
+class PulseOutStepBackend(StepBackend):
+    """Hardware timed pulse trains through pulseio.PulseOut (RMT on ESP32).
+
+    The whole burst is timed by the peripheral, so HTTP polling or LCD stalls
+    cannot move pulses inside it. PulseOut.send returns when the train is out,
+    which is why bursts are limited by window_ns.
+    """
+    def __init__(self, pin, max_burst=DEFAULT_MAX_BURST, window_ns=DEFAULT_BURST_WINDOW_NS):
+        import pulseio
+        # 100% duty carrier keeps the output steady high during "on" periods
+        self.out = pulseio.PulseOut(pin, frequency=1_000_000, duty_cycle=0xFFFF)
+        self.max_burst = max_burst
+        self.window_ns = window_ns
+        self.intervals = array("L", [0] * max_burst)
+        # on/off durations in us: high, low, high, low, ..., high
+        self.durations = array("H", [0] * (2 * max_burst - 1))
+
+    def pulse(self):
+        self.durations[0] = STEP_PULSE_US
+        self.out.send(memoryview(self.durations)[:1])
+
+    def send(self, count):
+        durations = self.durations
+        for i in range(count - 1):
+            low = self.intervals[i] // 1000 - STEP_PULSE_US
+            durations[2 * i] = STEP_PULSE_US
+            durations[2 * i + 1] = min(0xFFFF, max(STEP_PULSE_US, low))
+        durations[2 * count - 2] = STEP_PULSE_US
+        self.out.send(memoryview(durations)[:2 * count - 1])
+
+    def deinit(self):
+        self.out.deinit()
+
+
+def create_backend(kind, pin):
+    """Returns backend for config.STEP_BACKEND, falls back to bit-bang when hardware timing is not available"""
+    if kind == "pulseout":
+        try:
+            return PulseOutStepBackend(pin)
+        except (ImportError, ValueError, RuntimeError) as e:
+            pdebug("PulseOut step backend not available, using bit-bang:", e)
+    return BitBangStepBackend(pin)
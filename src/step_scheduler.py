@@ -0,0 +1,191 @@
+NS_PER_MINUTE = 60_000_000_000
+# how many overdue pulses a single check may emit before the schedule is rebased
+DEFAULT_MAX_CATCHUP = 4
+
+class StepScheduler:
+    """Keeps step deadlines with nanosecond resolution.
+
+    Each deadline is computed from the previous ideal deadline, not from the time
+    the pulse was really made, so loop latency does not turn into drift. The part
+    of the step period below one nanosecond is carried in an accumulator.
+    """
+    def __init__(self, max_catchup=DEFAULT_MAX_CATCHUP):
+        self.max_catchup = max_catchup
+        self.interval_ns = 0
+        self.remainder = 0
+        self.divisor = 1
+        self.fraction = 0
+        self.next_pulse_ns = 0
+        self.resyncs = 0
+        # acceleration profile, see set_profile
+        self.profiled = False
+        self.ramp = None
+        self.ramp_steps = 0
+        self.ramp_shift = 0
+        self.shortest_ns = 0
+        self.step_index = 0
+        self.accel_steps = 0
+        self.decel_start = 0
+        # AVR446 recurrence state: interval c (ns) after pulse ramp_index, division remainder carried in rest
+        self.first_ns = 0
+        self.c0_ns = 0
+        self.ramp_index = -1
+        self.c = 0
+        self.rest = 0
+        self.ramp_ns = 0
+
+    def set_rate(self, steps_per_minute):
+        """Sets constant step rate, 0 means one step per check (as fast as the loop goes)."""
+        steps_per_minute = int(steps_per_minute)
+        if steps_per_minute <= 0:
+            self.interval_ns, self.remainder, self.divisor = 0, 0, 1
+        else:
+            self.interval_ns, self.remainder = divmod(NS_PER_MINUTE, steps_per_minute)
+            self.divisor = steps_per_minute
+        self.fraction = 0
+        self.profiled = False
+
+    def set_profile(self, ramp, total_steps):
+        """Uses ramp (motion_profile.Ramp) to accelerate and decelerate a move of total_steps.
+
+        Must be called after set_rate, which gives the cruise rate. Short moves which
+        cannot reach cruise rate turn into a triangle using the first half of the ramp.
+        """
+        self.profiled = True
+        self.ramp = ramp.intervals
+        self.ramp_steps = len(ramp)
+        self.ramp_shift = ramp.shift
+        self.shortest_ns = ramp.shortest_ns
+        self.first_ns = ramp.first_ns
+        self.c0_ns = ramp.c0_ns
+        intervals = total_steps - 1
+        self.accel_steps = min(self.ramp_steps, intervals // 2)
+        self.decel_start = intervals - self.accel_steps
+        self.step_index = 0
+        self.ramp_index = -1
+
+    def start(self, now_ns):
+        self.next_pulse_ns = now_ns
+        self.fraction = 0
+        self.step_index = 0
+        self.ramp_index = -1
+
+    def ramp_interval(self, i):
+        """Interval after pulse i of a profiled move, 0 while cruising"""
+        if self.ramp is None:
+            return self.recurrence_interval(i)
+        shift = self.ramp_shift
+        if i < self.accel_steps:
+            return self.ramp[i >> shift]
+        if i >= self.decel_start:
+            return self.ramp[max(0, self.decel_start + self.accel_steps - 1 - i) >> shift]
+        if self.accel_steps < self.ramp_steps:
+            # peak of a triangle move
+            return self.ramp[self.accel_steps >> shift]
+        return 0
+
+    def recurrence_interval(self, i):
+        """ramp_interval of a trapezoid, i goes up by one per call (asking for the same i again is fine)
+
+        Accelerating, c(n) = c(n-1) - 2 c(n-1) / (4n + 1) with n = i. Decelerating
+        runs it backwards, c(n-1) = c(n) + 2 c(n) / (4n - 1), n counting down to 0.
+        """
+        if i == self.ramp_index:
+            return self.ramp_ns
+        self.ramp_index = i
+        c = self.c
+        # ramp index n of the interval, the first one is exact instead of c0
+        n = -1
+        if i < self.accel_steps:
+            n = i
+            if i == 0:
+                c = self.c0_ns
+                self.rest = 0
+            else:
+                divisor = 4 * i + 1
+                numerator = 2 * c + self.rest
+                step = numerator // divisor
+                self.rest = numerator - step * divisor
+                c -= step
+            self.c = c
+        elif i >= self.decel_start:
+            # mirrored, c holds the interval of n + 1 (or of n at the first decelerating pulse)
+            n = self.decel_start + self.accel_steps - 1 - i
+            if i > self.decel_start and n > 0:
+                divisor = 4 * n + 3
+                numerator = 2 * c + self.rest
+                step = numerator // divisor
+                self.rest = numerator - step * divisor
+                c += step
+                self.c = c
+        elif self.accel_steps < self.ramp_steps:
+            # peak of a triangle move, one step past the acceleration, c stays for the way down
+            n = self.accel_steps
+            c -= (2 * c + self.rest) // (4 * n + 1)
+        else:
+            self.ramp_ns = 0
+            return 0
+        if n <= 0:
+            c = self.first_ns
+        elif c < self.shortest_ns:
+            c = self.shortest_ns
+        self.ramp_ns = c
+        return c
+
+    def advance(self):
+        if self.profiled:
+            interval = self.ramp_interval(self.step_index)
+            self.step_index += 1
+            if interval:
+                self.next_pulse_ns += interval
+                return
+        self.next_pulse_ns += self.interval_ns
+        self.fraction += self.remainder
+        if self.fraction >= self.divisor:
+            self.fraction -= self.divisor
+            self.next_pulse_ns += 1
+
+    def due(self, now_ns, limit):
+        """Returns number of pulses due at now_ns (at most limit) and moves the schedule past them.
+
+        When more than max_catchup pulses are overdue the backlog is dropped and the
+        schedule restarts from now_ns, so a long loop stall does not end in a burst
+        the motor cannot follow.
+        """
+        if now_ns < self.next_pulse_ns or limit <= 0:
+            return 0
+        if self.interval_ns == 0:
+            self.next_pulse_ns = now_ns
+            return 1
+        cap = min(limit, self.max_catchup)
+        count = 0
+        while count < cap and now_ns >= self.next_pulse_ns:
+            self.advance()
+            count += 1
+        if count == self.max_catchup and now_ns >= self.next_pulse_ns:
+            # as if the last pulse was due now, advance takes the next step's interval like after any pulse
+            self.next_pulse_ns = now_ns
+            self.advance()
+            self.resyncs += 1
+        return count
+
+    def burst(self, now_ns, limit, window_ns, intervals):
+        """Plans a pulse train for a burst backend, returns number of pulses in it.
+
+        Overdue pulses (see due) go out back to back, followed by pulses whose
+        deadline falls within window_ns. intervals[i] receives ns between pulse i
+        and pulse i+1 of the train, the first pulse is sent at now_ns.
+        """
+        count = self.due(now_ns, limit)
+        if count == 0:
+            return 0
+        for i in range(count - 1):
+            intervals[i] = 0
+        last = now_ns
+        horizon = now_ns + window_ns
+        while count < limit and self.next_pulse_ns <= horizon:
+            intervals[count - 1] = self.next_pulse_ns - last
+            last = self.next_pulse_ns
+            self.advance()
+            count += 1
+        return count
@@ -0,0 +1,188 @@
+import struct
+import time
+from array import array
+from asyncio import sleep as async_sleep
+import config
+import tmc2208
+from log import get_logger
+
+logger = get_logger("telemetry")
+pdebug = logger.debug
+
+# order of values in snapshots and history
+REGISTERS = (tmc2208.DRVSTATUS, tmc2208.TSTEP, tmc2208.MSCNT, tmc2208.GSTAT)
+REGISTER_NAMES = ("DRVSTATUS", "TSTEP", "MSCNT", "GSTAT")
+DRVSTATUS_INDEX, TSTEP_INDEX, MSCNT_INDEX, GSTAT_INDEX = range(len(REGISTERS))
+
+DRVSTATUS_FLAGS = (
+    ("stst", tmc2208.stst),
+    ("stealth", tmc2208.stealth),
+    ("t157", tmc2208.t157),
+    ("t150", tmc2208.t150),
+    ("t143", tmc2208.t143),
+    ("t120", tmc2208.t120),
+    ("olb", tmc2208.olb),
+    ("ola", tmc2208.ola),
+    ("s2vsb", tmc2208.s2vsb),
+    ("s2vsa", tmc2208.s2vsa),
+    ("s2gb", tmc2208.s2gb),
+    ("s2ga", tmc2208.s2ga),
+    ("ot", tmc2208.ot),
+    ("otpw", tmc2208.otpw),
+)
+
+GSTAT_FLAGS = (
+    ("reset", tmc2208.reset),
+    ("drv_err", tmc2208.drv_err),
+    ("uv_cp", tmc2208.uv_cp),
+)
+
+
+def decode_flags(val, flags):
+    return {name: val & mask != 0 for name, mask in flags}
+
+
+def decode_drvstatus(val):
+    data = decode_flags(val, DRVSTATUS_FLAGS)
+    data["cs_actual"] = (val & tmc2208.cs_actual) >> 16
+    return data
+
+
+class MotorTelemetry:
+    """latest register values of one driver and a ring of complete samples
+
+    All storage is preallocated, a poll only writes into the arrays.
+    Decoding into dicts happens in snapshot/history, i.e. when someone asks.
+    """
+    def __init__(self, history_len):
+        self.values = array("L", [0] * len(REGISTERS))
+        self.updated_ms = array("L", [0] * len(REGISTERS))
+        self.valid = 0          # bit per register, set after the first good read
+        self.errors = 0
+        self.samples = 0
+        self.history_len = history_len
+        self.history = array("L", [0] * (history_len * len(REGISTERS)))
+        self.history_ms = array("L", [0] * history_len)
+        self.history_next = 0
+
+    def store(self, index, val, now_ms):
+        self.values[index] = val
+        self.updated_ms[index] = now_ms
+        self.valid |= 1 << index
+
+    def push_history(self, now_ms):
+        """copies current values as one sample into the ring"""
+        slot = self.history_next
+        base = slot * len(REGISTERS)
+        for i in range(len(REGISTERS)):
+            self.history[base + i] = self.values[i]
+        self.history_ms[slot] = now_ms
+        self.history_next = (slot + 1) % self.history_len
+        self.samples += 1
+
+    def snapshot(self):
+        if not self.valid:
+            return None
+        values = self.values
+        data = {
+            "age_ms": ticks_ms() - max(self.updated_ms),
+            "errors": self.errors,
+            "samples": self.samples,
+            "TSTEP": values[TSTEP_INDEX],
+            "MSCNT": values[MSCNT_INDEX],
+            "DRVSTATUS": decode_drvstatus(values[DRVSTATUS_INDEX]),
+            "GSTAT": decode_flags(values[GSTAT_INDEX], GSTAT_FLAGS),
+            }
+        return data
+
+    def history_items(self):
+        """samples oldest first as lists [ms, DRVSTATUS, TSTEP, MSCNT, GSTAT]"""
+        count = min(self.samples, self.history_len)
+        start = (self.history_next - count) % self.history_len
+        items = []
+        for n in range(count):
+            slot = (start + n) % self.history_len
+            base = slot * len(REGISTERS)
+            items.append([self.history_ms[slot]] + list(self.history[base:base + len(REGISTERS)]))
+        return items
+
+
+def ticks_ms():
+    return time.monotonic_ns() // 1_000_000 & 0xFFFFFFFF
+
+
+class TelemetryPoller:
+    """low priority asyncio task reading driver status registers round-robin
+
+    One register of one driver per read_interval, so the UART load is
+    reads_per_second whatever the number of motors. A round reads all
+    registers of one driver before going to the next, so a MuxedTmcBus
+    selects each driver once per round. Motors sharing a TMC_UART (no mux)
+    share the telemetry as well. A failed read is not retried, the old
+    value stays and the next round reads it again.
+    """
+    def __init__(self, tmcs, reads_per_second=None, history_len=None):
+        if reads_per_second is None:
+            reads_per_second = config.TELEMETRY_READS_PER_SECOND
+        if history_len is None:
+            history_len = config.TELEMETRY_HISTORY
+        self.tmcs = []
+        self.telemetry = []
+        self.by_motor = []
+        for tmc in tmcs:
+            if tmc not in self.tmcs:
+                self.tmcs.append(tmc)
+                self.telemetry.append(MotorTelemetry(history_len))
+            self.by_motor.append(self.telemetry[self.tmcs.index(tmc)])
+        self.read_interval = 1 / reads_per_second
+        self.reads = 0
+
+    def motor(self, index):
+        return self.by_motor[index]
+
+    async def read(self, tmc, register):
+        """one unchecked read without retries and logging, returns None on failure"""
+        count = await tmc.aio.read_reg(register)
+        error = tmc.check_response(count)
+        tmc.record_read(error is None)
+        if error is not None:
+            return None
+        return struct.unpack_from(">I", tmc.r_buf, 7)[0]
+
+    async def poll(self, driver, index):
+        tmc = self.tmcs[driver]
+        telemetry = self.telemetry[driver]
+        val = await self.read(tmc, REGISTERS[index])
+        self.reads += 1
+        if val is None:
+            telemetry.errors += 1
+            return
+        if index == GSTAT_INDEX and val & tmc2208.reset and not telemetry.values[GSTAT_INDEX] & tmc2208.reset:
+            # registers are at power-on values, motor needs init
+            pdebug("Driver reset detected on channel", tmc.channel)
+            tmc.shadow.invalidate()
+        telemetry.store(index, val, ticks_ms())
+
+    async def run(self, stats = None):
+        """polls forever, sleeps through stats (profiler TaskStats) when given
+
+        An iteration is one register read, including the yields inside the
+        async UART transaction.
+        """
+        sleep = async_sleep if stats is None else stats.sleep
+        while True:
+            for driver in range(len(self.tmcs)):
+                for index in range(len(REGISTERS)):
+                    started = time.monotonic_ns()
+                    await self.poll(driver, index)
+                    elapsed = (time.monotonic_ns() - started) / 1_000_000_000
+                    await sleep(max(0, self.read_interval - elapsed))
+            now_ms = ticks_ms()
+            for telemetry in self.telemetry:
+                telemetry.push_history(now_ms)
+
+    def stats(self):
+        return {
+            "reads": self.reads,
+            "read_interval_ms": int(self.read_interval * 1000),
+            }
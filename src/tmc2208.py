@@ -7,8 +7,13 @@ TMC_UART stepper driver uart module
 import time
 import struct
 import busio
+from asyncio import Lock, sleep as async_sleep
 import config
-from log import pdebug, perror
+from log import get_logger
+
+logger = get_logger("tmc2208")
+pdebug = logger.debug
+perror = logger.error
 
 #pylint: disable=invalid-name
 """
@@ -105,6 +110,152 @@ mres_4 = 6
 mres_2 = 7
 mres_1 = 8
 
+# reply to a read request: 4 bytes echo of the request (single wire) + 8 bytes datagram
+READ_RESPONSE_LEN = 12
+
+def _crc8_tables():
+    """CRC8-ATM (poly 0x07) as used by TMC. Data bits enter LSB first, so the table
+    is indexed by crc ^ bit reversed byte."""
+    table = bytearray(256)
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table[i] = crc
+    reverse = bytearray(256)
+    for i in range(256):
+        reverse[i] = int("{:08b}".format(i)[::-1], 2)
+    return bytes(table), bytes(reverse)
+
+CRC8_TABLE, BIT_REVERSE = _crc8_tables()
+
+# continuous tuning of pause and read timeout, see TMC_UART.record_read
+TUNE_WINDOW = 100               # reads per tuning decision
+TUNE_MAX_ERRORS = 2             # more failed reads in a window slow the link down
+TUNE_MAX_FACTOR = 4             # pause and timeout stay below calibrated values times this (at least defaults)
+PAUSE_FLOOR_BITS = 10           # pause never below one byte time, tuning could not raise a pause of 0
+
+# registers kept in RegisterShadow, IHOLD_IRUN and VACTUAL are write only on TMC2208
+SHADOWED_REGISTERS = (GCONF, IHOLD_IRUN, CHOPCONF, VACTUAL, TCOOLTHRS, SGTHRS)
+WRITE_ONLY_REGISTERS = (IHOLD_IRUN, VACTUAL)
+
+class RegisterShadow:
+    """last known values of the writable registers of one driver
+
+    Filled by verified writes and by reads, dropped when the driver reports
+    a reset in GSTAT (registers are back at their power-on values then).
+    """
+    def __init__(self):
+        self.values = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, register):
+        val = self.values.get(register)
+        if val is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return val
+
+    def put(self, register, val):
+        if register in SHADOWED_REGISTERS:
+            self.values[register] = val
+
+    def forget(self, register):
+        self.values.pop(register, None)
+
+    def invalidate(self):
+        self.values.clear()
+        self.invalidations += 1
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            }
+
+class WriteBatch:
+    """register writes verified together by a single IFCNT check
+
+    Offers write_cached and modify_reg like TMC_UART, but only queues the
+    writes. They are sent back to back when the with block ends:
+
+        with tmc_uart.batch() as batch:
+            batch.write_cached(IHOLD_IRUN, 0x0101)
+            batch.modify_reg(GCONF, set_mask=mstep_reg_select)
+        if not batch.ok: ...
+    """
+    def __init__(self, tmc_uart):
+        self.tmc_uart = tmc_uart
+        self.registers = []
+        self.values = []
+        self.ok = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.ok = self.tmc_uart.write_batch(self.registers, self.values)
+        return False
+
+    def queued_value(self, register):
+        if register in self.registers:
+            return self.values[self.registers.index(register)]
+        return self.tmc_uart.read_cached(register)
+
+    def write_cached(self, register, val):
+        if register in self.registers:
+            self.values[self.registers.index(register)] = val
+        elif self.tmc_uart.shadow.get(register) != val:
+            self.registers.append(register)
+            self.values.append(val)
+        return True
+
+    def modify_reg(self, register, set_mask=0, clear_mask=0):
+        val = self.queued_value(register)
+        if val is None or val == -1:
+            perror(f"Cannot modify reg {hex(register)}, current value unknown")
+            return False
+        return self.write_cached(register, (val & ~clear_mask) | set_mask)
+
+
+class AsyncWriteBatch(WriteBatch):
+    """WriteBatch for AsyncTMC_UART, the writes go out when the async with block ends
+
+        async with tmc_uart.aio.batch() as batch:
+            await batch.load(GCONF)
+            batch.modify_reg(GCONF, set_mask=mstep_reg_select)
+        if not batch.ok: ...
+
+    modify_reg only looks at the shadow, registers it changes have to be
+    loaded first, load reads those missing in the shadow without blocking.
+    """
+    def __init__(self, aio):
+        super().__init__(aio.tmc)
+        self.aio = aio
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.ok = await self.aio.write_batch(self.registers, self.values)
+        return False
+
+    async def load(self, *registers):
+        for register in registers:
+            await self.aio.read_cached(register)
+
+    def queued_value(self, register):
+        if register in self.registers:
+            return self.values[self.registers.index(register)]
+        return self.tmc_uart.shadow.get(register)
+
+
 class TMC_UART:
     """TMC_UART
 
@@ -114,15 +265,13 @@ class TMC_UART:
     """
     mtr_id = 0
     ser = None
-    r_frame  = bytearray([0x55, 0, 0, 0  ]) # sync, 0, addr, crc
-    w_frame  = bytearray([0x55, 0, 0, 0 , 0, 0, 0, 0 ]) # sync, 0, addr, 4xdata, crc
     communication_pause = 0
     error_handler_running = False
 
 
 
     def __init__(self,
-                 baudrate, mtr_id = 0
+                 baudrate, mtr_id = 0, bus = None, channel = 0
                  ):
         """constructor
 
@@ -131,9 +280,16 @@ class TMC_UART:
             serialport (string): serialport path
             baudrate (int): baudrate
             mtr_id (int, optional): driver address [0-3]. Defaults to 0.
+            bus (MuxedTmcBus, optional): shared multiplexed UART, this instance is then a handle for one channel
+            channel (int, optional): mux channel of the driver when bus is given
         """
+        self.bus = bus
+        self.channel = channel
         try:
-            self.ser = busio.UART(config.UART_TX, config.UART_RX, baudrate=baudrate)
+            if bus is not None:
+                self.ser = bus.ser
+            else:
+                self.ser = busio.UART(config.UART_TX, config.UART_RX, baudrate=baudrate)
         except Exception as e:
             errnum = e.args[0]
             pdebug(f"SERIAL ERROR: {e}")
@@ -146,10 +302,32 @@ class TMC_UART:
                                     with \"sudo usermod -a -G dialout pi\"""")
 
         self.mtr_id = mtr_id
+        self.baudrate = baudrate
+        # frames and receive buffer are reused by every transaction
+        self.r_frame = bytearray([0x55, 0, 0, 0]) # sync, 0, addr, crc
+        self.w_frame = bytearray([0x55, 0, 0, 0, 0, 0, 0, 0]) # sync, 0, addr, 4xdata, crc
+        self.r_buf = bytearray(READ_RESPONSE_LEN)
+        self.shadow = RegisterShadow()
+        # longest blocking transaction, the whole event loop stands still meanwhile
+        self.max_transaction_ns = 0
+        # awaitable variant of the transactions, for asyncio tasks
+        self.aio = AsyncTMC_UART(self)
         # adjust per baud and hardware. Sequential reads without some delay fail.
         self.communication_pause = 500 / baudrate
-
-        if self.ser is None:
+        self.read_timeout = 20000/baudrate
+        self.pause_floor = PAUSE_FLOOR_BITS / baudrate
+        # calibration (see tmc_calibration) lowers the floors, tuning moves between floor and max
+        self.min_pause = self.communication_pause
+        self.min_timeout = self.read_timeout
+        self.max_pause = self.communication_pause
+        self.max_timeout = self.read_timeout
+        self.reads = 0
+        self.read_errors = 0
+        self.window_reads = 0
+        self.window_errors = 0
+        self.tunings = 0
+
+        if self.ser is None or bus is not None:
             return
 
         #self.ser.BYTESIZES = 1
@@ -157,7 +335,7 @@ class TMC_UART:
         #self.ser.STOPBITS = 1
 
         # adjust per baud and hardware. Sequential reads without some delay fail.
-        self.ser.timeout = 20000/baudrate
+        self.ser.timeout = self.read_timeout
 
         #self.ser.reset_output_buffer()
         self.ser.reset_input_buffer()
@@ -166,66 +344,166 @@ class TMC_UART:
 
     def __del__(self):
         """""destructor"""""
-        if self.ser is not None:
+        # a bus handle does not own the shared serial port
+        if self.ser is not None and self.bus is None:
             self.ser.deinit()
 
 
 
-    def compute_crc8_atm(self, datagram, initial_value=0):
+    def compute_crc8_atm(self, datagram, initial_value=0, start=0, end=None):
         """this function calculates the crc8 parity bit
 
         Args:
-            datagram (list): datagram
+            datagram (bytearray): datagram
             initial_value (int): initial value (Default value = 0)
+            start (int): index of first byte (Default value = 0)
+            end (int): index after last byte (Default value = len(datagram))
         """
+        if end is None:
+            end = len(datagram)
         crc = initial_value
-        # Iterate bytes in data
-        for byte in datagram:
-            # Iterate bits in byte
-            for _ in range(0, 8):
-                if (crc >> 7) ^ (byte & 0x01):
-                    crc = ((crc << 1) ^ 0x07) & 0xFF
-                else:
-                    crc = (crc << 1) & 0xFF
-                # Shift to next bit
-                byte = byte >> 1
+        table = CRC8_TABLE
+        reverse = BIT_REVERSE
+        for i in range(start, end):
+            crc = table[crc ^ reverse[datagram[i]]]
         return crc
 
 
 
+    def select(self):
+        """switches the shared multiplexed UART to this driver"""
+        if self.bus is not None:
+            self.bus.select(self.channel)
+
+
+
+    def prepare_read_frame(self, register):
+        self.r_frame[1] = self.mtr_id
+        self.r_frame[2] = register
+        self.r_frame[3] = self.compute_crc8_atm(self.r_frame, 0, 0, 3)
+
+
+
+    def prepare_write_frame(self, register, val):
+        self.w_frame[1] = self.mtr_id
+        self.w_frame[2] =  register | 0x80  # set write bit
+
+        self.w_frame[3] = 0xFF & (val>>24)
+        self.w_frame[4] = 0xFF & (val>>16)
+        self.w_frame[5] = 0xFF & (val>>8)
+        self.w_frame[6] = 0xFF & val
+
+        self.w_frame[7] = self.compute_crc8_atm(self.w_frame, 0, 0, 7)
+
+
+
+    def check_response(self, count):
+        """validates the read response in r_buf without allocating
+
+        Args:
+            count (int): number of bytes received into r_buf
+
+        Returns None when the response is fine, otherwise error description
+        """
+        buf = self.r_buf
+        if count < READ_RESPONSE_LEN:
+            return "UART Communication Error: incomplete response"
+        not_zero = 0
+        for i in range(READ_RESPONSE_LEN):
+            not_zero |= buf[i]
+        if not_zero == 0:
+            return "UART Communication Error: no data"
+        if buf[11] != self.compute_crc8_atm(buf, 0, 4, 11):
+            return "UART Communication Error: CRC MISMATCH"
+        return None
+
+
+
     def read_reg(self, register):
         """reads the registry on the TMC with a given address.
-        returns the binary value of that register
+        the response is received into self.r_buf
 
         Args:
             register (int): HEX, which register to read
+
+        Returns number of bytes received
         """
         if self.ser is None:
-            pdebug("Cannot read reg, serial is not initialized", Loglevel.ERROR)
-            return False
+            perror("Cannot read reg, serial is not initialized")
+            return 0
 
+        started = time.monotonic_ns()
+        self.select()
+        if self.ser.timeout != self.read_timeout:
+            self.ser.timeout = self.read_timeout
         #self.ser.reset_output_buffer()
         self.ser.reset_input_buffer()
 
-        self.r_frame[1] = self.mtr_id
-        self.r_frame[2] = register
-        self.r_frame[3] = self.compute_crc8_atm(self.r_frame[:-1])
+        self.prepare_read_frame(register)
 
         rtn = self.ser.write(self.r_frame)
         if rtn != len(self.r_frame):
-            pdebug("Err in write", Loglevel.ERROR)
-            return False
+            perror("Err in write")
+            return 0
 
         # adjust per baud and hardware. Sequential reads without some delay fail.
         time.sleep(self.communication_pause)
 
-        rtn = self.ser.read(12)
-        #pdebug(f"received {len(rtn)} bytes; {len(rtn*8)} bits")
-        #pdebug(rtn.hex())
+        count = self.ser.readinto(self.r_buf) or 0
+        #pdebug(f"received {count} bytes; {count*8} bits")
 
         time.sleep(self.communication_pause)
+        self.record_transaction(started)
+
+        return count
 
-        return rtn
+
+
+    def record_transaction(self, started):
+        duration = time.monotonic_ns() - started
+        if duration > self.max_transaction_ns:
+            self.max_transaction_ns = duration
+
+
+
+    def record_read(self, ok):
+        """error statistics and continuous tuning of pause and timeout
+
+        Every TUNE_WINDOW reads: too many failures slow the link down by 25 %,
+        a clean window speeds it up by 1/8 towards the calibrated floor.
+        """
+        self.reads += 1
+        self.window_reads += 1
+        if not ok:
+            self.read_errors += 1
+            self.window_errors += 1
+        if self.window_reads < TUNE_WINDOW:
+            return
+        if self.window_errors > TUNE_MAX_ERRORS:
+            self.communication_pause = min(self.max_pause, max(self.pause_floor, self.communication_pause * 1.25))
+            self.read_timeout = min(self.max_timeout, self.read_timeout * 1.25)
+            self.tunings += 1
+            pdebug(f"UART errors {self.window_errors}/{self.window_reads}, pause raised to {self.communication_pause}")
+        elif self.window_errors == 0 and (self.communication_pause > self.min_pause or self.read_timeout > self.min_timeout):
+            # each value goes down to its own floor, they were raised to different ceilings
+            self.communication_pause = max(self.min_pause, self.communication_pause * 7 / 8)
+            self.read_timeout = max(self.min_timeout, self.read_timeout * 7 / 8)
+            self.tunings += 1
+        self.window_reads = 0
+        self.window_errors = 0
+
+
+
+    def link_stats(self):
+        return {
+            "pause_us": int(self.communication_pause * 1_000_000),
+            "timeout_us": int(self.read_timeout * 1_000_000),
+            "min_pause_us": int(self.min_pause * 1_000_000),
+            "min_timeout_us": int(self.min_timeout * 1_000_000),
+            "reads": self.reads,
+            "read_errors": self.read_errors,
+            "tunings": self.tunings,
+            }
 
 
 
@@ -242,28 +520,23 @@ class TMC_UART:
             return -1
         while True:
             tries -= 1
-            rtn = self.read_reg(register)
-            rtn_data = rtn[7:11]
-            not_zero_count = len([elem for elem in rtn if elem != 0])
-
-            if(len(rtn)<12 or not_zero_count == 0):
-                perror(f"""UART Communication Error:
-                                    {len(rtn_data)} data bytes |
-                                    {len(rtn)} total bytes""")
-            elif rtn[11] != self.compute_crc8_atm(rtn[4:11]):
-                perror("UART Communication Error: CRC MISMATCH")
-            else:
+            count = self.read_reg(register)
+            error = self.check_response(count)
+            self.record_read(error is None)
+            if error is None:
                 break
+            perror(error, f"({count} bytes)")
 
             if tries<=0:
                 perror("after 10 tries not valid answer")
                 pdebug(f"snd:\t{bytes(self.r_frame)}")
-                pdebug(f"rtn:\t{rtn}")
+                pdebug(f"rtn:\t{bytes(self.r_buf[:count])}")
                 self.handle_error()
                 return -1
 
-        val = struct.unpack(">i",rtn_data)[0]
-        pdebug(f"From regiter {hex(register)} read value {hex(val)}")
+        val = struct.unpack_from(">i", self.r_buf, 7)[0]
+        if logger.debug_on:
+            pdebug(f"From regiter {hex(register)} read value {hex(val)}")
         return val
 
 
@@ -282,20 +555,15 @@ class TMC_UART:
             perror("Cannot write reg, serial is not initialized")
             return False
 
+        started = time.monotonic_ns()
+        self.select()
         #self.ser.reset_output_buffer()
         self.ser.reset_input_buffer()
 
-        self.w_frame[1] = self.mtr_id
-        self.w_frame[2] =  register | 0x80  # set write bit
-
-        self.w_frame[3] = 0xFF & (val>>24)
-        self.w_frame[4] = 0xFF & (val>>16)
-        self.w_frame[5] = 0xFF & (val>>8)
-        self.w_frame[6] = 0xFF & val
-
-        self.w_frame[7] = self.compute_crc8_atm(self.w_frame[:-1])
+        self.prepare_write_frame(register, val)
 
-        pdebug(f"Writing to reg {hex(register)} value {hex(val)}")
+        if logger.debug_on:
+            pdebug(f"Writing to reg {hex(register)} value {hex(val)}")
 
         rtn = self.ser.write(self.w_frame)
         if rtn != len(self.w_frame):
@@ -303,6 +571,7 @@ class TMC_UART:
             return False
 
         time.sleep(self.communication_pause)
+        self.record_transaction(started)
 
         return True
 
@@ -334,14 +603,117 @@ class TMC_UART:
                 perror("writing not successful!")
                 pdebug(f"ifcnt: {ifcnt1}, {ifcnt2}")
             else:
+                self.shadow.put(register, val)
                 return True
             if tries<=0:
                 perror("after 10 tries no valid write access")
+                self.shadow.forget(register)
                 self.handle_error()
                 return -1
 
 
 
+    def read_cached(self, register):
+        """returns register value from the shadow, reads it from the TMC on miss
+
+        Args:
+            register (int): HEX, which register to read
+
+        Returns None for a write only register which was not written yet, -1 on read error
+        """
+        val = self.shadow.get(register)
+        if val is not None:
+            return val
+        if register in WRITE_ONLY_REGISTERS:
+            return None
+        val = self.read_int(register)
+        if val != -1:
+            self.shadow.put(register, val)
+        return val
+
+
+
+    def write_cached(self, register, val):
+        """writes the register with check unless the shadow says it already holds val"""
+        if self.shadow.get(register) == val:
+            return True
+        return self.write_reg_check(register, val)
+
+
+
+    def modify_reg(self, register, set_mask=0, clear_mask=0):
+        """read-modify-write against the shadow, one verified write when the value changes
+
+        Args:
+            register (int): HEX, which register to modify
+            set_mask (int): bits to set
+            clear_mask (int): bits to clear (applied before set_mask)
+        """
+        val = self.read_cached(register)
+        if val is None or val == -1:
+            perror(f"Cannot modify reg {hex(register)}, current value unknown")
+            return False
+        new_val = (val & ~clear_mask) | set_mask
+        if new_val == val:
+            return True
+        return self.write_reg_check(register, new_val)
+
+
+
+    def batch(self):
+        """returns WriteBatch collecting writes for one IFCNT verified transaction"""
+        return WriteBatch(self)
+
+
+
+    def write_batch(self, registers, values):
+        """writes all registers back to back and verifies them with one IFCNT read
+
+        IFCNT has to advance by exactly the number of writes. When it does not,
+        every register is written again with write_reg_check.
+
+        Args:
+            registers (list): HEX, registers to write
+            values (list): values for the registers
+        """
+        if not registers:
+            return True
+        if self.ser is None:
+            perror("Cannot write batch, serial is not initialized")
+            return False
+        ifcnt1 = self.read_int(IFCNT)
+        if ifcnt1 != -1:
+            for i in range(len(registers)):
+                self.write_reg(registers[i], values[i])
+            ifcnt2 = self.read_int(IFCNT)
+            if ifcnt2 == (ifcnt1 + len(registers)) & 0xFF:
+                for i in range(len(registers)):
+                    self.shadow.put(registers[i], values[i])
+                return True
+            perror(f"batch of {len(registers)} writes not verified, ifcnt: {ifcnt1}, {ifcnt2}")
+        ok = True
+        for i in range(len(registers)):
+            if self.write_reg_check(registers[i], values[i]) is not True:
+                ok = False
+        return ok
+
+
+
+    def check_reset(self):
+        """reads GSTAT, drops the shadow when the driver was reset and clears the flag
+
+        Returns True when a reset was detected
+        """
+        gstat = self.read_int(GSTAT)
+        if gstat == -1 or not gstat & reset:
+            return False
+        pdebug("Driver reset detected, dropping register shadow")
+        self.shadow.invalidate()
+        self.write_reg(GSTAT, reset)
+        return True
+
+
+
     def flush_serial_buffer(self):
         """this function clear the communication buffers of the Raspberry Pi"""
         if self.ser is None:
@@ -386,8 +758,8 @@ class TMC_UART:
             pdebug("Everything looks fine in GSTAT")
         else:
             if gstat & reset:
-                pdebug("The Driver has been reset since the last read access to GSTAT",
-                                    Loglevel.DEBUG)
+                pdebug("The Driver has been reset since the last read access to GSTAT")
+                self.shadow.invalidate()
             if gstat & drv_err:
                 pdebug("""The driver has been shut down due to overtemperature or short
                       circuit detection since the last read access""")
@@ -407,20 +779,19 @@ class TMC_UART:
         """
 
         if self.ser is None:
-            pdebug("Cannot test UART, serial is not initialized", Loglevel.ERROR)
+            perror("Cannot test UART, serial is not initialized")
             return False
 
+        self.select()
         #self.ser.reset_output_buffer()
         self.ser.reset_input_buffer()
 
-        self.r_frame[1] = self.mtr_id
-        self.r_frame[2] = register
-        self.r_frame[3] = self.compute_crc8_atm(self.r_frame[:-1])
+        self.prepare_read_frame(register)
 
         pdebug(f"Writing hex: {self.r_frame.hex()}")
         rtn = self.ser.write(self.r_frame)
         if rtn != len(self.r_frame):
-            pdebug("Err in write", Loglevel.ERROR)
+            perror("Err in write")
             return False
 
         # adjust per baud and hardware. Sequential reads without some delay fail.
@@ -434,4 +805,203 @@ class TMC_UART:
 
         time.sleep(self.communication_pause)
 
-        return bytes(self.r_frame), rtn
\ No newline at end of file
+        return bytes(self.r_frame), rtn
+
+
+
+class AsyncTMC_UART:
+    """asyncio variant of the TMC_UART transactions
+
+    Shares frames, receive buffer and register shadow with the wrapped
+    TMC_UART, but yields to the event loop for communication pauses and while
+    waiting for the response (polling in_waiting), so register traffic does
+    not stop step generation. max_stall_ns is the longest stretch between two
+    yields seen inside these calls.
+
+    Transactions of concurrent tasks are serialized by a lock. A blocking
+    TMC_UART call from an HTTP handler can still land in the middle of one;
+    the async transaction then fails validation and is retried.
+    """
+    def __init__(self, tmc_uart):
+        self.tmc = tmc_uart
+        # one transaction at a time on the wire, shared by all handles of a bus
+        self.lock = tmc_uart.bus.lock if tmc_uart.bus is not None else Lock()
+        self.max_stall_ns = 0
+        self.resumed_ns = 0
+
+    async def pause(self, seconds):
+        now = time.monotonic_ns()
+        if now - self.resumed_ns > self.max_stall_ns:
+            self.max_stall_ns = now - self.resumed_ns
+        await async_sleep(seconds)
+        self.resumed_ns = time.monotonic_ns()
+
+    async def read_reg(self, register):
+        """async TMC_UART.read_reg, returns number of bytes received into r_buf"""
+        async with self.lock:
+            return await self.locked_read_reg(register)
+
+    async def locked_read_reg(self, register):
+        tmc = self.tmc
+        ser = tmc.ser
+        if ser is None:
+            perror("Cannot read reg, serial is not initialized")
+            return 0
+        self.resumed_ns = time.monotonic_ns()
+        tmc.select()
+        ser.reset_input_buffer()
+        tmc.prepare_read_frame(register)
+        if ser.write(tmc.r_frame) != len(tmc.r_frame):
+            perror("Err in write")
+            return 0
+        await self.pause(tmc.communication_pause)
+        deadline = time.monotonic_ns() + int(tmc.read_timeout * 1_000_000_000)
+        while ser.in_waiting < READ_RESPONSE_LEN and time.monotonic_ns() < deadline:
+            await self.pause(0)
+        # only what has arrived, readinto would block for the serial timeout waiting for the rest
+        # (a missing driver leaves just the 4 byte echo of the single wire line)
+        waiting = min(ser.in_waiting, len(tmc.r_buf))
+        count = (ser.readinto(memoryview(tmc.r_buf)[:waiting]) or 0) if waiting else 0
+        await self.pause(tmc.communication_pause)
+        return count
+
+    async def read_int(self, register, tries=10):
+        """async TMC_UART.read_int"""
+        tmc = self.tmc
+        if tmc.ser is None:
+            perror("Cannot read int, serial is not initialized")
+            return -1
+        while True:
+            tries -= 1
+            count = await self.read_reg(register)
+            error = tmc.check_response(count)
+            tmc.record_read(error is None)
+            if error is None:
+                break
+            perror(error, f"({count} bytes)")
+            if tries<=0:
+                perror("after 10 tries not valid answer")
+                return -1
+        val = struct.unpack_from(">i", tmc.r_buf, 7)[0]
+        if logger.debug_on:
+            pdebug(f"From regiter {hex(register)} read value {hex(val)}")
+        return val
+
+    async def read_cached(self, register):
+        """async TMC_UART.read_cached"""
+        tmc = self.tmc
+        val = tmc.shadow.get(register)
+        if val is not None:
+            return val
+        if register in WRITE_ONLY_REGISTERS:
+            return None
+        val = await self.read_int(register)
+        if val != -1:
+            tmc.shadow.put(register, val)
+        return val
+
+    async def write_reg(self, register, val):
+        """async TMC_UART.write_reg"""
+        async with self.lock:
+            return await self.locked_write_reg(register, val)
+
+    async def locked_write_reg(self, register, val):
+        tmc = self.tmc
+        ser = tmc.ser
+        if ser is None:
+            perror("Cannot write reg, serial is not initialized")
+            return False
+        self.resumed_ns = time.monotonic_ns()
+        tmc.select()
+        ser.reset_input_buffer()
+        tmc.prepare_write_frame(register, val)
+        if logger.debug_on:
+            pdebug(f"Writing to reg {hex(register)} value {hex(val)}")
+        if ser.write(tmc.w_frame) != len(tmc.w_frame):
+            perror("Err in write")
+            return False
+        await self.pause(tmc.communication_pause)
+        return True
+
+    async def write_reg_check(self, register, val, tries=10):
+        """async TMC_UART.write_reg_check, IFCNT has to advance by one"""
+        tmc = self.tmc
+        if tmc.ser is None:
+            perror("Cannot write reg check, serial is not initialized")
+            return False
+        ifcnt1 = await self.read_int(IFCNT)
+        while True:
+            await self.write_reg(register, val)
+            tries -= 1
+            ifcnt2 = await self.read_int(IFCNT)
+            if ifcnt1 != -1 and ifcnt2 == (ifcnt1 + 1) & 0xFF:
+                tmc.shadow.put(register, val)
+                return True
+            perror("writing not successful!")
+            pdebug(f"ifcnt: {ifcnt1}, {ifcnt2}")
+            if tries<=0:
+                perror("after 10 tries no valid write access")
+                tmc.shadow.forget(register)
+                return -1
+            ifcnt1 = ifcnt2
+
+    async def write_cached(self, register, val):
+        """async TMC_UART.write_cached"""
+        if self.tmc.shadow.get(register) == val:
+            return True
+        return await self.write_reg_check(register, val)
+
+    async def modify_reg(self, register, set_mask=0, clear_mask=0):
+        """async TMC_UART.modify_reg"""
+        val = await self.read_cached(register)
+        if val is None or val == -1:
+            perror(f"Cannot modify reg {hex(register)}, current value unknown")
+            return False
+        new_val = (val & ~clear_mask) | set_mask
+        if new_val == val:
+            return True
+        return await self.write_reg_check(register, new_val)
+
+    def batch(self):
+        """returns AsyncWriteBatch collecting writes for one IFCNT verified transaction"""
+        return AsyncWriteBatch(self)
+
+    async def write_batch(self, registers, values):
+        """async TMC_UART.write_batch"""
+        if not registers:
+            return True
+        tmc = self.tmc
+        if tmc.ser is None:
+            perror("Cannot write batch, serial is not initialized")
+            return False
+        ifcnt1 = await self.read_int(IFCNT)
+        if ifcnt1 != -1:
+            for i in range(len(registers)):
+                await self.write_reg(registers[i], values[i])
+            ifcnt2 = await self.read_int(IFCNT)
+            if ifcnt2 == (ifcnt1 + len(registers)) & 0xFF:
+                for i in range(len(registers)):
+                    tmc.shadow.put(registers[i], values[i])
+                return True
+            perror(f"batch of {len(registers)} writes not verified, ifcnt: {ifcnt1}, {ifcnt2}")
+        ok = True
+        for i in range(len(registers)):
+            if await self.write_reg_check(registers[i], values[i]) is not True:
+                ok = False
+        return ok
+
+    async def check_reset(self):
+        """async TMC_UART.check_reset"""
+        gstat = await self.read_int(GSTAT)
+        if gstat == -1 or not gstat & reset:
+            return False
+        pdebug("Driver reset detected, dropping register shadow")
+        self.tmc.shadow.invalidate()
+        await self.write_reg(GSTAT, reset)
+        return True
+
+    def stats(self):
+        return {
+            "max_stall_us": self.max_stall_ns // 1000,
+            "max_blocking_transaction_us": self.tmc.max_transaction_ns // 1000,
+            }
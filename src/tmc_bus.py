@@ -0,0 +1,106 @@
+import time
+from asyncio import Lock
+import busio
+import digitalio
+import config
+from tmc2208 import TMC_UART
+
+# CD4051 switches in well under a microsecond, give the line time to idle high
+MUX_SETTLE_S = 0.0001
+
+class MuxedTmcBus:
+    """single UART multiplexed by a CD4051 across several TMC2208 drivers
+
+    Owns the serial port and the mux select lines. Per driver TMC_UART
+    handles (see handle) share both and switch the mux before each
+    transaction. Operations queued with submit are executed by run grouped
+    by channel, starting with the channel already selected, so a pass over
+    all drivers pays every switch and settle delay only once.
+    """
+    def __init__(self, baudrate, select_pins, channels, settle_s=MUX_SETTLE_S):
+        self.ser = busio.UART(config.UART_TX, config.UART_RX, baudrate=baudrate)
+        # adjust per baud and hardware. Sequential reads without some delay fail.
+        self.ser.timeout = 20000/baudrate
+        self.select_pins = []
+        for pin in select_pins:
+            out = digitalio.DigitalInOut(pin)
+            out.direction = digitalio.Direction.OUTPUT
+            self.select_pins.append(out)
+        self.settle_s = settle_s
+        self.lock = Lock()
+        self.channel = -1
+        self.switches = 0
+        self.queue = []
+        self.handles = [TMC_UART(baudrate, bus=self, channel=channel) for channel in range(channels)]
+
+    def handle(self, channel):
+        return self.handles[channel]
+
+    def select(self, channel):
+        if channel == self.channel:
+            return
+        for bit, pin in enumerate(self.select_pins):
+            pin.value = bool(channel >> bit & 1)
+        self.channel = channel
+        self.switches += 1
+        time.sleep(self.settle_s)
+
+    def submit(self, channel, register, val=None):
+        """queues a register read (val None) or verified write for run
+
+        Returns the operation, a list [channel, register, val, result];
+        result is filled by run.
+        """
+        op = [channel, register, val, None]
+        self.queue.append(op)
+        return op
+
+    def ordered_queue(self):
+        """pending operations grouped by channel, current channel first, submit order kept inside a channel"""
+        current = self.channel if self.channel >= 0 else 0
+        count = len(self.handles)
+        # one pass per channel instead of sorted(), which is not stable on CircuitPython
+        ops = []
+        queue = self.queue
+        for step in range(count):
+            channel = (current + step) % count
+            for op in queue:
+                if op[0] == channel:
+                    ops.append(op)
+        return ops
+
+    def run(self):
+        """executes all queued operations, returns them with results"""
+        ops = self.ordered_queue()
+        self.queue = []
+        for op in ops:
+            handle = self.handles[op[0]]
+            if op[2] is None:
+                op[3] = handle.read_int(op[1])
+            else:
+                op[3] = handle.write_reg_check(op[1], op[2])
+        return ops
+
+    async def run_async(self):
+        """run, yielding to the event loop between and during transactions"""
+        ops = self.ordered_queue()
+        self.queue = []
+        for op in ops:
+            handle = self.handles[op[0]].aio
+            if op[2] is None:
+                op[3] = await handle.read_int(op[1])
+            else:
+                op[3] = await handle.write_reg_check(op[1], op[2])
+        return ops
+
+    def read_all(self, register):
+        """reads register from every driver, returns list of values by channel"""
+        ops = [self.submit(channel, register) for channel in range(len(self.handles))]
+        self.run()
+        return [op[3] for op in ops]
+
+    def stats(self):
+        return {
+            "channel": self.channel,
+            "switches": self.switches,
+            }
@@ -0,0 +1,185 @@
+import struct
+import config
+from log import get_logger
+from tmc2208 import IFCNT, TUNE_MAX_FACTOR
+
+logger = get_logger("tmc_calibration")
+pdebug = logger.debug
+
+# header byte marking valid calibration data in NVM, bump when the layout changes
+NVM_MAGIC = 0xC5
+# per channel pause and read timeout in us
+NVM_RECORD = "<HH"
+NVM_RECORD_LEN = struct.calcsize(NVM_RECORD)
+CALIBRATION_SAMPLES = 10
+# 4 bytes echo + 8 bytes reply, 10 bits per byte, the timeout cannot go below that
+READ_FRAME_BITS = 12 * 10
+# calibrated values are multiplied by this, the edge of working is not where to run
+SAFETY_FACTOR = 1.25
+
+try:
+    from microcontroller import nvm
+except ImportError:
+    nvm = None
+
+
+def reads_ok(tmc, samples):
+    """True when `samples` consecutive IFCNT reads come back complete with matching CRC"""
+    for _ in range(samples):
+        if tmc.check_response(tmc.read_reg(IFCNT)) is not None:
+            return False
+    return True
+
+
+async def reads_ok_async(tmc, samples):
+    """reads_ok through tmc.aio"""
+    for _ in range(samples):
+        if tmc.check_response(await tmc.aio.read_reg(IFCNT)) is not None:
+            return False
+    return True
+
+
+def search_us(tmc, low_us, high_us, apply, samples):
+    """smallest value in [low_us, high_us] for which reads still work, None when even high_us fails"""
+    apply(high_us)
+    if not reads_ok(tmc, samples):
+        return None
+    while low_us < high_us:
+        mid = (low_us + high_us) // 2
+        apply(mid)
+        if reads_ok(tmc, samples):
+            high_us = mid
+        else:
+            low_us = mid + 1
+    return high_us
+
+
+async def search_us_async(tmc, low_us, high_us, apply, samples):
+    """search_us through tmc.aio"""
+    apply(high_us)
+    if not await reads_ok_async(tmc, samples):
+        return None
+    while low_us < high_us:
+        mid = (low_us + high_us) // 2
+        apply(mid)
+        if await reads_ok_async(tmc, samples):
+            high_us = mid
+        else:
+            low_us = mid + 1
+    return high_us
+
+
+def calibrate(tmc, samples=CALIBRATION_SAMPLES):
+    """binary searches minimum communication_pause and read timeout of one driver
+
+    Pause is searched with the default timeout, timeout then with the found
+    pause. The results with SAFETY_FACTOR become the floors continuous tuning
+    (TMC_UART.record_read) may go down to. Returns True when calibrated, on
+    failure the defaults are kept.
+    """
+    pause = tmc.communication_pause
+    timeout = tmc.read_timeout
+    apply_pause, apply_timeout = appliers(tmc)
+    # from one byte time, a pause of 0 would leave tuning nothing to raise
+    pause_us = search_us(tmc, int(tmc.pause_floor * 1_000_000), int(pause * 1_000_000), apply_pause, samples)
+    timeout_us = None
+    if pause_us is not None:
+        apply_pause(pause_us)
+        timeout_us = search_us(tmc, frame_us(tmc), int(timeout * 1_000_000), apply_timeout, samples)
+    return finish(tmc, pause, timeout, pause_us, timeout_us)
+
+
+async def calibrate_async(tmc, samples=CALIBRATION_SAMPLES):
+    """calibrate through tmc.aio, yields to the event loop between and during the reads"""
+    pause = tmc.communication_pause
+    timeout = tmc.read_timeout
+    apply_pause, apply_timeout = appliers(tmc)
+    pause_us = await search_us_async(tmc, int(tmc.pause_floor * 1_000_000), int(pause * 1_000_000), apply_pause, samples)
+    timeout_us = None
+    if pause_us is not None:
+        apply_pause(pause_us)
+        timeout_us = await search_us_async(tmc, frame_us(tmc), int(timeout * 1_000_000), apply_timeout, samples)
+    return finish(tmc, pause, timeout, pause_us, timeout_us)
+
+
+def appliers(tmc):
+    def apply_pause(us):
+        tmc.communication_pause = us / 1_000_000
+    def apply_timeout(us):
+        tmc.read_timeout = us / 1_000_000
+    return apply_pause, apply_timeout
+
+
+def frame_us(tmc):
+    return READ_FRAME_BITS * 1_000_000 // tmc.baudrate
+
+
+def finish(tmc, pause, timeout, pause_us, timeout_us):
+    """applies the search result, restores pause and timeout when it failed"""
+    if timeout_us is None:
+        tmc.communication_pause = pause
+        tmc.read_timeout = timeout
+        pdebug("UART calibration failed on channel", tmc.channel)
+        return False
+    apply_limits(tmc, int(pause_us * SAFETY_FACTOR), int(timeout_us * SAFETY_FACTOR))
+    pdebug(f"UART channel {tmc.channel} calibrated: pause {tmc.communication_pause}, timeout {tmc.read_timeout}")
+    return True
+
+
+def apply_limits(tmc, pause_us, timeout_us):
+    """calibrated values become floor and start point of tuning, ceiling never drops below the defaults"""
+    default_pause = 500 / tmc.baudrate
+    default_timeout = 20000 / tmc.baudrate
+    tmc.communication_pause = tmc.min_pause = max(tmc.pause_floor, pause_us / 1_000_000)
+    tmc.read_timeout = tmc.min_timeout = timeout_us / 1_000_000
+    tmc.max_pause = max(default_pause, tmc.min_pause * TUNE_MAX_FACTOR)
+    tmc.max_timeout = max(default_timeout, tmc.min_timeout * TUNE_MAX_FACTOR)
+
+
+def unique(tmcs):
+    """drivers sharing one TMC_UART (no mux) are calibrated once"""
+    result = []
+    for tmc in tmcs:
+        if tmc not in result:
+            result.append(tmc)
+    return result
+
+
+def save(tmcs):
+    if nvm is None:
+        return False
+    offset = config.NVM_CALIBRATION_OFFSET
+    tmcs = unique(tmcs)
+    data = bytearray(1 + NVM_RECORD_LEN * len(tmcs))
+    data[0] = NVM_MAGIC
+    for i, tmc in enumerate(tmcs):
+        struct.pack_into(NVM_RECORD, data, 1 + i * NVM_RECORD_LEN,
+                         min(0xFFFF, int(tmc.min_pause * 1_000_000)), min(0xFFFF, int(tmc.min_timeout * 1_000_000)))
+    nvm[offset:offset + len(data)] = data
+    return True
+
+
+def load(tmcs):
+    """applies calibration stored by save, returns False when there is none"""
+    if nvm is None:
+        return False
+    offset = config.NVM_CALIBRATION_OFFSET
+    tmcs = unique(tmcs)
+    if nvm[offset] != NVM_MAGIC:
+        return False
+    data = nvm[offset + 1:offset + 1 + NVM_RECORD_LEN * len(tmcs)]
+    for i, tmc in enumerate(tmcs):
+        pause_us, timeout_us = struct.unpack_from(NVM_RECORD, data, i * NVM_RECORD_LEN)
+        if timeout_us == 0 or timeout_us == 0xFFFF:
+            # erased or never calibrated channel (more motors than when saved)
+            continue
+        apply_limits(tmc, pause_us, timeout_us)
+    return True
+
+
+def calibrate_all(tmcs, samples=CALIBRATION_SAMPLES):
+    ok = True
+    for tmc in unique(tmcs):
+        ok = calibrate(tmc, samples) and ok
+    save(tmcs)
+    return ok
@@ -1,8 +1,18 @@
-from adafruit_httpserver import Server, Request, Response, Websocket, GET, MIMETypes
+from adafruit_httpserver import Server, Request, Response, JSONResponse, Websocket, GET, POST, MIMETypes
 import wifi
-from log import log_items, get_last_log, pdebug
-from api import JoyApi, MotorApi
+from log import log_buffer, get_last_log, get_logger
+from api import JoyApi, MotorApi, StateApi, LogApi, JobApi, StatsApi
+from log_stream import LogStream
+from page_cache import PageCache
+from static_files import StaticFiles, NOT_MODIFIED_304
+from ws_telemetry import TelemetryFrame
+from ws_broadcast import WsBroadcaster
+from loop_stats import Histogram
 import gc
+import time
+
+logger = get_logger("web")
+pdebug = logger.debug
 
 MIMETypes.configure(
     default_to="text/plain",
@@ -15,9 +25,14 @@ pages = {
     "/log": "Log",
     "/joy": "Joystick",
     "/motors": "Motors",
+    "/stats": "Stats",
     "/about": "About",
 }
 
+def read_static(name):
+    with open("/static/" + name, "r") as file:
+        return file.read()
+
 def webpage(title, content, nav, js = None):
     js_code = "" if js is None else f"<script src=\"{js}\"></script>"
     html = f"""
@@ -60,72 +75,113 @@ def webpage(title, content, nav, js = None):
     return html
 
 class WebServer:
-    def __init__(self, pool, joystick, motor):
+    def __init__(self, pool, joystick, motion, screen, state, jobs, profiler):
         self.joystick = joystick
+        self.screen = screen
+        self.profiler = profiler
+        # time spent in one server.poll, including the handler of a request
+        self.poll_times = Histogram()
         # Create an HTTP server instance
         self.server = Server(pool, "/static", debug=True)
         self.joy_api = JoyApi(joystick, self.server)
-        self.motor_api = MotorApi(self.server, motor)
-        self.websocket: Websocket = None
-        self.current_page = "/"
-        self.last_sent_log = None
+        self.motor_api = MotorApi(self.server, motion, jobs)
+        self.job_api = JobApi(self.server, jobs)
+        self.state_api = StateApi(self.server, state)
+        self.log_api = LogApi(self.server)
+        self.static_files = StaticFiles(self.server, "/static")
+        self.telemetry_frame = TelemetryFrame(joystick, motion)
+        self.broadcaster = WsBroadcaster()
+        self.stats_api = StatsApi(self.server, profiler, {
+            "http_poll": self.poll_times.stats,
+            "websocket": self.broadcaster.stats,
+            "jobs": jobs.stats,
+            })
+        # first log not in the last rendered log page, websocket continues from there
+        self.rendered_log = 0
+        self.log_stream = LogStream(self.broadcaster, get_last_log())
+
+        self.page_cache = PageCache()
+        self.page_cache.add("/", lambda: webpage('MTU control', 'Hello', self.build_nav("/")))
+        self.page_cache.add("/joy", lambda: webpage('Joystick', read_static("joy.html"), self.build_nav("/joy"), "joy.js"))
+        self.page_cache.add("/motors", lambda: webpage('Motors', read_static("motors.html"), self.build_nav("/motors"), "motors.js"))
+        self.page_cache.add("/stats", lambda: webpage('Stats', read_static("stats.html"), self.build_nav("/stats"), "stats.js"))
+        self.page_cache.add("/about", lambda: webpage('MTU about', 'About', self.build_nav("/about")))
 
         # Add a route for the root path
         @self.server.route("/")
         def mainPage(request):
-            self.current_page = "/"
-            return Response(request, f"{webpage('MTU control', 'Hello', self.build_nav())}", content_type='text/html')
+            return self.cached_page(request, "/")
 
         @self.server.route("/log")
         def logPage(request):
-            self.current_page = "/log"
-            return Response(request, f"{webpage('Logs', self.render_logs(), self.build_nav(), "log.js")}", content_type='text/html')
+            return Response(request, webpage('Logs', self.render_logs(), self.build_nav("/log"), "log.js"), content_type='text/html')
 
         @self.server.route("/joy")
         def joyPage(request):
-            self.current_page = "/joy"
-            with open("/static/joy.html", "r") as file:
-                content = file.read()
-            return Response(request, f"{webpage(
-                'Joystick', 
-                content, 
-                self.build_nav(), 
-                "joy.js")}", 
-              content_type='text/html')
-        
+            return self.cached_page(request, "/joy")
+
         @self.server.route("/motors")
-        def joyPage(request):
-            self.current_page = "/motors"
-            with open("/static/motors.html", "r") as file:
-                content = file.read()
-            return Response(request, f"{webpage(
-                'Motors', 
-                content, 
-                self.build_nav(), 
-                "motors.js")}", 
-              content_type='text/html')
+        def motorsPage(request):
+            return self.cached_page(request, "/motors")
+
+        @self.server.route("/stats")
+        def statsPage(request):
+            return self.cached_page(request, "/stats")
 
         @self.server.route("/about")
         def aboutPage(request):
-            self.current_page = "/about"
-            return Response(request, f"{webpage('MTU about', 'About', self.build_nav())}", content_type='text/html')
+            return self.cached_page(request, "/about")
+
+        @self.server.route("/api/pages", GET)
+        def pageStats(request):
+            return JSONResponse(request, {"pages": self.page_cache.stats(), "static": self.static_files.stats()})
+
+        @self.server.route("/api/pages/invalidate", POST)
+        def invalidatePages(request):
+            # after uploading changed static html
+            self.page_cache.invalidate()
+            return JSONResponse(request, self.page_cache.stats())
+
+        @self.server.route("/api/loop", GET)
+        def loopStats(request):
+            # ?reset=1 starts new statistics, e.g. before a load test
+            data = {"motors": self.profiler.task("motors").stats(), "http_poll": self.poll_times.stats()}
+            if request.query_params.get("reset") == "1":
+                self.profiler.reset()
+                self.poll_times.reset()
+            return JSONResponse(request, data)
+
+        @self.server.route("/api/ws", GET)
+        def websocketStats(request):
+            return JSONResponse(request, {"broadcast": self.broadcaster.stats(), "logs": self.log_stream.stats()})
 
         @self.server.route("/connect-websocket", GET)
         def connect_client(request: Request):
-            if self.websocket is not None:
-                self.websocket.close()  # Close any existing connection
-            self.websocket = Websocket(request)
-            return self.websocket
+            websocket = Websocket(request)
+            self.broadcaster.add(websocket)
+            # only the log page (?logs=1) needs the logs since its render, the others get new ones
+            if request.query_params.get("logs") == "1":
+                self.log_stream.rewind(self.rendered_log)
+            return websocket
 
     def render_logs(self):
-        def to_log_line(log_item):
-            return f"<li>{log_item.to_string()}</li>"
-        last_log_elmt = f"<div>Last log: <strong id=\"lastLog\">{get_last_log()}</strong></div>"
-        return last_log_elmt + "<ul id=\"logs\">" + "\n".join(map(to_log_line, log_items)) + "</ul>"
-
-    def build_nav(self):
+        def to_log_line(slot):
+            return f"<li>{log_buffer.to_string(slot)}</li>"
+        self.rendered_log = get_last_log()
+        last_log_elmt = f"<div>Last log: <strong id=\"lastLog\">{self.rendered_log}</strong></div>"
+        return last_log_elmt + "<ul id=\"logs\">" + "\n".join(map(to_log_line, log_buffer.slots())) + "</ul>"
+
+    def cached_page(self, request, route):
+        """page from the cache, 304 when the browser has it already"""
+        body, etag = self.page_cache.get(route)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if self.page_cache.is_fresh(route, request.headers.get("If-None-Match")):
+            return Response(request, b"", headers=headers, status=NOT_MODIFIED_304)
+        return Response(request, body, headers=headers, content_type='text/html')
+
+    def build_nav(self, current_page):
         def to_nav_line(page_key):
-            return f"<li>{pages[page_key]}</li>" if (page_key == self.current_page) else f"<li><a href=\"{page_key}\">{pages[page_key]}</a></li>"
+            return f"<li>{pages[page_key]}</li>" if (page_key == current_page) else f"<li><a href=\"{page_key}\">{pages[page_key]}</a></li>"
         return " ".join(map(to_nav_line, pages.keys()))
 
     def start(self):
@@ -135,16 +191,22 @@ class WebServer:
 
     def poll(self):
         # Main loop to handle requests
+        started = time.monotonic_ns()
         try:
             self.server.poll()  # Poll for incoming requests
         except Exception as e:
             pdebug("Error:", e)
+        self.poll_times.add((time.monotonic_ns() - started) // 1000)
 
     def send_logs_if_needed(self):
-        if self.websocket is not None and self.last_sent_log != get_last_log():
-            def to_json_item(log_item):
-                return f"\"{log_item.log_number}\":\"{log_item.to_string()}\""
-            json_logs_element = "{" + ",".join(map(to_json_item, log_items)) + "}"
-            data_element = "{\"memory\":"+str(gc.mem_free())+"}"
-            self.websocket.send_message("{\"logs\":"+json_logs_element+",\"data\":"+data_element+"}", fail_silently=True)
-            self.last_sent_log = get_last_log()
\ No newline at end of file
+        """sends the websocket clients logs they have not got yet, at most WS_LOG_BUDGET bytes per call"""
+        if not self.broadcaster.clients or not self.log_stream.pending():
+            return
+        data_element = ('{"memory":%d,"lcd_max_slice_us":%d}' % (gc.mem_free(), self.screen.frame.max_slice_ns // 1000)).encode()
+        self.log_stream.send(data_element)
+
+    def send_telemetry(self, loop_us):
+        """pushes one binary telemetry frame to the websocket clients"""
+        if not self.broadcaster.clients:
+            return
+        self.broadcaster.send_message(self.telemetry_frame.pack(gc.mem_free(), loop_us))
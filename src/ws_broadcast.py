@@ -0,0 +1,97 @@
+import time
+import config
+from log import get_logger
+
+logger = get_logger("ws_broadcast")
+pdebug = logger.debug
+
+
+class WsClient:
+    def __init__(self, websocket):
+        self.websocket = websocket
+        # consecutive failed sends
+        self.failures = 0
+
+
+class WsBroadcaster:
+    """fans one message out to all connected websocket clients
+
+    Has send_message like a Websocket, so LogStream and telemetry serialize
+    each message once and hand the same buffer to every client. At most
+    max_clients are kept, the oldest is closed for a new one. A client whose
+    sends fail max_failures times in a row is dropped. Bytes sent within
+    one window of window_ms are capped by budget, a message over it is not
+    sent at all and send_message returns False, so websocket traffic cannot
+    hold the loop away from stepping.
+    """
+    def __init__(self, max_clients = None, budget = None, window_ms = None, max_failures = None):
+        self.max_clients = config.WS_MAX_CLIENTS if max_clients is None else max_clients
+        self.budget = config.WS_WINDOW_BUDGET if budget is None else budget
+        self.window_ns = (config.WS_WINDOW_MS if window_ms is None else window_ms) * 1_000_000
+        self.max_failures = config.WS_MAX_FAILURES if max_failures is None else max_failures
+        self.clients = []
+        self.window_start = time.monotonic_ns()
+        self.window_bytes = 0
+        self.messages = 0
+        self.bytes = 0
+        self.dropped_frames = 0
+        self.dropped_clients = 0
+
+    def add(self, websocket):
+        if len(self.clients) >= self.max_clients:
+            self.remove(self.clients[0])
+        self.clients.append(WsClient(websocket))
+        pdebug(f"Websocket client connected, {len(self.clients)} clients")
+
+    def remove(self, client):
+        self.clients.remove(client)
+        try:
+            client.websocket.close()
+        except Exception:
+            pass
+
+    def take_budget(self, length):
+        now = time.monotonic_ns()
+        if now - self.window_start >= self.window_ns:
+            self.window_start = now
+            self.window_bytes = 0
+        if self.window_bytes + length > self.budget:
+            return False
+        self.window_bytes += length
+        return True
+
+    def message_limit(self):
+        """longest message the window budget can take for all current clients"""
+        return self.budget // max(1, len(self.clients))
+
+    def send_message(self, message, fail_silently = True):
+        """sends to every client, False when nothing was sent because of the budget or no clients"""
+        if not self.clients:
+            return False
+        length = len(message) * len(self.clients)
+        if not self.take_budget(length):
+            self.dropped_frames += 1
+            return False
+        # iterate a copy, failing clients are removed
+        for client in tuple(self.clients):
+            try:
+                client.websocket.send_message(message, fail_silently=False)
+                client.failures = 0
+                self.bytes += len(message)
+            except Exception as e:
+                client.failures += 1
+                if client.failures >= self.max_failures:
+                    pdebug(f"Dropping websocket client after {client.failures} failed sends: {e}")
+                    self.remove(client)
+                    self.dropped_clients += 1
+        self.messages += 1
+        return True
+
+    def stats(self):
+        return {
+            "clients": len(self.clients),
+            "messages": self.messages,
+            "bytes": self.bytes,
+            "dropped_frames": self.dropped_frames,
+            "dropped_clients": self.dropped_clients,
+            }
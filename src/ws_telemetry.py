@@ -0,0 +1,45 @@
+import struct
+import time
+
+# first byte of a telemetry frame, log messages are JSON and start with "{"
+FRAME_TELEMETRY = 0x01
+# type, motor count, sequence, uptime ms, buttons, x, y, z, rx, ry, rz, mem free, loop max us
+HEADER_FORMAT = "<BBHIHHHHHHHIH"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+# steps to do, rpm, status index, padding
+MOTOR_FORMAT = "<IHBx"
+MOTOR_SIZE = struct.calcsize(MOTOR_FORMAT)
+# order known to scripts.js decodeTelemetry
+STATUSES = ("OK", "RUN", "OTPW", "OT", "SHRT")
+
+
+class TelemetryFrame:
+    """joystick and motor state packed into one preallocated binary frame
+
+    Layout is HEADER_FORMAT followed by MOTOR_FORMAT per motor, all little
+    endian, decoded by decodeTelemetry in static/scripts.js. Motors have
+    no position counter, steps_to_do and rpm describe the running move.
+    """
+    def __init__(self, joystick, motion):
+        self.joystick = joystick
+        self.motors = motion.motors
+        self.buf = bytearray(HEADER_SIZE + MOTOR_SIZE * len(self.motors))
+        self.view = memoryview(self.buf)
+        self.sequence = 0
+
+    def pack(self, mem_free, loop_us):
+        """fills the frame, returns a memoryview of it valid until the next pack"""
+        joy = self.joystick
+        x, y, z, r_x, r_y, r_z = joy.axes()
+        buf = self.buf
+        struct.pack_into(HEADER_FORMAT, buf, 0, FRAME_TELEMETRY, len(self.motors), self.sequence,
+                         (time.monotonic_ns() // 1_000_000) & 0xFFFFFFFF,
+                         joy.buttons(), x, y, z, r_x, r_y, r_z,
+                         mem_free, min(loop_us, 0xFFFF))
+        offset = HEADER_SIZE
+        for motor in self.motors:
+            struct.pack_into(MOTOR_FORMAT, buf, offset, min(motor.steps_to_do, 0xFFFFFFFF),
+                             min(abs(int(motor.rpm)), 0xFFFF), STATUSES.index(motor.status()))
+            offset += MOTOR_SIZE
+        self.sequence = (self.sequence + 1) & 0xFFFF
+        return self.view
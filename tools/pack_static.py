@@ -0,0 +1,58 @@
+"""Writes <name>.gz next to every css and js file in src/static.
+
+Run on the PC before copying src/ to the board. StaticFiles serves the
+.gz variant to browsers accepting gzip. Output is reproducible (no
+timestamp in the gzip header), unchanged files are not rewritten so their
+modification time, and with it the ETag on the board, stays the same.
+
+    python tools/pack_static.py [static dir]
+"""
+
+import gzip
+import os
+import sys
+
+STATIC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "static")
+EXTENSIONS = (".css", ".js")
+
+
+def compress(data):
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def pack(static_dir=STATIC):
+    """returns [(name, size, gzip size or None)]"""
+    packed = []
+    for name in sorted(os.listdir(static_dir)):
+        if not name.endswith(EXTENSIONS):
+            continue
+        path = os.path.join(static_dir, name)
+        with open(path, "rb") as file:
+            data = file.read()
+        compressed = compress(data)
+        gz_path = path + ".gz"
+        if len(compressed) >= len(data):
+            # tiny files grow, serve the original
+            if os.path.exists(gz_path):
+                os.remove(gz_path)
+            packed.append((name, len(data), None))
+            continue
+        old = None
+        if os.path.exists(gz_path):
+            with open(gz_path, "rb") as file:
+                old = file.read()
+        if old != compressed:
+            with open(gz_path, "wb") as file:
+                file.write(compressed)
+        packed.append((name, len(data), len(compressed)))
+    return packed
+
+
+def main():
+    static_dir = sys.argv[1] if len(sys.argv) > 1 else STATIC
+    for name, size, gz_size in pack(static_dir):
+        print(f"{name:12} {size:6} -> {'not packed' if gz_size is None else gz_size:>6}")
+
+
+if __name__ == "__main__":
+    main()